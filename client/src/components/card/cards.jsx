@@ -28,20 +28,26 @@ const Cards = () => {
   const [cardFilters, setCardFilters] = useState(initial_filter_state)
   const [filterConfigs, setFilterConfigs] = useState(card_filters)
   const [alert, setAlert] = useState({ new: false, opening: false, active_clients: 0 })
-  const [eventSource, setEventSource] = useState(null)
+  const eventSourceRef = useRef(null)
+  const lastEventIdRef = useRef(null) // id of the last notification received, to resume the stream after a reconnect
+  const reconnectTimerRef = useRef(null)
   const clientCountRef = useRef(null)
 
-  const start_notification_stream = () => {
-    if (eventSource) {
+  const start_notification_stream = (client_id = null) => {
+    if (eventSourceRef.current) {
       console.warn("EventSource already initialized, closing the previous connection.")
-      eventSource.close()
+      eventSourceRef.current.close()
     }
     // Generate a client ID using current timestamp + random string. TODO: Use a more robust method for production.
-    const client_id = `${Date.now()}-${Math.random().toString(36).substring(2, 10)}`
-    const event_source = new EventSource(`${main_api_base_url}/notifications/${client_id}`)
-    setEventSource(event_source)
+    client_id = client_id || `${Date.now()}-${Math.random().toString(36).substring(2, 10)}`
+    const resume_query = lastEventIdRef.current ? `?last_event_id=${lastEventIdRef.current}` : ""
+    const event_source = new EventSource(`${main_api_base_url}/notifications/${client_id}${resume_query}`)
+    eventSourceRef.current = event_source
 
     event_source.onmessage = (event) => {
+      if (event.lastEventId) {
+        lastEventIdRef.current = event.lastEventId
+      }
       const data = JSON.parse(event.data)
       if (data.type === "download") {
         setAlert((prev) => ({ ...prev, new: true }))
@@ -62,8 +68,12 @@ const Cards = () => {
       console.error("SSE connection error:", error)
       event_source.close()
 
-      setTimeout(() => {
-        // Browser will automatically attempt to reconnect after a delay.
+      // Reconnect with the last event id so the server replays the missed notifications instead of a full reload
+      clearTimeout(reconnectTimerRef.current)
+      reconnectTimerRef.current = setTimeout(() => {
+        if (eventSourceRef.current === event_source) {
+          start_notification_stream(client_id)
+        }
       }, 5000)
     }
     return event_source
@@ -106,10 +116,13 @@ const Cards = () => {
 
   useEffect(() => {
     get_cards_from_api()
-    const new_event_source = start_notification_stream()
+    lastEventIdRef.current = null // the cards are refetched in full, no need to replay older notifications
+    start_notification_stream()
 
     return () => {
-      new_event_source.close()
+      clearTimeout(reconnectTimerRef.current)
+      eventSourceRef.current?.close()
+      eventSourceRef.current = null
     }
   }, [cardFilters])
 
@@ -48,8 +48,11 @@ const LabProvider = ({ children }) => {
 
     const subscription = "the-lab" // listen for the-lab-log events from the server
     sio.off(subscription) // Remove existing listener to avoid duplicate logs
-    sio.on(subscription, (line) => {
-      _terminal.write(`\r ${line}\r`)
+    sio.on(subscription, (lines) => {
+      // the server batches the log lines tailed since the last emit
+      for (const line of Array.isArray(lines) ? lines : [lines]) {
+        _terminal.write(`\r ${line}\r`)
+      }
     })
 
     // data to send in the request query
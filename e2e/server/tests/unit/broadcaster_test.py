@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+# Mock problematic imports before they're loaded
+sys.modules["src.utils.logger"] = MagicMock()
+
+from src.utils.broadcaster import Broadcaster, is_stream_id, stream_id_key  # type: ignore  # noqa: E402
+
+
+def drain(queue: asyncio.Queue) -> list:
+    return [queue.get_nowait() for _ in range(queue.qsize())]
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestBroadcaster:
+    """Test the per-worker notifications fan-out"""
+
+    @pytest.mark.unit_smoke
+    def test_fan_out_reaches_every_subscriber(self):
+        """Test that each subscriber receives every message"""
+        broadcaster = Broadcaster(queue_size=10)
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+
+        broadcaster.fan_out(("1-0", "a"))
+        broadcaster.fan_out(("2-0", "b"))
+
+        assert drain(first) == [("1-0", "a"), ("2-0", "b")]
+        assert drain(second) == [("1-0", "a"), ("2-0", "b")]
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Test that a full queue drops its oldest message without affecting other subscribers"""
+        broadcaster = Broadcaster(queue_size=10)
+        slow = broadcaster.subscribe(queue_size=2)
+        fast = broadcaster.subscribe()
+
+        for notification in [("1-0", "a"), ("2-0", "b"), ("3-0", "c")]:
+            broadcaster.fan_out(notification)
+
+        assert drain(slow) == [("2-0", "b"), ("3-0", "c")]
+        assert drain(fast) == [("1-0", "a"), ("2-0", "b"), ("3-0", "c")]
+        assert broadcaster.dropped == 1
+
+    def test_subscription_unsubscribes_on_exit(self):
+        """Test that the subscription context manager removes the queue"""
+        broadcaster = Broadcaster()
+
+        async def subscribe_and_leave():
+            async with broadcaster.subscription():
+                assert len(broadcaster.subscribers) == 1
+
+        asyncio.run(subscribe_and_leave())
+        assert broadcaster.subscribers == set()
+
+    def test_stream_id_key_orders_numerically(self):
+        """Test that stream ids compare by timestamp then sequence, not as strings"""
+        assert stream_id_key("999-5") < stream_id_key("1000-0")
+        assert stream_id_key("1000-2") < stream_id_key("1000-10")
+
+    def test_is_stream_id_rejects_invalid_ids(self):
+        """Test that only Redis Stream ids are accepted as Last-Event-ID"""
+        assert is_stream_id("1700000000000-1")
+        assert not is_stream_id(None)
+        assert not is_stream_id("abc")
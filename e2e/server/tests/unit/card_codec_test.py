@@ -0,0 +1,63 @@
+import json
+import pytest
+import sys
+from pathlib import Path
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+from src.utils.card_codec import CardCodec, UnknownDictionaryError  # type: ignore  # noqa: E402
+
+CARD = {
+    "filter_data": {"environment": "qa", "protocol": "api", "product": "loan", "day": "12-31-2025_08-30-00_AM"},
+    "json_report": {"stats": {"expected": 120, "unexpected": 2, "flaky": 1, "skipped": 0}},
+    "root_dir": "trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM",
+}
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestCardCodec:
+    """Test the versioned encoding of the cached card values"""
+
+    @pytest.mark.unit_smoke
+    def test_encode_round_trip_without_dictionary(self):
+        """Test that an encoded card decodes back to the same JSON"""
+        codec = CardCodec()
+        encoded = codec.encode(json.dumps(CARD))
+
+        assert codec.header(encoded) == (1, 0)
+        assert codec.loads(encoded) == CARD
+
+    @pytest.mark.unit_smoke
+    def test_legacy_json_is_returned_as_is(self):
+        """Test that values cached before the codec stay readable"""
+        codec = CardCodec()
+        legacy = json.dumps(CARD).encode("utf-8")
+
+        assert codec.header(legacy) is None
+        assert codec.decode(legacy) == legacy
+        assert codec.loads(json.dumps(CARD)) == CARD
+
+    def test_dictionary_round_trip_and_smaller_output(self):
+        """Test that a trained dictionary is used for encoding and makes the values smaller"""
+        samples = [json.dumps({**CARD, "root_dir": f"{CARD['root_dir']}-{i}"}).encode("utf-8") for i in range(20)]
+        codec = CardCodec()
+        plain = codec.encode(samples[0])
+        codec.load({b"1": CardCodec.train(samples)}, b"1")
+        encoded = codec.encode(samples[0])
+
+        assert codec.header(encoded) == (1, 1)
+        assert codec.decode(encoded) == samples[0]
+        assert len(encoded) < len(plain)
+
+    def test_unknown_dictionary_is_reported(self):
+        """Test that values encoded with a dictionary that is not loaded are detected before decoding"""
+        trained = CardCodec()
+        trained.load({b"3": CardCodec.train([json.dumps(CARD).encode("utf-8")] * 2)}, b"3")
+        encoded = trained.encode(json.dumps(CARD))
+        codec = CardCodec()
+
+        assert codec.unknown_dictionaries([encoded, None, b"{}"]) == {3}
+        with pytest.raises(UnknownDictionaryError):
+            codec.decode(encoded)
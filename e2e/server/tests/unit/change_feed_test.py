@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+# Mock problematic imports before they're loaded
+sys.modules["src.utils.logger"] = MagicMock()
+sys.modules["instances"] = MagicMock()
+
+import src.services.change_feed as change_feed  # type: ignore  # noqa: E402
+from src.services.change_feed import (  # type: ignore  # noqa: E402
+    EventChangeFeed,
+    LocalDropChangeFeed,
+    S3IndexChangeFeed,
+    root_dirs_from_s3_event,
+)
+
+ROOT_DIR = "trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00-123456_AM"
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestRootDirsFromS3Event:
+    """Test the S3 event notification parsing of the change feeds"""
+
+    @pytest.mark.unit_smoke
+    def test_s3_records_event(self):
+        """Test that every object key in the records maps to its report root dir"""
+        event = {
+            "Records": [
+                {"s3": {"object": {"key": f"{ROOT_DIR}/report.json"}}},
+                {"s3": {"object": {"key": f"{ROOT_DIR}/data/trace.zip"}}},
+            ]
+        }
+        assert root_dirs_from_s3_event(event) == {ROOT_DIR}
+
+    def test_url_encoded_key(self):
+        """Test that URL encoded object keys are decoded"""
+        event = {"Records": [{"s3": {"object": {"key": "trading-apps/test_reports/loan/qa/api/my+report/index.html"}}}]}
+        assert root_dirs_from_s3_event(event) == {"trading-apps/test_reports/loan/qa/api/my report"}
+
+    def test_sns_envelope(self):
+        """Test that the S3 event is unwrapped from an SNS notification"""
+        event = {"Message": json.dumps({"Records": [{"s3": {"object": {"key": f"{ROOT_DIR}/report.json"}}}]})}
+        assert root_dirs_from_s3_event(event) == {ROOT_DIR}
+
+    def test_eventbridge_event(self):
+        """Test the EventBridge S3 event format"""
+        event = {"detail": {"object": {"key": f"{ROOT_DIR}/index.html"}}}
+        assert root_dirs_from_s3_event(event) == {ROOT_DIR}
+
+    def test_ignores_keys_outside_report_folders(self):
+        """Test that test events and keys above the report folder level are ignored"""
+        assert root_dirs_from_s3_event({"Event": "s3:TestEvent"}) == set()
+        event = {"Records": [{"s3": {"object": {"key": "trading-apps/test_reports/loan/qa/api/report.json"}}}]}
+        assert root_dirs_from_s3_event(event) == set()
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestChangeFeedSources:
+    """Test the change feed source interface and the local drop directory source"""
+
+    def test_incomplete_feed_fails_on_instantiation(self):
+        """Test that a feed missing part of the interface cannot be created"""
+
+        class ReceiveOnlyFeed(EventChangeFeed):
+            async def receive(self):
+                return []
+
+        with pytest.raises(TypeError):
+            ReceiveOnlyFeed()
+
+    @pytest.mark.unit_smoke
+    def test_local_drop_receive_and_acknowledge(self, tmp_path):
+        """Test that dropped event files are read, malformed ones included, and removed once acknowledged"""
+        event = {"Records": [{"s3": {"object": {"key": f"{ROOT_DIR}/report.json"}}}]}
+        (tmp_path / "1.json").write_text(json.dumps(event))
+        (tmp_path / "2.json").write_text("not json")
+        os.utime(tmp_path / "1.json", (1, 1))  # oldest first
+        feed = LocalDropChangeFeed(str(tmp_path), poll_interval=0)
+
+        events = asyncio.run(feed.receive())
+        asyncio.run(feed.acknowledge([receipt for _, receipt in events]))
+
+        assert [received for received, _ in events] == [event, {}]
+        assert list(tmp_path.iterdir()) == []
+        assert asyncio.run(feed.receive()) == []
+
+    def test_s3_index_first_run_reports_nothing(self, monkeypatch):
+        """Test that the first poll only stores the watermark, and later polls report the changes logged after it"""
+        redis = MagicMock()
+        values = {}
+
+        async def get(key):
+            return values.get(key)
+
+        async def set(key, value):
+            values[key] = value
+
+        async def run(function, *args):
+            return function(*args)
+
+        redis.get, redis.set = get, set
+        s3_index = MagicMock()
+        s3_index.changed_since.return_value = [ROOT_DIR]
+        monkeypatch.setattr(change_feed, "S3Index", s3_index)
+        monkeypatch.setattr(change_feed.AioS3, "run", run)
+        feed = S3IndexChangeFeed(poll_interval=0)
+        feed.get_redis = lambda: redis
+
+        assert asyncio.run(feed.changes()) == []
+        s3_index.changed_since.assert_not_called()
+        watermark = values[change_feed.change_feed_watermark_key]
+
+        assert asyncio.run(feed.changes()) == [ROOT_DIR]
+        assert s3_index.changed_since.call_args.args[0] == watermark
+        assert s3_index.refresh.call_count == 2
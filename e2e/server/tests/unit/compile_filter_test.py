@@ -0,0 +1,55 @@
+import pytest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+# Mock problematic imports before they're loaded
+sys.modules["src.utils.logger"] = MagicMock()
+
+from config import test_reports_date_format  # type: ignore  # noqa: E402
+from src.services.validation import compile_filter, validate  # type: ignore  # noqa: E402
+
+
+def report_date(days_ago: float) -> str:
+    return (datetime.now() - timedelta(days=days_ago)).strftime(test_reports_date_format)
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestCompileFilter:
+    """Test the compile_filter predicate"""
+
+    @pytest.mark.unit_smoke
+    def test_predicate_matches_filter(self):
+        """Test that a card matching every field passes"""
+        is_invalid = compile_filter({"environment": "qa", "product": "all", "protocol": "ui", "day": 1, "mode": "s3"})
+        card = {"environment": "qa", "product": "loan", "protocol": "ui", "day": report_date(0.5)}
+        assert is_invalid(card) is None
+
+    def test_predicate_rejects_old_card(self):
+        """Test that a card older than the day range fails"""
+        is_invalid = compile_filter({"day": 1})
+        assert is_invalid({"day": report_date(2)}) is not None
+
+    def test_predicate_rejects_unparsable_date(self):
+        """Test that a card with an unknown date format fails"""
+        is_invalid = compile_filter({"day": 1})
+        assert is_invalid({"day": "not-a-date"}) is not None
+
+    def test_predicate_reports_first_mismatch(self):
+        """Test that the error message matches validate"""
+        expected = {"environment": "sit", "protocol": "ui"}
+        card = {"environment": "qa", "protocol": "api"}
+        assert compile_filter(expected)(card) == "Expected: sit, Received: qa"
+        assert validate(card, expected) == "Expected: sit, Received: qa"
+
+    @pytest.mark.parametrize("days_ago", [0, 2, 6.9, 8])
+    def test_predicate_agrees_with_validate(self, days_ago):
+        """Test that the compiled predicate and validate agree on the day range"""
+        expected = {"environment": "all", "day": 7}
+        card = {"environment": "qa", "day": report_date(days_ago)}
+        assert (compile_filter(expected)(card) is None) == (validate(card, expected) is None)
@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+# Mock problematic imports before they're loaded
+sys.modules["src.utils.logger"] = MagicMock()
+sys.modules["src.utils.env_loader"] = MagicMock()
+
+from config import execution_queue_ttl  # type: ignore  # noqa: E402
+from src.utils.execution_queue import ExecutionQueue  # type: ignore  # noqa: E402
+from src.utils.queue import get_operation_ttl  # type: ignore  # noqa: E402
+
+
+class FakePipeline:
+    def __init__(self, client: "FakeRedis") -> None:
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    def set(self, *args, **kwargs):
+        self.commands.append((self.client.set, args, kwargs))
+
+    def zadd(self, *args, **kwargs):
+        self.commands.append((self.client.zadd, args, kwargs))
+
+    async def execute(self):
+        return [await command(*args, **kwargs) for command, args, kwargs in self.commands]
+
+
+class FakeRedis:
+    """In-memory stand-in for instances.aioredis and its client, with the commands the execution queue uses"""
+
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+        self.sorted_sets: dict[str, dict[str, float]] = {}
+        self.operations: dict[tuple[str, str], int] = {}  # {(operation, identifier): ttl}
+
+    async def get_client(self):
+        return self
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key: str):
+        return self.values.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None, nx: bool = False):
+        self.values[key] = value
+        self.ttls[key] = ex
+        return True
+
+    async def zadd(self, key: str, mapping: dict):
+        self.sorted_sets.setdefault(key, {}).update(mapping)
+
+    async def zrange(self, key: str, start: int, end: int):
+        members = self.sorted_sets.get(key, {})
+        return [member.encode("utf-8") for member in sorted(members, key=members.get)]
+
+    async def zrank(self, key: str, member: str):
+        ranked = [ranked_member.decode("utf-8") for ranked_member in await self.zrange(key, 0, -1)]
+        return ranked.index(member) if member in ranked else None
+
+    async def zrem(self, key: str, member: str):
+        return self.sorted_sets.get(key, {}).pop(member, None) is not None
+
+    async def mark_operation(self, operation: str, identifier: str, metadata: dict | None = None, ttl=None):
+        if (operation, identifier) in self.operations:
+            return False
+        self.operations[(operation, identifier)] = get_operation_ttl(operation, ttl)
+        return True
+
+    async def unmark_operation(self, operation: str, identifier: str):
+        return self.operations.pop((operation, identifier), None) is not None
+
+
+def new_queue() -> tuple[ExecutionQueue, FakeRedis]:
+    redis = FakeRedis()
+    runner = MagicMock()
+    runner_job = runner.submit.return_value
+    runner_job.id, runner_job.status, runner_job.returncode = "runner-job", "cancelled", None
+    runner_job.wait = asyncio.Event().wait  # runs never finish during the test
+    queue = ExecutionQueue(runner)
+    queue.get_redis = lambda: redis
+    return queue, redis
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestExecutionQueue:
+    """Test the Redis-backed queue of the test suite runs"""
+
+    @pytest.mark.unit_smoke
+    def test_identical_options_are_queued_once(self):
+        """Test that a second request with the same options returns the queued job instead of queueing it again"""
+        queue, redis = new_queue()
+        options = {"environment": "qa", "app": "loan", "proto": "api", "suite": "smoke"}
+
+        async def enqueue_twice():
+            first = await queue.enqueue(options, "npm run test")
+            second = await queue.enqueue(dict(options), "npm run test")
+            return first, second
+
+        (job, queued), (existing, queued_again) = asyncio.run(enqueue_twice())
+
+        assert queued is True
+        assert queued_again is False
+        assert existing["id"] == job["id"]
+        assert len(redis.sorted_sets[queue.queue_key]) == 1
+
+    def test_dedupe_lock_lives_as_long_as_the_job(self):
+        """Test that the dedupe lock does not expire before the queued/running job record"""
+        queue, redis = new_queue()
+
+        job, _ = asyncio.run(queue.enqueue({"environment": "qa", "suite": "smoke"}, "npm run test"))
+
+        assert redis.operations[(queue.operation, job["id"])] == execution_queue_ttl
+        assert redis.ttls[queue.job_key(job["id"])] == execution_queue_ttl
+        assert get_operation_ttl(queue.slot_operation) == execution_queue_ttl
+
+    def test_higher_priority_runs_first_then_fifo(self):
+        """Test that jobs are ordered by priority, and by queue time within the same priority"""
+        queue, _ = new_queue()
+
+        async def enqueue_all():
+            low, _ = await queue.enqueue({"environment": "qa", "suite": "low"}, "npm run test")
+            await asyncio.sleep(0.002)
+            first, _ = await queue.enqueue({"environment": "qa", "suite": "first"}, "npm run test", priority=5)
+            await asyncio.sleep(0.002)
+            second, _ = await queue.enqueue({"environment": "qa", "suite": "second"}, "npm run test", priority=5)
+            return [await queue.position(job["id"]) for job in (low, first, second)]
+
+        assert asyncio.run(enqueue_all()) == [3, 1, 2]
+
+    def test_environment_slots_cap_concurrent_runs(self):
+        """Test that an environment at capacity keeps its jobs queued while other environments still start"""
+        queue, redis = new_queue()
+
+        async def enqueue_and_schedule():
+            uat_first, _ = await queue.enqueue({"environment": "uat", "suite": "a"}, "npm run test")
+            uat_second, _ = await queue.enqueue({"environment": "uat", "suite": "b"}, "npm run test")
+            qa, _ = await queue.enqueue({"environment": "qa", "suite": "a"}, "npm run test")
+            started = await queue.schedule()
+            return started, set(queue.running), uat_first, uat_second, qa
+
+        started, running, uat_first, uat_second, qa = asyncio.run(enqueue_and_schedule())
+
+        assert queue.concurrency("uat") == 1
+        assert started == 2
+        assert running == {uat_first["id"], qa["id"]}
+        assert list(redis.sorted_sets[queue.queue_key]) == [uat_second["id"]]
@@ -0,0 +1,61 @@
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+sys.modules["aiohttp"] = MagicMock()
+sys.modules["fastapi"] = MagicMock()
+sys.modules["instances"] = MagicMock()
+sys.modules["src.utils.logger"] = MagicMock()
+sys.modules["src.utils.http_client"] = MagicMock()
+
+from config import cards_response_cache_ttl  # type: ignore  # noqa: E402
+from src.utils.helper import build_etag, cards_time_bucket, is_not_modified  # type: ignore  # noqa: E402
+
+DAY = 86400
+
+
+def cards_etag(cache_version: int, now: float) -> str:
+    return build_etag(cache_version, "day-1-qa-api", cards_time_bucket(now))
+
+
+def request_with(if_none_match: str) -> MagicMock:
+    request = MagicMock()
+    request.headers = {"if-none-match": if_none_match}
+    return request
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestCardsETag:
+    """Test the validators of the /cards responses"""
+
+    @pytest.mark.unit_smoke
+    def test_etag_is_stable_within_a_window(self):
+        """Test that repeated requests in the same window revalidate with 304"""
+        window_start = 1_000 * cards_response_cache_ttl
+        etag = cards_etag(7, window_start)
+
+        assert cards_etag(7, window_start + cards_response_cache_ttl - 1) == etag
+        assert is_not_modified(request_with(etag), etag)
+
+    @pytest.mark.unit_smoke
+    def test_day_etag_changes_once_a_card_ages_out(self):
+        """Test that a day=1 ETag changes after a card leaves the window, without a new card or invalidation"""
+        card_run_time = 1_700_000_000
+        in_window = card_run_time + DAY - 1
+        aged_out = card_run_time + DAY + cards_response_cache_ttl
+
+        etag = cards_etag(7, in_window)
+
+        assert cards_etag(7, aged_out) != etag
+        assert not is_not_modified(request_with(etag), cards_etag(7, aged_out))
+
+    def test_etag_changes_with_cache_version(self):
+        """Test that a new card or a cache invalidation changes the ETag within the same window"""
+        now = 1_700_000_000
+
+        assert cards_etag(7, now) != cards_etag(8, now)
@@ -0,0 +1,57 @@
+import json
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+# Mock problematic imports before they're loaded
+sys.modules["src.utils.logger"] = MagicMock()
+sys.modules["instances"] = MagicMock()
+
+from src.utils.queue import get_operation_key, mark_downloads, mark_operations  # type: ignore  # noqa: E402
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestMarkOperations:
+    """Test the pipelined batch marking of in-progress operations"""
+
+    @pytest.mark.unit_smoke
+    def test_returns_one_flag_per_identifier(self):
+        """Test that each identifier reports whether its SET NX succeeded"""
+        redis = MagicMock()
+        redis.pipeline.return_value.execute.return_value = [True, None, True]
+
+        assert mark_operations(redis, "download", ["a", "b", "c"]) == [True, False, True]
+
+    def test_sets_every_key_in_one_pipeline(self):
+        """Test that all keys are set with NX and the operation TTL in a single round trip"""
+        redis = MagicMock()
+        pipeline = redis.pipeline.return_value
+        pipeline.execute.return_value = [True, True]
+
+        mark_downloads(redis, ["a", "b"], metadata={"started_at": "now"})
+
+        assert redis.pipeline.call_count == 1
+        assert pipeline.execute.call_count == 1
+        keys = [call.args[0] for call in pipeline.set.call_args_list]
+        assert keys == [get_operation_key("download", "a"), get_operation_key("download", "b")]
+        for call in pipeline.set.call_args_list:
+            assert call.kwargs["nx"] is True
+            assert json.loads(call.args[1])["started_at"] == "now"
+
+    def test_empty_batch_skips_redis(self):
+        """Test that an empty batch does not open a pipeline"""
+        redis = MagicMock()
+        assert mark_operations(redis, "download", []) == []
+        redis.pipeline.assert_not_called()
+
+    def test_error_marks_nothing_acquired(self):
+        """Test that a Redis error reports every identifier as not acquired"""
+        redis = MagicMock()
+        redis.pipeline.return_value.execute.side_effect = ConnectionError("down")
+
+        assert mark_operations(redis, "download", ["a", "b"]) == [False, False]
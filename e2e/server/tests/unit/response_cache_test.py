@@ -0,0 +1,54 @@
+import gzip
+import pytest
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+# Add server src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent.parent / "server"))
+
+sys.modules["src.utils.logger"] = MagicMock()
+
+from src.utils.response_cache import CompressedResponseCache  # type: ignore  # noqa: E402
+
+
+@pytest.mark.unit_regression
+@pytest.mark.unit_sanity
+class TestCompressedResponseCache:
+    """Test the content negotiation of the precompressed /cards responses"""
+
+    @pytest.mark.unit_smoke
+    def test_accepted_encodings_parses_q_values(self):
+        """Test that the Accept-Encoding header is parsed into encodings and their q-values"""
+        accepted = CompressedResponseCache.accepted_encodings("gzip, br;q=0.8, deflate;q=bad, *;q=0")
+
+        assert accepted == {"gzip": 1.0, "br": 0.8, "deflate": 0.0, "*": 0.0}
+
+    @pytest.mark.unit_smoke
+    def test_negotiate_gzip_and_identity(self):
+        """Test that gzip is chosen when accepted and the body is sent uncompressed otherwise"""
+        cache = CompressedResponseCache()
+        cache.encodings = ["gzip"]
+
+        assert cache.negotiate("gzip, deflate") == "gzip"
+        assert cache.negotiate("*") == "gzip"
+        assert cache.negotiate("") is None
+        assert cache.negotiate("identity") is None
+        assert cache.negotiate("gzip;q=0") is None
+
+    def test_negotiate_prefers_highest_q_value(self):
+        """Test that the encoding with the highest q-value wins, ties going to the preferred encoding"""
+        cache = CompressedResponseCache()
+        cache.encodings = ["br", "gzip"]
+
+        assert cache.negotiate("gzip, br") == "br"
+        assert cache.negotiate("gzip;q=1.0, br;q=0.5") == "gzip"
+
+    def test_gzip_body_is_deterministic(self):
+        """Test that every worker compresses the same body to the same bytes"""
+        body = b'{"cards":[' + b",".join([b'{"a":1}'] * 100) + b"]}"
+        compressed = CompressedResponseCache.compress(body, "gzip")
+
+        assert compressed == CompressedResponseCache.compress(body, "gzip")
+        assert gzip.decompress(compressed) == body
+        assert len(compressed) < len(body)
@@ -6,9 +6,25 @@ workers_limit: int = 1  # number of workers for the main server process
 
 the_lab_log_file_name: str = "lab.log"  # default log file name for the lab component
 the_doc_log_file_name: str = "doc.log"  # default log file name for the executor component
+executor_max_concurrency: int = 4  # max shell commands (test suites) run at once, the rest wait in the queue
+executor_output_tail_lines: int = 50  # last output lines kept in memory per command, the rest is only streamed to logs
+executor_jobs_history: int = 100  # max finished command jobs kept for the status endpoints
+log_stream_batch_max_lines: int = 200  # max log lines sent to The Lab socket clients in a single emit
+log_stream_batch_max_bytes: int = 32768  # max log bytes sent to The Lab socket clients in a single emit
+log_stream_batch_max_delay: float = 0.1  # max seconds a tailed log line waits to be batched before it is emitted
+log_stream_poll_min_interval: float = 0.05  # log tail polling interval after new data, when inotify is not available
+log_stream_poll_max_interval: float = 1  # log tail polling interval once the log file is idle
 
 __all__ = [
     "workers_limit",
     "the_lab_log_file_name",
     "the_doc_log_file_name",
+    "executor_jobs_history",
+    "executor_max_concurrency",
+    "executor_output_tail_lines",
+    "log_stream_batch_max_bytes",
+    "log_stream_batch_max_delay",
+    "log_stream_batch_max_lines",
+    "log_stream_poll_max_interval",
+    "log_stream_poll_min_interval",
 ]  # export the variables
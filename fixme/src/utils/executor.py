@@ -1,9 +1,19 @@
 import asyncio
+import os
 import platform
-import subprocess
+import signal
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Callable
 from src.utils.env_loader import local_dir
 from src.utils.logger import logger
-from config import the_doc_log_file_name
+from config import (
+    executor_jobs_history,
+    executor_max_concurrency,
+    executor_output_tail_lines,
+    the_doc_log_file_name,
+)
 
 
 async def open_port_on_local(port: int) -> None:
@@ -23,10 +33,10 @@ async def is_port_open(port: int):
 
         if os == "darwin" or os == "linux":
             command = f"lsof -ti :{port}"
-            result = await run_a_command_on_local(command)
+            result = await run_a_command_on_local(command, bounded=False)
         elif os == "windows":
             command = f"netstat -aon | findstr :{port} | findstr LISTENING"
-            result = await run_a_command_on_local(command)
+            result = await run_a_command_on_local(command, bounded=False)
         else:
             raise OSError("Unsupported OS to check port")
         pid = result.split()[-1] if result else result
@@ -46,36 +56,174 @@ async def kill_process_on_port(pid: str):
             command = f"taskkill /PID {pid} /F"
         else:
             raise OSError("Unsupported OS to kill process")
-        await run_a_command_on_local(command)
+        await run_a_command_on_local(command, bounded=False)
 
     except OSError as e:
         return e
 
 
-def run_sync_command(command: str) -> str:
-    """
-    Synchronous function that uses subprocess.run to execute a shell command.
-    """
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
-    return result.stdout if result.stdout else result.stderr
-
-
-async def run_command_async(command: str) -> str:
-    """
-    Asynchronous wrapper that calls the synchronous function in the default ThreadPoolExecutor.
-    """
-    # await asyncio.to_thread(run_sync_command, command, None) # alternative (TODO: test)
-    loop = asyncio.get_running_loop()
-    output = await loop.run_in_executor(None, run_sync_command, command)
-    return output
-
-
-async def run_a_command_on_local(command: str) -> str:
-    try:
-        logger.info(f"Executing [{command}] on local machine")
-        return await run_command_async(command)
-    except Exception as e:
-        raise e
+class Job:
+    """Handle of a shell command run by the CommandRunner"""
+
+    def __init__(self, job_id: str, command: str, tail_lines: int) -> None:
+        self.id = job_id
+        self.command = command
+        self.status = "queued"  # queued -> running -> succeeded/failed/cancelled
+        self.returncode: int | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.tail: deque[str] = deque(
+            maxlen=tail_lines
+        )  # last output lines, the rest is only streamed
+        self.process: asyncio.subprocess.Process | None = None
+        self.task: asyncio.Task | None = None
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.tail)
+
+    def is_done(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    async def wait(self) -> str:
+        """Wait for the command to finish and return the tail of its output"""
+        if self.task:
+            await asyncio.shield(self.task)
+        return self.output
+
+    def cancel(self) -> bool:
+        """Cancel a queued or running command. Kills the whole process group of the shell."""
+        if self.is_done() or not self.task:
+            return False
+        self.task.cancel()
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "command": self.command,
+            "status": self.status,
+            "returncode": self.returncode,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "output_tail": list(self.tail),
+        }
+
+
+class CommandRunner:
+    """Runs shell commands as asyncio subprocesses instead of holding a thread pool thread per command.
+    At most `max_concurrency` commands run at once (the rest wait in the queue). Output is streamed line by line
+    to the log (or the given callback) and only its last `tail_lines` lines are kept in memory."""
+
+    def __init__(
+        self,
+        max_concurrency: int = executor_max_concurrency,
+        tail_lines: int = executor_output_tail_lines,
+        history: int = executor_jobs_history,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.tail_lines = tail_lines
+        self.history = history
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.semaphore: asyncio.Semaphore | None = None
+
+    def submit(
+        self,
+        command: str,
+        on_line: Callable[[str], Any] | None = None,
+        bounded: bool = True,
+    ) -> Job:
+        """Start the command in the background and return its job handle.
+        Unbounded commands skip the concurrency limit, for short utility commands (lsof, kill...)."""
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        job = Job(uuid.uuid4().hex[:12], command, self.tail_lines)
+        job.task = asyncio.create_task(self.run_job(job, on_line, bounded))
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            oldest_id = next(iter(self.jobs))
+            if not self.jobs[oldest_id].is_done():
+                break
+            self.jobs.pop(oldest_id)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    async def run_job(
+        self, job: Job, on_line: Callable[[str], Any] | None, bounded: bool
+    ) -> None:
+        try:
+            if bounded and self.semaphore:
+                async with self.semaphore:
+                    await self.execute(job, on_line)
+            else:
+                await self.execute(job, on_line)
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            await self.kill(job)
+            logger.info(f"Command job [{job.id}] cancelled")
+        except Exception as e:
+            job.status = "failed"
+            job.tail.append(str(e))
+            logger.error(f"Command job [{job.id}] failed: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+
+    async def execute(self, job: Job, on_line: Callable[[str], Any] | None) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        job.process = await asyncio.create_subprocess_shell(
+            job.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            start_new_session=platform.system().lower() != "windows",
+        )
+        assert job.process.stdout is not None
+        async for raw_line in job.process.stdout:
+            line = raw_line.decode("utf-8", errors="replace").rstrip("\r\n")
+            job.tail.append(line)
+            if on_line:
+                result = on_line(line)
+                if asyncio.iscoroutine(result):
+                    await result
+            else:
+                logger.info(f"[{job.id}] {line}")
+        job.returncode = await job.process.wait()
+        job.status = "succeeded" if job.returncode == 0 else "failed"
+        logger.info(f"Command job [{job.id}] finished with exit code {job.returncode}")
+
+    @staticmethod
+    async def kill(job: Job, grace_period: float = 5) -> None:
+        process = job.process
+        if not process or process.returncode is not None:
+            return
+        try:
+            if platform.system().lower() == "windows":
+                process.terminate()
+            else:
+                os.killpg(process.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), grace_period)
+            except asyncio.TimeoutError:
+                process.kill()
+        except ProcessLookupError:
+            pass
+        job.returncode = process.returncode
+
+
+Runner = CommandRunner()
+
+
+async def run_a_command_on_local(
+    command: str, on_line: Callable[[str], Any] | None = None, bounded: bool = True
+) -> str:
+    """Run a shell command and return the tail of its output (stdout and stderr)"""
+    logger.info(f"Executing [{command}] on local machine")
+    job = Runner.submit(command, on_line=on_line, bounded=bounded)
+    return await job.wait()
 
 
 def create_command(options: dict) -> str:
@@ -0,0 +1,126 @@
+"""
+Maintenance commands of the cards cache encoding (src/utils/card_codec.py).
+
+    poetry run migrate-cards-cache [--retrain]   train the codec dictionary if needed, then re-encode the cached cards
+    poetry run benchmark-cards-cache [--samples N]   compare the memory and read latency of legacy JSON vs encoded cards
+"""
+
+import argparse
+import random
+import time
+from config import cards_codec_sample_size, root_redis_key, test_environments, test_protocols, test_reports_redis_key
+from src.utils.card_codec import CardCodec, CardsCodec
+from src.utils.env_loader import set_env_variable
+from src.utils.logger import logger
+from src.utils.redis_client import RedisClient
+
+benchmark_key_prefix = f"{root_redis_key}:cards:codec:benchmark"
+
+
+def cards_cache_keys() -> list[str]:
+    """Every cards cache hash, summaries and details, e.g. trading-apps-reports:qa:ui and trading-apps-reports:qa:ui:details"""
+    keys = [f"{test_reports_redis_key}:{env}:{proto}" for env in test_environments for proto in test_protocols]
+    return keys + [RedisClient.card_details_key(key) for key in keys]
+
+
+def sample_cards(redis: RedisClient, size: int) -> list[bytes]:
+    """JSON bytes of up to `size` cached cards, spread over the summary and detail hashes"""
+    samples: list[bytes] = []
+    for key in cards_cache_keys():
+        values = [value for _, value in redis.redis_client.hscan_iter(key, count=500)]
+        samples.extend(redis.decode_cards(values))
+    random.shuffle(samples)
+    return samples[:size]
+
+
+def train_dictionary(redis: RedisClient, size: int) -> int:
+    """Train a dictionary from the cached cards and make it the current one. Returns its id."""
+    samples = sample_cards(redis, size)
+    if not samples:
+        logger.info("No cached cards to train the card codec dictionary from")
+        return 0
+    dictionary = CardCodec.train(samples)
+    dictionary_id = redis.redis_client.hlen(CardsCodec.dictionaries_key) + 1
+    while not redis.redis_client.hsetnx(CardsCodec.dictionaries_key, dictionary_id, dictionary):
+        dictionary_id += 1  # trained concurrently by another migration
+    redis.redis_client.set(CardsCodec.current_key, dictionary_id)
+    redis.load_card_codec()
+    logger.info(f"Trained card codec dictionary #{dictionary_id} ({len(dictionary)} bytes) from {len(samples)} cards")
+    return dictionary_id
+
+
+def migrate() -> None:
+    parser = argparse.ArgumentParser(description="Re-encode the cached cards with the current card codec dictionary")
+    parser.add_argument("--retrain", action="store_true", help="train a new dictionary even if one exists")
+    parser.add_argument("--samples", type=int, default=cards_codec_sample_size, help="cards sampled for training")
+    args = parser.parse_args()
+    set_env_variable("SERVER_MODE", "setup")
+
+    redis = RedisClient()
+    codec = redis.card_codec()
+    if args.retrain or not codec.current:
+        train_dictionary(redis, args.samples)
+
+    migrated, bytes_before, bytes_after = 0, 0, 0
+    for key in cards_cache_keys():
+        pipeline = redis.redis_client.pipeline(transaction=False)
+        for field, value in redis.redis_client.hscan_iter(key, count=500):
+            header = codec.header(value)
+            if header and header[1] == codec.current:
+                continue  # already encoded with the current dictionary
+            encoded = codec.encode(redis.decode_cards([value])[0])
+            pipeline.hset(key, field, encoded)
+            migrated += 1
+            bytes_before += len(value)
+            bytes_after += len(encoded)
+            if len(pipeline) >= 500:
+                pipeline.execute()
+        pipeline.execute()
+    ratio = bytes_after / bytes_before if bytes_before else 1
+    logger.info(f"Migrated {migrated} cached cards: {bytes_before} -> {bytes_after} bytes ({ratio:.1%})")
+    redis.close()
+
+
+def benchmark() -> None:
+    parser = argparse.ArgumentParser(description="Compare legacy JSON and encoded cached cards")
+    parser.add_argument("--samples", type=int, default=cards_codec_sample_size, help="cards to benchmark with")
+    parser.add_argument("--rounds", type=int, default=20, help="HGETALL rounds timed per encoding")
+    args = parser.parse_args()
+    set_env_variable("SERVER_MODE", "setup")
+
+    redis = RedisClient()
+    codec = redis.card_codec()
+    samples = sample_cards(redis, args.samples)
+    if not samples:
+        logger.info("No cached cards to benchmark")
+        return
+
+    encodings = {"json": {}, "codec": {}}
+    started = time.perf_counter()
+    for index, sample in enumerate(samples):
+        encodings["json"][index] = sample
+        encodings["codec"][index] = codec.encode(sample)
+    encode_ms = (time.perf_counter() - started) * 1000
+
+    results = []
+    for name, values in encodings.items():
+        key = f"{benchmark_key_prefix}:{name}"
+        redis.redis_client.delete(key)
+        redis.redis_client.hset(key, mapping=values)
+        memory = redis.redis_client.memory_usage(key, samples=0) or 0
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            [codec.loads(value) for value in redis.redis_client.hgetall(key).values()]
+        read_ms = (time.perf_counter() - started) * 1000 / args.rounds
+        redis.redis_client.delete(key)
+        results.append((name, sum(len(value) for value in values.values()), memory, read_ms))
+
+    print(f"{len(samples)} cards | dictionary #{codec.current} | encoded in {encode_ms:.1f}ms")
+    print(f"{'encoding':<10}{'value bytes':>14}{'redis memory':>14}{'HGETALL+decode ms':>20}")
+    for name, value_bytes, memory, read_ms in results:
+        print(f"{name:<10}{value_bytes:>14}{memory:>14}{read_ms:>20.2f}")
+    redis.close()
+
+
+if __name__ == "__main__":
+    migrate()
@@ -9,23 +9,68 @@ test_reports_date_format = (
 root_redis_key: str = "doctor-octopus"
 test_reports_redis_key = f"{root_redis_key}:trading-apps-reports"
 test_reports_cached_redis_key = f"{test_reports_redis_key}:cached"
+test_reports_products_redis_key = f"{test_reports_redis_key}:products"  # set of products seen in the cards cache
+cards_cache_version_key = f"{root_redis_key}:cards:version"  # bumped on every new card or cache invalidation (ETag)
+cards_cache_schema_version_key = f"{root_redis_key}:cards:schema-version"  # last cards cache layout migrated to
+cards_cache_schema_version: int = 1  # bump when a new cards cache backfill must run once on the next initialization
+cards_codec_dictionaries_key = f"{root_redis_key}:cards:codec:dictionaries"  # trained card codec dictionaries by id
+cards_codec_current_key = (
+    f"{root_redis_key}:cards:codec:current"  # id of the dictionary new card values are encoded with
+)
 do_current_clients_count_key = f"{root_redis_key}:stats:current_clients_count"
 do_lifetime_clients_count_key = f"{root_redis_key}:stats:lifetime_clients_count"
 do_max_concurrent_clients_key = f"{root_redis_key}:stats:max_concurrent_clients_count"
-redis_instance_key: str = f"{root_redis_key}:stats:redis_instance_count"
-aioredis_instance_key: str = f"{root_redis_key}:stats:aioredis_instance_count"
 redis_cache_ttl: int = 60  # Redis cache Time To Live (TTL) in days
 download_queue_in_progress_key_prefix: str = (
     f"{root_redis_key}:downloads:in-progress"  # Redis key prefix for tracking in-progress downloads
 )
 download_queue_ttl: int = 600  # Time to live for download queue entries in seconds (10 minutes)
 cache_reload_queue_ttl: int = 300  # Time to live for cache-reload queue entries in seconds (5 minutes)
+s3_index_queue_ttl: int = 600  # Time to live for the S3 listing index refresh lock in seconds (10 minutes)
+
+s3_index_redis_key: str = f"{root_redis_key}:s3-index"  # Redis key prefix for the persistent S3 listing index
+s3_index_full_refresh_time: int = 21600  # seconds between full S3 bucket listings to rebuild the index (6 hours)
+s3_index_settle_time: int = 300  # seconds after its last upload a report folder is re-listed on incremental refresh
+s3_folder_manifest_ttl: int = 60  # seconds an S3 report folder's object listing is reused for downloads in a worker
+s3_folder_manifest_cache_size: int = 256  # max number of S3 report folder listings kept in memory per worker
+
+cards_response_cache_size: int = 128  # max number of /cards filter responses kept in memory per worker
+cards_response_cache_ttl: int = 300  # seconds a cached /cards response is served before it is recomputed
+cards_cache_version_poll_interval: int = 5  # seconds between checks of the cards cache version by each worker
+cards_compressed_responses_key = f"{root_redis_key}:cards:responses"  # brotli/gzip /cards bodies shared by workers
+cards_compressed_response_ttl: int = (
+    cards_response_cache_ttl  # seconds a compressed /cards body is kept, one time window
+)
+cards_compressed_response_min_size: int = 1000  # bytes below which /cards bodies are sent uncompressed
+cards_response_gzip_level: int = 9  # gzip level of the stored /cards bodies, compressed once per version and window
+cards_response_brotli_quality: int = 9  # brotli quality (0-11) of the stored /cards bodies, when brotli is installed
+notifications_stream_key: str = f"{root_redis_key}:notifications:stream"  # capped Redis Stream replaying notifications
+notifications_stream_maxlen: int = (
+    1000  # approx. max notifications kept in the stream for SSE reconnects to resume from
+)
+notifications_client_queue_size: int = 100  # max notifications buffered per SSE client before the oldest is dropped
+sse_keepalive_time: int = 15  # seconds of SSE stream inactivity before a keep-alive comment is sent
+change_feed_watermark_key: str = f"{root_redis_key}:change-feed:watermark"  # last S3 index change seen by notifications
+change_feed_wait_time: int = 20  # max seconds a change feed waits for new report events in one poll (SQS long polling)
 
 test_environments: list = ["qa", "dev", "uat", "sit"]  # list of test environments.
 test_protocols: list = ["api", "ui", "unit", "perf", "s3", "db", "fix"]  # list of test protocols.
 
 the_lab_log_file_name: str = "lab.log"  # default log file name for the lab component
 the_doc_log_file_name: str = "doc.log"  # default log file name for the executor component
+executor_max_concurrency: int = 4  # max shell commands (test suites) run at once, the rest wait in the queue
+executor_output_tail_lines: int = 50  # last output lines kept in memory per command, the rest is only streamed to logs
+executor_jobs_history: int = 100  # max finished command jobs kept for the status endpoints
+execution_env_concurrency: dict = {"qa": 2, "dev": 2, "uat": 1, "sit": 1}  # max test suite runs at once per environment
+execution_default_concurrency: int = 1  # max test suite runs at once for environments not listed above
+execution_queue_ttl: int = 7200  # seconds a queued/running execution (and its environment slot) is held at most
+execution_history_ttl: int = 86400  # seconds a finished execution is kept for the status endpoints
+execution_scheduler_interval: float = 2  # seconds between each worker's checks of the execution queue
+log_stream_batch_max_lines: int = 200  # max log lines sent to The Lab socket clients in a single emit
+log_stream_batch_max_bytes: int = 32768  # max log bytes sent to The Lab socket clients in a single emit
+log_stream_batch_max_delay: float = 0.1  # max seconds a tailed log line waits to be batched before it is emitted
+log_stream_poll_min_interval: float = 0.05  # log tail polling interval after new data, when inotify is not available
+log_stream_poll_max_interval: float = 1  # log tail polling interval once the log file is idle
 
 max_local_dirs: int = 1000  # max number of downloaded test report directories to keep
 notification_frequency_time: int = 10  # frequency of S3 notifications update in seconds
@@ -33,9 +78,50 @@ pubsub_frequency_time: int = 1  # frequency of redis pubsub update in seconds
 
 workers_limit: int = 20 if node_env == "production" else 1  # number of workers for the main server process
 
-rate_limit_wait_time: float = 0.25  # seconds to wait between S3 downloads to avoid rate limiting
-rate_limit_folder_batch_size: int = 5  # number of S3 folders to download in a batch before waiting
-rate_limit_file_batch_size: int = 20  # number of S3 objects to download in a batch before waiting
+cards_codec_level: int = 6  # zlib level of the cached card values, 1 (fastest) to 9 (smallest)
+cards_codec_dictionary_size: int = 32768  # bytes of the trained card codec dictionary (DEFLATE looks back 32KB at most)
+cards_codec_sample_size: int = 500  # cached cards sampled to train the card codec dictionary
+cards_codec_refresh_interval: int = 60  # seconds between the reloads of the card codec dictionaries from Redis
+
+redis_max_connections: int = 20  # max connections of each process' sync Redis pool (setup and worker threads)
+aioredis_max_connections: int = 50  # max connections of each process' async Redis pool
+redis_blocking_max_connections: int = 10  # max connections of each process' pool for blocking XREAD/BLMOVE reads
+redis_pool_timeout: float = 5  # seconds a Redis command waits for a free pooled connection before failing
+redis_health_check_interval: int = 30  # seconds a pooled Redis connection may stay idle before it is PINGed on reuse
+redis_socket_keepalive: bool = True  # TCP keepalive on the Redis connections, so dead peers are detected
+redis_socket_timeout: float = 15  # seconds a Redis command may wait for its reply, above the 5s XREAD/BLMOVE waits
+redis_socket_connect_timeout: float = 5  # seconds to open a new Redis connection
+
+s3_max_pool_connections: int = 50  # max HTTP connections kept in the boto3 S3 client pool (and S3 executor threads)
+s3_max_concurrency: int = 50  # max in-flight async S3 requests per process
+
+s3_rate_limit_per_second: float = 100  # max S3 requests per second per process (token bucket refill rate)
+s3_rate_limit_burst: int = 50  # max S3 requests sent back to back before the rate limit kicks in
+s3_rate_limit_min_per_second: float = 5  # lowest S3 request rate the limiter backs off to when S3 throttles
+s3_throttle_max_retries: int = 5  # max retries of an S3 request throttled with SlowDown/503
+rate_limit_folder_batch_size: int = 5  # number of S3 folders to download concurrently in a batch
+download_worker_concurrency: int = 5  # card download consumers run by each download worker process
+download_global_concurrency: int = 10  # max card folders downloaded at once across all download worker processes
+download_visibility_timeout: int = (
+    120  # seconds a claimed download job may go without a heartbeat before it is requeued
+)
+download_jobs_max_attempts: int = 3  # max times a download job is claimed before it is given up as failed
+download_progress_interval: float = 1  # seconds between the progress updates of a running download job
+download_progress_ttl: int = 86400  # seconds the progress of a card download is kept for the status endpoints
+download_pending_ttl: int = 21600  # seconds a queued card keeps its download lock while it waits for a download slot
+
+doctor_http_pool_size: int = 20  # max keep-alive connections of the shared session calling the main server's API
+doctor_http_keepalive_timeout: int = 30  # seconds an idle connection of the shared API session is kept open
+doctor_http_max_retries: int = 3  # max retries of a main server API call failing to connect or with a 502/503/504
+doctor_http_default_timeout: int = 60  # seconds a main server API call may take when its endpoint has no timeout below
+doctor_http_endpoint_timeouts: dict = {
+    "/": 5,
+    "/download-a-card": 30,
+    "/download-cards": 30,
+    "/cache-and-download": 120,
+    "/cache-reload": 300,
+    "/cache-reload-and-download": 600,
+}  # seconds each main server API endpoint may take
 
 server_url: str = (
     os.environ.get("VITE_MAIN_SERVER_URL_PROD", "")
@@ -45,25 +131,92 @@ server_url: str = (
 
 __all__ = [
     "cache_reload_queue_ttl",
+    "change_feed_wait_time",
+    "change_feed_watermark_key",
+    "cards_cache_version_key",
+    "cards_cache_schema_version_key",
+    "cards_cache_schema_version",
+    "cards_codec_current_key",
+    "cards_codec_dictionaries_key",
+    "cards_codec_dictionary_size",
+    "cards_codec_level",
+    "cards_codec_refresh_interval",
+    "cards_codec_sample_size",
+    "cards_compressed_response_min_size",
+    "cards_compressed_response_ttl",
+    "cards_compressed_responses_key",
+    "cards_response_brotli_quality",
+    "cards_response_cache_size",
+    "cards_response_cache_ttl",
+    "cards_cache_version_poll_interval",
+    "cards_response_gzip_level",
     "do_lifetime_clients_count_key",
     "do_current_clients_count_key",
     "do_max_concurrent_clients_key",
+    "doctor_http_default_timeout",
+    "doctor_http_endpoint_timeouts",
+    "doctor_http_keepalive_timeout",
+    "doctor_http_max_retries",
+    "doctor_http_pool_size",
     "download_queue_ttl",
+    "download_global_concurrency",
+    "download_jobs_max_attempts",
+    "download_progress_interval",
+    "download_pending_ttl",
+    "download_progress_ttl",
+    "download_visibility_timeout",
+    "download_worker_concurrency",
+    "execution_default_concurrency",
+    "execution_env_concurrency",
+    "execution_history_ttl",
+    "execution_queue_ttl",
+    "execution_scheduler_interval",
+    "executor_jobs_history",
+    "executor_max_concurrency",
+    "executor_output_tail_lines",
+    "log_stream_batch_max_bytes",
+    "log_stream_batch_max_delay",
+    "log_stream_batch_max_lines",
+    "log_stream_poll_max_interval",
+    "log_stream_poll_min_interval",
     "max_local_dirs",
     "test_environments",
     "test_reports_dir",
     "test_reports_redis_key",
     "test_reports_cached_redis_key",
+    "test_reports_products_redis_key",
     "the_lab_log_file_name",
     "the_doc_log_file_name",
     "pubsub_frequency_time",
     "redis_cache_ttl",
+    "redis_health_check_interval",
+    "redis_max_connections",
+    "aioredis_max_connections",
+    "redis_pool_timeout",
+    "redis_blocking_max_connections",
+    "redis_socket_connect_timeout",
+    "redis_socket_keepalive",
+    "redis_socket_timeout",
     "test_protocols",
     "workers_limit",
     "server_url",
-    "rate_limit_file_batch_size",
+    "sse_keepalive_time",
     "rate_limit_folder_batch_size",
-    "rate_limit_wait_time",
     "root_redis_key",
     "notification_frequency_time",
+    "notifications_client_queue_size",
+    "notifications_stream_key",
+    "notifications_stream_maxlen",
+    "s3_folder_manifest_cache_size",
+    "s3_folder_manifest_ttl",
+    "s3_index_full_refresh_time",
+    "s3_max_concurrency",
+    "s3_max_pool_connections",
+    "s3_rate_limit_burst",
+    "s3_rate_limit_min_per_second",
+    "s3_rate_limit_per_second",
+    "s3_throttle_max_retries",
+    "s3_index_queue_ttl",
+    "s3_index_redis_key",
+    "s3_index_settle_time",
 ]  # export the variables
@@ -1,4 +1,11 @@
 import asyncio
+from config import (
+    cards_cache_schema_version,
+    cards_cache_schema_version_key,
+    test_environments,
+    test_protocols,
+    test_reports_redis_key,
+)
 from src.utils.env_loader import get_os_name, set_env_variable
 from src.utils.helper import performance_log
 from src.utils.logger import logger
@@ -11,6 +18,7 @@ async def server_initialization():
 
     try:
         import instances
+        from src.services.remote import split_cached_card_details
 
         os_name = get_os_name()
         set_env_variable("OS_NAME", os_name)
@@ -22,6 +30,16 @@ async def server_initialization():
 
         redis = instances.redis
         redis.reset_redis_client_metrics()
+        # One-off backfills of the cards cache layout. They scan every cached card, so they run once per schema version.
+        schema_version = int(redis.get(cards_cache_schema_version_key) or 0)
+        if schema_version < cards_cache_schema_version:
+            cards_cache_keys = [
+                f"{test_reports_redis_key}:{env}:{proto}" for env in test_environments for proto in test_protocols
+            ]
+            redis.rebuild_card_time_index(cards_cache_keys)
+            split_cached_card_details(cards_cache_keys)
+            redis.set(cards_cache_schema_version_key, cards_cache_schema_version)
+            logger.info(f"Cards cache migrated from schema version {schema_version} to {cards_cache_schema_version}")
         redis.close()
     except Exception as e:
         logger.warning(f"Initialization warning (non-fatal): {type(e).__name__}: {str(e)}")
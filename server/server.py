@@ -11,11 +11,14 @@ os.environ["SERVER_MODE"] = "main"
 from config import workers_limit
 from src.utils.env_loader import get_debug_mode, get_main_server_port, get_node_env
 from src.fast_router import router
+from src.utils.responses import ORJSONResponse
 
 debug = get_debug_mode()
 node_env = get_node_env()
 
-fastapi_app: FastAPI = FastAPI(lifespan=lifespan_main, debug=True if node_env == "development" else False)
+fastapi_app: FastAPI = FastAPI(
+    lifespan=lifespan_main, debug=True if node_env == "development" else False, default_response_class=ORJSONResponse
+)
 
 fastapi_app.add_middleware(
     CORSMiddleware,
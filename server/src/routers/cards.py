@@ -1,23 +1,24 @@
+import asyncio
 import os
 from datetime import datetime as dt
-from fastapi import APIRouter, BackgroundTasks, Query
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import APIRouter, Body, Query, Request
+from fastapi.responses import PlainTextResponse, Response
 
 import instances
 import src.services.remote as remote
+from config import cards_cache_version_key, cards_compressed_response_min_size, test_reports_redis_key
 from src.services.cards import Cards
+from src.services.downloader import Downloads
 from src.services.system import local_report_directories
-from src.utils.helper import call_doctor_endpoint, queue_cache_reload_and_download
+from src.utils.helper import build_etag, cards_time_bucket, is_not_modified, queue_cache_reload_and_download
 from src.utils.logger import logger
+from src.utils.response_cache import CardsResponses
+from src.utils.responses import ORJSONResponse, RawJSONResponse, json_array
+from src.utils.redis_client import RedisClient
 from src.utils.queue import (
     cards_download_queue,
     get_download_status,
-    is_cache_reloading,
-    is_downloading,
-    mark_downloading,
-    mark_operation,
-    unmark_downloading,
-    unmark_operation,
+    params_to_identifier,
     wait_till_operation_complete,
 )
 
@@ -42,16 +43,15 @@ async def get_a_card(
 ) -> PlainTextResponse:
     test_report_dir = os.path.basename(root_dir)
     local_r_directories = local_report_directories()
-    redis = instances.redis
 
     if mode == "cache" and test_report_dir not in local_r_directories:
-        if is_downloading(redis.redis_client, test_report_dir):
-            download_status = await get_download_status(redis.redis_client, test_report_dir)
+        if await instances.aioredis.is_downloading(test_report_dir):
+            download_status = await get_download_status(test_report_dir)
             logger.info(f"Card {test_report_dir} is already queued for download. Status: {download_status}")
             await wait_till_operation_complete("download", test_report_dir, max_wait=300)
         else:
             logger.info(f"Card not in local. Downloading from S3: {test_report_dir}...")
-            test_report_dir = await call_doctor_endpoint("/download-a-card", {"card_date": root_dir}, method="post")
+            await Downloads.enqueue([root_dir])
     elif mode == "cache" and test_report_dir in local_r_directories:
         logger.info(f"Card available in local cache: {test_report_dir}")
     else:
@@ -60,8 +60,9 @@ async def get_a_card(
     return PlainTextResponse(content=f"{mount_path}/index.html")
 
 
-@router.get("/cards", response_class=JSONResponse, status_code=200)
+@router.get("/cards", response_class=ORJSONResponse, status_code=200)
 async def get_all_cards(
+    request: Request,
     mode: str = Query(
         ...,
         title="Mode",
@@ -92,7 +93,7 @@ async def get_all_cards(
         description="Protocol to filter the reports by: ui/api/perf/all",
         examples=["ui", "api", "perf", "all"],
     ),
-) -> JSONResponse:
+) -> ORJSONResponse:
     from server import fastapi_app
 
     expected_filter_dict = {
@@ -104,8 +105,34 @@ async def get_all_cards(
     }
     logger.info(f"Getting all cards with filter data: {expected_filter_dict}")
 
+    # Only the cache mode reads data. The other modes are actions and are never conditional.
+    headers = {}
+    encoding = None
+    if mode == "cache":
+        cache_version = await instances.aioredis.get(cards_cache_version_key) or 0
+        time_bucket = cards_time_bucket()
+        filter_identifier = params_to_identifier(expected_filter_dict)
+        response_identifier = f"{cache_version}:{time_bucket}:{filter_identifier}"
+        etag = build_etag(cache_version, filter_identifier, time_bucket)
+        headers["ETag"] = etag
+        if is_not_modified(request, etag):
+            logger.info(f"Cards not modified since version {cache_version}")
+            return Response(status_code=304, headers=headers)
+
+        # Serve the body compressed by any worker for this cache version and window, instead of compressing it per request
+        encoding = CardsResponses.negotiate(request.headers.get("accept-encoding", ""))
+        if encoding and (body := await CardsResponses.get(response_identifier, encoding)):
+            return Response(
+                body, media_type="application/json", headers={**headers, **CardsResponses.headers(encoding)}
+            )
+
     cards: Cards = fastapi_app.state.cards
-    all_cards = await cards.actions(expected_filter_dict)
+    if mode == "cache":
+        # JSON bytes of the cached cards. Versioned, so a worker that has not processed the cache invalidation yet
+        # never serves, or stores under response_identifier, a body computed before the new card was cached.
+        all_cards = await cards.get_cached_cards_response(expected_filter_dict, version=(cache_version, time_bucket))
+    else:
+        all_cards = await cards.actions(expected_filter_dict)
     length = len(all_cards) if all_cards else 0
 
     message = (
@@ -117,12 +144,55 @@ async def get_all_cards(
 
     if length == 0:
         logger.warning(message)
-        return JSONResponse(content={"error": message, "cards": []}, status_code=200)
+        return ORJSONResponse(content={"error": message, "cards": []}, status_code=200, headers=headers)
 
-    return JSONResponse(content={"message": "Cards retrieved successfully", "cards": all_cards}, status_code=200)
+    if mode == "cache":
+        response = RawJSONResponse(
+            content={"message": "Cards retrieved successfully"},
+            raw_content={"cards": json_array(all_cards)},
+            status_code=200,
+            headers=headers,
+        )
+        if encoding and len(response.body) >= cards_compressed_response_min_size:
+            body = (await CardsResponses.store(response_identifier, response.body))[encoding]
+            return Response(
+                body, media_type="application/json", headers={**headers, **CardsResponses.headers(encoding)}
+            )
+        return response
+    return ORJSONResponse(
+        content={"message": "Cards retrieved successfully", "cards": all_cards}, status_code=200, headers=headers
+    )
 
 
-@router.get("/cards-not-downloaded", response_class=JSONResponse, status_code=200)
+@router.get("/card-details", response_class=ORJSONResponse, status_code=200)
+async def get_card_details(
+    root_dir: str = Query(
+        ...,
+        title="S3 Root Directory",
+        description="S3 root directory of the card to get the full cached report for",
+        examples=["trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM"],
+    ),
+) -> ORJSONResponse:
+    """Get the full processed report of a card. /cards only returns the card summaries."""
+    card_filter_data = remote.transform_s3_object_to_filter_dict({"Key": f"{root_dir.rstrip('/')}/report.json"})
+    if not card_filter_data:
+        return ORJSONResponse(content={"error": f"Invalid card root directory: {root_dir}"}, status_code=400)
+
+    card_date = card_filter_data["day"]
+    reports_cache_key = f"{test_reports_redis_key}:{card_filter_data['environment']}:{card_filter_data['protocol']}"
+    aioredis = instances.aioredis
+    card_value = await aioredis.get_card_value(RedisClient.card_details_key(reports_cache_key), card_date)
+    if card_value is None:
+        card_value = await aioredis.get_card_value(
+            reports_cache_key, card_date
+        )  # cached before the summary/detail split
+    if card_value is None:
+        return ORJSONResponse(content={"error": f"Card {card_date} not found in cache"}, status_code=404)
+
+    return RawJSONResponse(content={"message": "Card details retrieved successfully"}, raw_content={"card": card_value})
+
+
+@router.get("/cards-not-downloaded", response_class=ORJSONResponse, status_code=200)
 async def cards_not_downloaded(
     day: int = Query(
         ..., title="Filter", description="Filter the reports age based on the given string", examples=[1, 7]
@@ -145,27 +215,34 @@ async def cards_not_downloaded(
         description="Protocol to filter the reports: ui/api/perf/all",
         examples=["ui", "api", "perf", "all"],
     ),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Get the list of cards not downloaded to the server by comparing the data with Redis' cards cache based on the filters."""
     from server import fastapi_app
 
     cards: Cards = fastapi_app.state.cards
-    missing_cards = cards.all_missing_cards(
-        {"day": day, "product": product, "environment": environment, "protocol": protocol}
+    missing_cards = await asyncio.to_thread(
+        cards.all_missing_cards, {"day": day, "product": product, "environment": environment, "protocol": protocol}
     )
-    return JSONResponse(
+    return ORJSONResponse(
         content={"message": "missing cards that needs to be downloaded", "cards": missing_cards}, status_code=200
     )
 
 
-@router.get("/cards-download-queue", response_class=JSONResponse, status_code=200)
-async def cards_being_downloaded() -> JSONResponse:
+@router.get("/cards-download-queue", response_class=ORJSONResponse, status_code=200)
+async def cards_being_downloaded() -> ORJSONResponse:
     """Get the list of cards that are in the download queue. Results are pulled from Redis download operation queue cache"""
     downloading_cards = await cards_download_queue()
-    return JSONResponse(content={"message": "cards download queue...", "queued": downloading_cards}, status_code=200)
+    return ORJSONResponse(
+        content={
+            "message": "cards download queue...",
+            "queued": downloading_cards,
+            "progress": await Downloads.progress(downloading_cards),
+        },
+        status_code=200,
+    )
 
 
-@router.post("/download-a-card", response_class=JSONResponse, status_code=202)
+@router.post("/download-a-card", response_class=ORJSONResponse, status_code=202)
 async def download_a_card(
     card_date: str = Query(
         ...,
@@ -173,20 +250,15 @@ async def download_a_card(
         description="S3 card directory path to download (e.g., 'trading-apps/test_reports/api/qa/12-31-2025_08-30-00_AM')",
         examples=["12-31-2025_08-31-00_AM", "trading-apps/test_reports/api/qa/12-31-2025_08-30-00_AM"],
     ),
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Download a specific card directory from the S3 bucket."""
-    from server import fastapi_app
-
-    redis = instances.redis
-    cards: Cards = fastapi_app.state.cards
     card_dir = os.path.basename(card_date)
-    cards_dirs = local_report_directories()
 
     try:
-        if card_dir in cards_dirs:
+        scheduled = await Downloads.enqueue([card_date])
+        if scheduled["cached"]:
             logger.info(f"Download request for {card_dir}: already cached locally, skipping")
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "status": "success",
                     "message": f"Folder {card_dir} is already cached locally",
@@ -195,10 +267,10 @@ async def download_a_card(
                 status_code=200,
             )
 
-        if is_downloading(redis.redis_client, card_dir):
-            download_status = await get_download_status(redis.redis_client, card_dir)
+        if scheduled["downloading"]:
+            download_status = await get_download_status(card_dir)
             logger.info(f"Download request for {card_dir}: already in progress")
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "status": "downloading",
                     "message": f"Folder {card_dir} is already being downloaded",
@@ -207,38 +279,7 @@ async def download_a_card(
                 status_code=200,
             )
 
-        acquired = mark_downloading(redis.redis_client, card_dir, metadata={"started_at": dt.now().isoformat()})
-        if not acquired:
-            logger.info(f"Download request for {card_dir}: lost race, already in progress")
-            return JSONResponse(
-                content={"status": "downloading", "message": f"Folder {card_dir} is already being downloaded"},
-                status_code=200,
-            )
-
-        async def _download_task():
-            try:
-                logger.info(f"Starting background download for {card_dir}")
-                remote.download_s3_folder(card_date)
-
-                try:
-                    download_notification = {
-                        "type": "download",
-                        "card_date": card_dir,
-                        "timestamp": dt.now().timestamp(),
-                    }
-                    await instances.aioredis.publish("notifications", download_notification)
-                    logger.info(f"Published download completion notification for {card_dir}")
-                except Exception as err:
-                    logger.error(f"Failed to publish download completion notification: {str(err)}")
-            except Exception as error:
-                logger.error(f"Download failed for {card_dir}: {str(error)}")
-            finally:
-                unmark_downloading(redis.redis_client, card_dir)
-                await cards.actions({"mode": "cleanup"})
-
-        background_tasks.add_task(_download_task)
-
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "queued",
                 "message": f"Download for folder {card_dir} has been queued",
@@ -249,10 +290,64 @@ async def download_a_card(
 
     except Exception as e:
         logger.error(f"Error starting download for {card_dir}: {str(e)}")
-        return JSONResponse(content={"error": str(e)}, status_code=400)
+        return ORJSONResponse(content={"error": str(e)}, status_code=400)
+
+
+@router.post("/download-cards", response_class=ORJSONResponse, status_code=202)
+async def download_cards(
+    card_dates: list[str] = Body(
+        ...,
+        embed=True,
+        title="S3 Card Directories",
+        description="S3 card directory paths to download in one batch",
+        examples=[["trading-apps/test_reports/api/qa/12-31-2025_08-30-00_AM"]],
+    ),
+) -> ORJSONResponse:
+    """Download a batch of card directories from the S3 bucket. The download locks of the batch are taken at once
+    and the folders not cached locally nor already downloading are queued on the worker's bounded download worker."""
+    try:
+        scheduled = await Downloads.enqueue(card_dates)
+        return ORJSONResponse(
+            content={
+                "status": "queued",
+                "message": f"Queued {len(scheduled['queued'])} of {len(card_dates)} card downloads",
+                **scheduled,
+            },
+            status_code=202,
+        )
+    except Exception as e:
+        logger.error(f"Error starting downloads for {len(card_dates)} cards: {str(e)}")
+        return ORJSONResponse(content={"error": str(e)}, status_code=400)
 
 
-@router.get("/cache-reload-and-download", response_class=JSONResponse, status_code=200)
+@router.post("/cache-and-download", response_class=ORJSONResponse, status_code=202)
+async def cache_and_download_cards(
+    s3_root_dirs: list[str] = Body(
+        ...,
+        embed=True,
+        title="S3 Root Directories",
+        description="Exact S3 report folders to cache and download, e.g. the reports that just arrived",
+        examples=[["trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM"]],
+    ),
+) -> ORJSONResponse:
+    """Cache the given S3 report folders and queue the downloads of the ones not available locally.
+    Unlike /cache-reload-and-download, the work is bounded by the given folders instead of a filter's day range."""
+    cached_cards = await remote.cache_s3_root_dirs(s3_root_dirs)
+    queued = (await Downloads.enqueue(list(cached_cards.values())))["queued"]
+
+    logger.info(f"Cached {len(cached_cards)} cards and queued {len(queued)} downloads from {len(s3_root_dirs)} folders")
+    return ORJSONResponse(
+        content={
+            "status": "queued",
+            "message": f"Cached {len(cached_cards)} cards and queued {len(queued)} downloads",
+            "cards": list(cached_cards.keys()),
+            "queued": queued,
+        },
+        status_code=202,
+    )
+
+
+@router.get("/cache-reload-and-download", response_class=ORJSONResponse, status_code=200)
 async def download_all_missing_cards(
     day: int = Query(
         ..., title="Filter", description="Filter the reports age based on the given string", examples=[1, 7]
@@ -275,15 +370,15 @@ async def download_all_missing_cards(
         description="Protocol to filter the reports: ui/api/perf/all",
         examples=["ui", "api", "perf", "all"],
     ),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Reload Redis cache and download all missing cached cards to the server based on the filters."""
     await queue_cache_reload_and_download(
         {"day": day, "product": product, "environment": environment, "protocol": protocol}
     )
-    return JSONResponse(content={"message": "Triggered download for missing cards"}, status_code=200)
+    return ORJSONResponse(content={"message": "Triggered download for missing cards"}, status_code=200)
 
 
-@router.get("/cache-reload", response_class=JSONResponse, status_code=200)
+@router.get("/cache-reload", response_class=ORJSONResponse, status_code=200)
 async def reload_cards_cache(
     day: int = Query(
         ..., title="Filter", description="Filter the reports age based on the given string", examples=[1, 7]
@@ -306,7 +401,7 @@ async def reload_cards_cache(
         description="Protocol to filter the reports: ui/api/perf/all",
         examples=["ui", "api", "perf", "all"],
     ),
-) -> JSONResponse:
+) -> ORJSONResponse:
     """Pull all objects from the S3 bucket and reload Redis cache with the missing cache cards data based on the filters"""
     from server import fastapi_app
 
@@ -317,13 +412,13 @@ async def reload_cards_cache(
         "protocol": protocol,
         "product": product,
     }
-    redis = instances.redis
+    aioredis = instances.aioredis
     operation = "cache-reload"
     identifier = "reload"
 
-    if is_cache_reloading(redis.redis_client):
+    if await aioredis.is_cache_reloading():
         logger.info("Cache reload already queued.")
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "in-progress",
                 "message": "A cache reload with these filters is already in progress",
@@ -332,15 +427,14 @@ async def reload_cards_cache(
             status_code=202,
         )
 
-    marked = mark_operation(
-        redis.redis_client,
+    marked = await aioredis.mark_operation(
         operation,
         identifier,
         metadata={"started_at": dt.now().isoformat(), "filters": expected_filter_dict},
     )
     if not marked:
         logger.info(f"Cache reload lost race for filters {expected_filter_dict}")
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "in-progress",
                 "message": "A cache reload with these filters is already in progress",
@@ -353,39 +447,32 @@ async def reload_cards_cache(
         cards: Cards = fastapi_app.state.cards
         card_dates = await cards.actions(expected_filter_dict)
         cached_cards_count = len(card_dates) if card_dates is not None else 0
-        return JSONResponse(
+        return ORJSONResponse(
             content={"message": f"Cached {cached_cards_count} cards based on the given filters", "cards": card_dates},
             status_code=200,
         )
     finally:
-        unmark_operation(redis.redis_client, operation, identifier)
+        await aioredis.unmark_operation(operation, identifier)
 
 
-@router.get("/cache-invalidate", response_class=JSONResponse, status_code=200)
+@router.get("/cache-invalidate", response_class=ORJSONResponse, status_code=200)
 async def invalidate_redis_cache(
     pattern: str = Query(
         title="Pattern",
         description="Regex pattern to match the Redis keys for invalidation",
         examples=["doctor-octopus:trading-apps-reports:qa*"],
     ),
-) -> JSONResponse:
+) -> ORJSONResponse:
     logger.info(f"Invalidating Redis cache with pattern: {pattern}")
-    redis_client = instances.redis.get_client()
-
-    cursor = 0
-    keys_to_delete = []
-    while True:
-        cursor, keys = redis_client.scan(cursor=cursor, match=pattern, count=100, type="string")  # type: ignore
-        string_keys = [key.decode("utf-8") if isinstance(key, bytes) else key for key in keys]
-        logger.info(f"Scanning Redis: cursor={cursor}, found {len(string_keys)} keys")
-        keys_to_delete.extend(string_keys)
-        if cursor == 0:
-            break
+    keys_to_delete = await instances.aioredis.scan_keys(pattern, count=100, _type="string")
     if keys_to_delete:
         logger.info(f"Found {len(keys_to_delete)} keys to delete. {keys_to_delete}")
-        await redis_client.delete(*keys_to_delete)
+        await instances.aioredis.delete(*keys_to_delete)
+        await instances.aioredis.incr(cards_cache_version_key)
         message = f"Deleted {len(keys_to_delete)} keys from Redis cache."
     else:
         message = "No keys found matching the pattern."
     logger.info(message)
-    return JSONResponse(content={"message": message, "total": len(keys_to_delete), "pattern": pattern}, status_code=200)
+    return ORJSONResponse(
+        content={"message": message, "total": len(keys_to_delete), "pattern": pattern}, status_code=200
+    )
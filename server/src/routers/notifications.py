@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Header, Query, Request
 from fastapi.responses import StreamingResponse
 
 import src.services.notification as notification
@@ -9,10 +9,20 @@ router = APIRouter()
 
 
 @router.get("/notifications/{client_id}", response_class=StreamingResponse)
-async def notifications_sse(client_id: str, request: Request) -> StreamingResponse:
+async def notifications_sse(
+    client_id: str,
+    request: Request,
+    last_event_id: str | None = Query(
+        None,
+        title="Last Event ID",
+        description="Id of the last notification received, to resume from. Same as the Last-Event-ID header",
+        examples=["1767225600000-0"],
+    ),
+    last_event_id_header: str | None = Header(None, alias="Last-Event-ID"),
+) -> StreamingResponse:
     logger.info(f"Client [{client_id}] connected to /notifications S.S.E endpoint")
     return StreamingResponse(
-        notification.notification_streamer(request, client_id),
+        notification.notification_streamer(request, client_id, last_event_id_header or last_event_id),
         media_type="text/event-stream",
         headers={"Cache-Control": "no-cache", "Connection": "keep-alive", "X-Accel-Buffering": "no"},
     )
@@ -1,12 +1,15 @@
+import asyncio
 import json
 import os
 from datetime import datetime
-from fastapi import APIRouter, BackgroundTasks, Query
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import APIRouter, Query
+from fastapi.responses import PlainTextResponse
 
 import instances
-from src.utils.executor import create_command, run_a_command_on_local
+from src.utils.execution_queue import Executions
+from src.utils.executor import Runner, create_command
 from src.utils.logger import logger
+from src.utils.responses import ORJSONResponse
 
 
 router = APIRouter()
@@ -14,14 +17,14 @@ router = APIRouter()
 
 @router.get("/execute", response_class=PlainTextResponse, status_code=202)
 async def execute_command(
-    background_tasks: BackgroundTasks,
     options: str = Query(
         ...,
         title="Options",
         description="Command options to be executed",
         examples=['{"environment": "dev", "product": "clo", "proto": "perf", "suite": "smoke"}'],
     ),
-) -> JSONResponse:
+    priority: int = Query(0, description="Higher priority runs are started first"),
+) -> ORJSONResponse:
     command = "n/a"
     try:
         _options: dict = json.loads(options)
@@ -30,23 +33,78 @@ async def execute_command(
             logger.info(f"Command to be executed: {command}")
     except json.JSONDecodeError as e:
         logger.info(f"Invalid JSON input: {e}")
-        return JSONResponse(content={"command": command, "error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"command": command, "error": str(e)}, status_code=500)
 
     try:
-        background_tasks.add_task(run_a_command_on_local, command)
-        return JSONResponse(
+        job, queued = await Executions.enqueue(_options, command, priority=priority)
+        message = (
+            "The command has been queued and will run in the background once its environment has a free slot."
+            if queued
+            else f"The same command is already {job['status']}. No new run was queued."
+        )
+        return ORJSONResponse(
             content={
-                "message": "The command has been successfully submitted and is running in the background.",
+                "message": message,
                 "details": "Please check the server logs or Artillery Cloud for progress updates.",
+                "job": job,
+                "position": await Executions.position(job["id"]),
             },
             status_code=202,
         )
     except Exception as e:
-        return JSONResponse(content={"command": command, "error": str(e)}, status_code=500)
+        return ORJSONResponse(content={"command": command, "error": str(e)}, status_code=500)
+
+
+@router.get("/executions", response_class=ORJSONResponse, status_code=200)
+async def get_executions() -> ORJSONResponse:
+    """Queued (in run order) and running test suite executions across all workers"""
+    return ORJSONResponse(content=await Executions.list_jobs(), status_code=200)
+
+
+@router.get("/executions/{execution_id}", response_class=ORJSONResponse, status_code=200)
+async def get_execution(execution_id: str) -> ORJSONResponse:
+    job = await Executions.get_job(execution_id)
+    if not job:
+        return ORJSONResponse(content={"error": f"Execution {execution_id} not found"}, status_code=404)
+    return ORJSONResponse(content={**job, "position": await Executions.position(execution_id)}, status_code=200)
+
+
+@router.post("/executions/{execution_id}/cancel", response_class=ORJSONResponse, status_code=200)
+async def cancel_execution(execution_id: str) -> ORJSONResponse:
+    if not await Executions.get_job(execution_id):
+        return ORJSONResponse(content={"error": f"Execution {execution_id} not found"}, status_code=404)
+    cancelled = await Executions.cancel(execution_id)
+    return ORJSONResponse(
+        content={"cancelled": cancelled, "job": await Executions.get_job(execution_id)}, status_code=200
+    )
 
 
-@router.get("/", response_class=JSONResponse, status_code=200)
-async def health_check() -> JSONResponse:
+@router.get("/jobs", response_class=ORJSONResponse, status_code=200)
+async def get_command_jobs() -> ORJSONResponse:
+    """Status of the commands run by this worker, most recent first"""
+    jobs = [job.to_dict() for job in reversed(Runner.jobs.values())]
+    return ORJSONResponse(content={"jobs": jobs}, status_code=200)
+
+
+@router.get("/jobs/{job_id}", response_class=ORJSONResponse, status_code=200)
+async def get_command_job(job_id: str) -> ORJSONResponse:
+    job = Runner.get(job_id)
+    if not job:
+        return ORJSONResponse(content={"error": f"Job {job_id} not found on this worker"}, status_code=404)
+    return ORJSONResponse(content=job.to_dict(), status_code=200)
+
+
+@router.post("/jobs/{job_id}/cancel", response_class=ORJSONResponse, status_code=200)
+async def cancel_command_job(job_id: str) -> ORJSONResponse:
+    job = Runner.get(job_id)
+    if not job:
+        return ORJSONResponse(content={"error": f"Job {job_id} not found on this worker"}, status_code=404)
+    cancelled = job.cancel()
+    return ORJSONResponse(content={"cancelled": cancelled, "job": job.to_dict()}, status_code=200)
+
+
+@router.get("/", response_class=ORJSONResponse, status_code=200)
+async def health_check() -> ORJSONResponse:
     from server import fastapi_app
 
     start_time = datetime.now()
@@ -64,7 +122,7 @@ async def health_check() -> JSONResponse:
                 try:
                     result = False
                     if state == "redis":
-                        result = instances.redis.ping()
+                        result = await asyncio.to_thread(instances.redis.ping)
                     elif state == "aioredis":
                         result = await instances.aioredis.ping()
                     elif state == "cards":
@@ -76,13 +134,18 @@ async def health_check() -> JSONResponse:
             else:
                 health_data["services"][state] = "n/a"
 
+        health_data["redis_pools"] = {
+            "redis": instances.redis.pool_stats(),
+            "aioredis": instances.aioredis.pool_stats(),
+        }
+
         response_time = (datetime.now() - start_time).total_seconds() * 1000
         health_data["response_time_ms"] = round(response_time, 2)
 
         logger.info(f"Health check completed successfully in {response_time:.2f}ms")
-        return JSONResponse(content=health_data, status_code=200)
+        return ORJSONResponse(content=health_data, status_code=200)
     except Exception as e:
         health_data["status"] = "unhealthy"
         health_data["error"] = str(e)
         logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(content=health_data, status_code=500)
+        return ORJSONResponse(content=health_data, status_code=500)
@@ -1,20 +1,29 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import json
-import time
 from config import (
+    cards_cache_version_key,
+    cards_cache_version_poll_interval,
+    cards_response_cache_size,
+    cards_response_cache_ttl,
     max_local_dirs,
     test_protocols,
     test_reports_redis_key,
     test_reports_cached_redis_key,
     test_environments,
     rate_limit_folder_batch_size,
-    rate_limit_wait_time,
 )
-from src.services.validation import validate
+from src.services.validation import compile_filter
 from src.services.system import get_all_local_cards, cleanup_old_test_report_directories
-from src.services.remote import download_s3_folder, get_cards_from_s3_and_cache, get_cards_from_cache
+from src.services.remote import (
+    download_s3_folder,
+    get_card_values_from_cache,
+    get_cards_from_s3_and_cache,
+    get_cards_from_cache,
+)
 from src.utils.helper import performance_log
 from src.utils.logger import logger
+from src.utils.ttl_cache import TTLCache
 
 
 class Cards:
@@ -24,6 +33,11 @@ class Cards:
     mode: str = ""
     product: str = ""
 
+    def __init__(self) -> None:
+        self.response_cache = TTLCache(
+            maxsize=cards_response_cache_size, ttl=cards_response_cache_ttl
+        )  # {(version, normalized filter): cards JSON bytes} of this worker's 'cache' mode responses
+
     @performance_log
     async def actions(self, expected_filter_dict: dict) -> list[dict] | list[str] | None:
         """Action to fetch and cache cards based on the expected filter data
@@ -43,15 +57,57 @@ class Cards:
         if mode == "s3":
             return await get_cards_from_s3_and_cache(expected_filter_dict)
         elif mode == "cache":
-            return get_cards_from_cache(expected_filter_dict)
+            return [json.loads(value) for value in await self.get_cached_cards_response(expected_filter_dict)]
         elif mode == "download":
-            return self.download_missing_cards(expected_filter_dict)
+            return await self.download_missing_cards(expected_filter_dict)
         elif mode == "cleanup":
             return cleanup_old_test_report_directories(max_local_dirs)
         else:
             logger.error(f"Unknown mode: {mode}. Expected 's3', 'cache', 'download', or 'cleanup'.")
             return None
 
+    @staticmethod
+    def normalize_filter(expected_filter_dict: dict) -> tuple:
+        """Hashable form of the cards filter so identical queries share a response cache entry"""
+        return (
+            ("day", int(expected_filter_dict.get("day", 1))),
+            ("environment", expected_filter_dict.get("environment")),
+            ("product", expected_filter_dict.get("product", "all")),
+            ("protocol", expected_filter_dict.get("protocol")),
+        )
+
+    async def get_cached_cards_response(self, expected_filter_dict: dict, version: tuple | None = None) -> list[bytes]:
+        """Serve the cards JSON bytes from this worker's response cache, computing them from Redis on a miss.
+        The cached JSON is kept serialized so the /cards endpoint can send it without decoding it.
+        `version` (cards cache version, time window) makes entries computed for an older version unreachable."""
+        cache_key = (version, self.normalize_filter(expected_filter_dict))
+        cards = self.response_cache.get(cache_key)
+        if cards is None:
+            cards = await get_card_values_from_cache(expected_filter_dict)
+            self.response_cache.set(cache_key, cards)
+        else:
+            logger.info(f"Cards response cache hit: {dict(cache_key[1])} | version: {version}")
+        return cards
+
+    async def listen_for_cache_invalidation(self, interval: float = cards_cache_version_poll_interval) -> None:
+        """Clear this worker's response cache when the cards cache version changes (new cards cached or cache
+        invalidated). Entries of older versions are unreachable anyway; this frees them. Runs for the worker's lifetime."""
+        import instances
+
+        version, checked = None, False
+        while True:
+            try:
+                latest = await instances.aioredis.get(cards_cache_version_key)
+                if checked and latest != version and len(self.response_cache):
+                    self.response_cache.clear()
+                    logger.info(f"Cards response cache invalidated | version: {latest}")
+                version, checked = latest, True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to check the cards cache version: {str(e)}")
+            await asyncio.sleep(interval)
+
     @staticmethod
     def ping() -> bool:
         logger.info("Cards component is heartbeating.")
@@ -71,6 +127,7 @@ class Cards:
             return []
         reports_cache_key = f"{test_reports_redis_key}:{environment}:{protocol}"  # trading-app-reports:qa:ui
         _missing_cards = []
+        is_invalid = compile_filter(expected_filter_dict)
 
         cached_cards = redis.get_all_cached_cards(reports_cache_key)
         if cached_cards and isinstance(cached_cards, dict):
@@ -81,7 +138,7 @@ class Cards:
                 cached_card_s3_root_dir = cached_card_filter_data.get(
                     "s3_root_dir", ""
                 )  # 'trading-apps/test_reports/api/12-31-2025_08-30-00_AM'
-                error = validate(cached_card_filter_data, expected_filter_dict)
+                error = is_invalid(cached_card_filter_data)
                 if error:
                     continue
                 if cached_card_date not in local_cards:
@@ -118,16 +175,16 @@ class Cards:
         )  # Flatten the list of lists into a single list []
         return missing_cache_card_dates
 
-    def download_missing_cards(self, expected_filter_dict: dict) -> list[str]:
+    async def download_missing_cards(self, expected_filter_dict: dict) -> list[str]:
         """
-        Download the missing cards from S3 and cache them on the server using three levels of parallelism:
-        (1) per environment, (2) per protocol, and (3) per batch of cards, all utilizing threads.
+        Download the missing cards from S3 and cache them on the server. Missing cards are looked up per
+        environment/protocol cache in threads, then downloaded concurrently per batch of cards with the async S3 client.
         """
-        missing_cached_cards = self.all_missing_cards(expected_filter_dict)
-        self.download_cards(missing_cached_cards)
+        missing_cached_cards = await asyncio.to_thread(self.all_missing_cards, expected_filter_dict)
+        await self.download_cards(missing_cached_cards)
         return missing_cached_cards
 
-    def download_cards(self, missing_cache_card_dates: list[str]) -> None:
+    async def download_cards(self, missing_cache_card_dates: list[str]) -> None:
         """Download specific cards from S3 given their root directories."""
 
         total_batches = self.calculate_total_batches(len(missing_cache_card_dates), rate_limit_folder_batch_size)
@@ -143,31 +200,27 @@ class Cards:
                 f"Downloading cards folder batch {i // rate_limit_folder_batch_size + 1} with {len(cards_folders_batch)} cards"
             )
 
-            with ThreadPoolExecutor() as executor:
-                futures = [executor.submit(download_s3_folder, card_date_dir) for card_date_dir in cards_folders_batch]
-                for future in as_completed(futures):
-                    try:
-                        future.result()
-                    except Exception as e:
-                        logger.error(f"Error downloading card: {e}", exc_info=True)
-            logger.info(
-                f"Downloaded cards folder batch {i // rate_limit_folder_batch_size + 1} successfully ✅ Rate limiting wait time {rate_limit_wait_time}s..."
+            results = await asyncio.gather(
+                *[download_s3_folder(card_date_dir) for card_date_dir in cards_folders_batch], return_exceptions=True
             )
-            time.sleep(rate_limit_wait_time)
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Error downloading card: {result}", exc_info=result)
+            logger.info(f"Downloaded cards folder batch {i // rate_limit_folder_batch_size + 1} successfully ✅")
 
     @staticmethod
     def calculate_total_batches(total_items, batch_size) -> list[int]:
         return (total_items + batch_size - 1) // batch_size
 
-    def download_missing_cached_cards(self, expected_filter_dict: dict) -> list[str]:
+    async def download_missing_cached_cards(self, expected_filter_dict: dict) -> list[str]:
         """Download missing local cards that are already cached in Redis.
         Alternative of download_missing_cards that checks against individual caches by env:proto hash combo.
         This function uses the set cache to determine which cards to download, while download_missing_cards uses the hash cache and validation to determine which cards to download. The hash cache is more expensive to query but more accurate,
         while the set cache is less expensive but may contain some cards that don't fully match the filter criteria.
         This function will download all protocols' missing cards avaialble in the caches, while download_missing_cards will only download missing cards for the specified protocols in the config file.
         """
-        missing_cache_card_dates = self.cards_to_download(expected_filter_dict)
-        self.download_cards(missing_cache_card_dates)
+        missing_cache_card_dates = await asyncio.to_thread(self.cards_to_download, expected_filter_dict)
+        await self.download_cards(missing_cache_card_dates)
         return missing_cache_card_dates
 
     def cards_to_download(self, expected_filter_dict: dict) -> list[str]:
@@ -181,9 +234,9 @@ class Cards:
         cached_cards: list[str] = redis.get_all_set_items(test_reports_cached_redis_key)
         transformed_cards_dict = self.transform_cached_cards_to_filter_dict(cached_cards)
 
+        is_invalid = compile_filter(expected_filter_dict)
         validation_results = [
-            (card_date, validate(transformed_cards_dict[card_date], expected_filter_dict))
-            for card_date in transformed_cards_dict.keys()
+            (card_date, is_invalid(transformed_cards_dict[card_date])) for card_date in transformed_cards_dict.keys()
         ]
         validated_card_dates = [card_date for card_date, error in validation_results if not error]
         missing_cache_card_dates = [card_date for card_date in validated_card_dates if card_date not in local_cards]
@@ -203,9 +256,9 @@ class Cards:
                 cards_pool[card_date] = filter_dict
         return cards_pool
 
-    def set_cards(self, expected_filter_dict: dict) -> list[dict]:
+    async def set_cards(self, expected_filter_dict: dict) -> list[dict]:
         """Force update the cards in Cards app memory state. Warning: memory intensive. Not being used currently."""
-        self.stored_cards_collection = get_cards_from_cache(expected_filter_dict)
+        self.stored_cards_collection = await get_cards_from_cache(expected_filter_dict)
         self.set_filter_data(expected_filter_dict)
         return self.stored_cards_collection
 
@@ -0,0 +1,217 @@
+"""
+Change feeds tell the notification service which S3 report folders were added, updated or removed,
+so only those folders are cached and downloaded instead of re-listing the bucket and comparing object counts.
+
+Sources (CHANGE_FEED_SOURCE):
+    s3-index -> default fallback. Refreshes the S3 listing index (today's day prefixes since its watermark)
+                and reads the folders it logged as changed since this feed's own Redis watermark.
+    sqs      -> consumes S3 event notifications (direct, SNS or EventBridge envelopes) from CHANGE_FEED_SQS_QUEUE_URL.
+    local    -> reads S3 event notification JSON files dropped in CHANGE_FEED_DROP_DIR. Stands in for SQS in tests.
+
+The event driven sources re-list only the folders named in the events to keep the S3 index in sync.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from urllib.parse import unquote_plus
+from config import change_feed_wait_time, change_feed_watermark_key, notification_frequency_time, pubsub_frequency_time
+from src.utils.aios3_client import AioS3
+from src.utils.env_loader import get_change_feed_drop_dir, get_change_feed_source, get_change_feed_sqs_queue_url
+from src.utils.logger import logger
+from src.utils.s3_index import S3_ROOT_DIR_DEPTH, S3Index, get_s3_root_dir
+
+
+def root_dirs_from_s3_event(event: dict) -> set[str]:
+    """Return the report root dirs of the object keys in an S3 event notification.
+    Supports the S3 -> SQS format ({"Records": [...]}), the SNS envelope ({"Message": "<json>"})
+    and the EventBridge format ({"detail": {"object": {"key": ...}}}). S3 test events have no keys.
+    """
+    if "Message" in event and isinstance(event["Message"], str):
+        return root_dirs_from_s3_event(json.loads(event["Message"]))
+
+    object_keys = [
+        unquote_plus(record.get("s3", {}).get("object", {}).get("key", "")) for record in event.get("Records", [])
+    ]
+    if "detail" in event:
+        object_keys.append(event["detail"].get("object", {}).get("key", ""))
+
+    return {
+        get_s3_root_dir(object_key)
+        for object_key in object_keys
+        if object_key.count("/") >= S3_ROOT_DIR_DEPTH  # ignore keys that are not inside a report folder
+    }
+
+
+class ChangeFeed(ABC):
+    """Common interface of the change feed sources"""
+
+    source: str = ""
+
+    @abstractmethod
+    async def changes(self) -> list[str]:
+        """Wait for the next batch of changed report folders and return their s3 root dirs.
+        Returns an empty list if nothing changed within the source's poll interval."""
+
+    async def close(self) -> None:
+        pass
+
+
+class S3IndexChangeFeed(ChangeFeed):
+    """Fallback source that polls the S3 listing index for changed folders"""
+
+    source = "s3-index"
+
+    def __init__(self, poll_interval: float = notification_frequency_time):
+        self.poll_interval = poll_interval
+        self.polled = False
+
+    @staticmethod
+    def get_redis():
+        import instances
+
+        return instances.aioredis
+
+    async def changes(self) -> list[str]:
+        if self.polled:
+            await asyncio.sleep(self.poll_interval)
+        self.polled = True
+
+        redis = self.get_redis()
+        watermark = await redis.get(change_feed_watermark_key)
+        await AioS3.run(S3Index.refresh)
+        now = time.time()
+        if watermark is None:
+            # First run: only report changes made after the feed started. The initial cache reload covers the
+            # folders indexed so far, including the ones a cold index build just added.
+            await redis.set(change_feed_watermark_key, now)
+            return []
+        changed_dirs = await AioS3.run(S3Index.changed_since, float(watermark), now)
+        await redis.set(change_feed_watermark_key, now)
+        return changed_dirs
+
+
+class EventChangeFeed(ChangeFeed):
+    """Base of the sources that receive S3 event notifications"""
+
+    @abstractmethod
+    async def receive(self) -> list[tuple[dict, object]]:
+        """Return the received (event, receipt) pairs"""
+
+    @abstractmethod
+    async def acknowledge(self, receipts: list) -> None:
+        """Remove the processed events from the source"""
+
+    async def changes(self) -> list[str]:
+        events = await self.receive()
+        if not events:
+            return []
+
+        root_dirs: set[str] = set()
+        for event, _ in events:
+            try:
+                root_dirs |= root_dirs_from_s3_event(event)
+            except (AttributeError, TypeError, ValueError) as e:
+                logger.error(f"Skipping malformed S3 event from the {self.source} change feed: {str(e)}")
+
+        changed_dirs = await AioS3.run(S3Index.refresh_dirs, list(root_dirs)) if root_dirs else []
+        await self.acknowledge([receipt for _, receipt in events])
+        return changed_dirs
+
+
+class SQSChangeFeed(EventChangeFeed):
+    """Consumes S3 event notifications from an SQS queue with long polling"""
+
+    source = "sqs"
+
+    def __init__(self, queue_url: str, wait_time: int = change_feed_wait_time):
+        import boto3
+        from src.utils.s3_client import aws_access_key_id, aws_bucket_region, aws_secret_access_key, aws_session_token
+
+        if not queue_url:
+            raise ValueError("CHANGE_FEED_SQS_QUEUE_URL environment variable is not set.")
+        session = boto3.Session(
+            aws_access_key_id=aws_access_key_id,
+            aws_secret_access_key=aws_secret_access_key,
+            region_name=aws_bucket_region,
+            aws_session_token=aws_session_token,
+        )
+        self.sqs = session.client("sqs")
+        self.queue_url = queue_url
+        self.wait_time = wait_time
+
+    async def receive(self) -> list[tuple[dict, object]]:
+        response = await asyncio.to_thread(
+            self.sqs.receive_message,
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=10,
+            WaitTimeSeconds=self.wait_time,
+        )
+        events = []
+        for message in response.get("Messages", []):
+            try:
+                events.append((json.loads(message["Body"]), message["ReceiptHandle"]))
+            except json.JSONDecodeError:
+                logger.error(f"Skipping SQS message that is not JSON: {message.get('MessageId')}")
+                events.append(({}, message["ReceiptHandle"]))
+        return events
+
+    async def acknowledge(self, receipts: list) -> None:
+        entries = [{"Id": str(i), "ReceiptHandle": receipt} for i, receipt in enumerate(receipts)]
+        await asyncio.to_thread(self.sqs.delete_message_batch, QueueUrl=self.queue_url, Entries=entries)
+
+
+class LocalDropChangeFeed(EventChangeFeed):
+    """Reads S3 event notification JSON files dropped in a local directory and deletes them once processed"""
+
+    source = "local"
+
+    def __init__(self, drop_dir: str, poll_interval: float = pubsub_frequency_time):
+        self.drop_dir = drop_dir
+        self.poll_interval = poll_interval
+        os.makedirs(drop_dir, exist_ok=True)
+
+    async def receive(self) -> list[tuple[dict, object]]:
+        # File I/O runs in a thread, like the SQS calls, so it never blocks the notification loop
+        events = await asyncio.to_thread(self.read_event_files)
+        if not events:
+            await asyncio.sleep(self.poll_interval)
+        return events
+
+    def read_event_files(self) -> list[tuple[dict, object]]:
+        """(event, file path) of the dropped event files, oldest first"""
+        events = []
+        for event_file in sorted(glob.glob(os.path.join(self.drop_dir, "*.json")), key=os.path.getmtime):
+            try:
+                with open(event_file, "r") as f:
+                    events.append((json.load(f), event_file))
+            except json.JSONDecodeError:
+                logger.error(f"Skipping change feed file that is not JSON: {event_file}")
+                events.append(({}, event_file))
+        return events
+
+    async def acknowledge(self, receipts: list) -> None:
+        await asyncio.to_thread(self.remove_event_files, receipts)
+
+    @staticmethod
+    def remove_event_files(event_files: list) -> None:
+        for event_file in event_files:
+            try:
+                os.remove(event_file)
+            except FileNotFoundError:
+                pass
+
+
+def get_change_feed(source: str | None = None) -> ChangeFeed:
+    """Create the change feed configured by CHANGE_FEED_SOURCE"""
+    source = source or get_change_feed_source()
+    if source == "sqs":
+        return SQSChangeFeed(get_change_feed_sqs_queue_url())
+    if source == "local":
+        return LocalDropChangeFeed(get_change_feed_drop_dir())
+    if source != S3IndexChangeFeed.source:
+        logger.warning(f"Unknown change feed source: {source}. Falling back to {S3IndexChangeFeed.source}")
+    return S3IndexChangeFeed()
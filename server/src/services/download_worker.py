@@ -0,0 +1,153 @@
+import asyncio
+import json
+import time
+from config import (
+    download_global_concurrency,
+    download_progress_interval,
+    download_worker_concurrency,
+)
+from src.services.cards import Cards
+from src.services.downloader import DownloadQueue, Downloads, download_card
+from src.services.system import local_report_directories, remove_local_report_directory
+from src.utils.logger import logger
+
+
+class DownloadWorker:
+    """Standalone card download process. Each consumer claims a job from the persistent queue, then takes one of the
+    `global_concurrency` download slots shared by every download worker process (the job goes back to pending when none
+    is free) and downloads it while keeping the job's visibility deadline, slot and download lock alive. A failed
+    download is requeued until max_attempts. One of the processes requeues the expired jobs."""
+
+    slot_operation: str = "download-slot"
+
+    def __init__(
+        self,
+        queue: DownloadQueue = Downloads,
+        concurrency: int = download_worker_concurrency,
+        global_concurrency: int = download_global_concurrency,
+    ) -> None:
+        self.queue = queue
+        self.concurrency = concurrency
+        self.global_concurrency = global_concurrency
+        self.cards = Cards()
+
+    @staticmethod
+    def get_redis():
+        import instances
+
+        return instances.aioredis
+
+    async def acquire_slot(self) -> str | None:
+        redis = self.get_redis()
+        for slot in range(self.global_concurrency):
+            if await redis.mark_operation(self.slot_operation, str(slot), ttl=self.queue.visibility_timeout):
+                return str(slot)
+        return None
+
+    async def release_slot(self, slot: str) -> None:
+        await self.get_redis().unmark_operation(self.slot_operation, slot)
+
+    async def consume(self) -> None:
+        while True:
+            slot = None
+            try:
+                job = await self.queue.claim(timeout=5)
+                if not job:
+                    continue
+                slot = await self.acquire_slot()
+                if slot is None:
+                    await self.queue.release(job)
+                    await asyncio.sleep(1)  # every download slot is busy across the download workers
+                    continue
+                await self.process(job, slot)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Download worker error: {str(e)}")
+                await asyncio.sleep(1)
+            finally:
+                if slot is not None:
+                    await self.release_slot(slot)
+
+    async def process(self, raw_job: str, slot: str) -> None:
+        job = json.loads(raw_job)
+        card_date, card_dir = job["card_date"], job["card_dir"]
+        if card_dir in local_report_directories():
+            await self.get_redis().unmark_downloading(card_dir)
+            await self.queue.set_progress(card_dir, status="done", cached=True)
+            await self.queue.ack(raw_job)
+            return
+
+        # The lock was taken for the whole queue wait. keep_alive extends it from now on, like the job deadline.
+        await self.get_redis().extend_operation("download", card_dir, self.queue.visibility_timeout)
+        progress = {"status": "downloading", "files_done": 0, "files_total": None, "attempts": job["attempts"]}
+
+        def on_progress(files_done: int, files_total: int) -> None:
+            progress.update(files_done=files_done, files_total=files_total)
+
+        keep_alive = asyncio.create_task(self.keep_alive(raw_job, card_dir, slot, progress))
+        error = None
+        try:
+            await download_card(card_date, card_dir, on_progress=on_progress)
+        except Exception as e:
+            logger.error(f"Download failed for {card_dir}: {str(e)}")
+            error = e
+        finally:
+            keep_alive.cancel()
+            await asyncio.gather(keep_alive, return_exceptions=True)
+
+        await self.queue.ack(raw_job)
+        if error is None:
+            progress["status"] = "done"
+            await self.queue.set_progress(card_dir, **progress)
+        else:
+            await asyncio.to_thread(remove_local_report_directory, card_dir)  # or the retry would see it as cached
+            await self.queue.requeue(job, f"failed: {str(error)}")
+
+        if await self.pending_count() == 0:
+            await self.cards.actions({"mode": "cleanup"})
+
+    async def keep_alive(self, raw_job: str, card_dir: str, slot: str, progress: dict) -> None:
+        """Report the download progress and push the job deadline, slot and download lock expiries forward"""
+        redis = self.get_redis()
+        extend_every = self.queue.visibility_timeout / 3
+        extended_at = time.monotonic()
+        while True:
+            await asyncio.sleep(download_progress_interval)
+            await self.queue.set_progress(card_dir, **progress)
+            if time.monotonic() - extended_at >= extend_every:
+                await self.queue.extend(raw_job)
+                await redis.extend_operation(self.slot_operation, slot, self.queue.visibility_timeout)
+                await redis.extend_operation("download", card_dir, self.queue.visibility_timeout)
+                extended_at = time.monotonic()
+
+    async def pending_count(self) -> int:
+        client = await self.get_redis().get_client()
+        return await client.llen(self.queue.pending_key)
+
+    async def reap(self) -> None:
+        """Requeue the jobs of crashed workers. Only one download worker process reaps in each interval."""
+        interval = max(1, self.queue.visibility_timeout // 2)
+        while True:
+            try:
+                if await self.get_redis().mark_operation("download-reaper", "reaper", ttl=interval):
+                    requeued = await self.queue.requeue_expired()
+                    if requeued:
+                        logger.info(f"Requeued {requeued} expired download jobs")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Download reaper error: {str(e)}")
+            await asyncio.sleep(interval)
+
+    async def run(self) -> None:
+        logger.info(
+            f"Download worker started with {self.concurrency} consumers | "
+            f"{self.global_concurrency} download slots shared across the download workers"
+        )
+        await asyncio.gather(self.reap(), *[self.consume() for _ in range(self.concurrency)])
+
+
+if __name__ == "__main__":
+    logger.info("Starting the card download worker process...")
+    asyncio.run(DownloadWorker().run())
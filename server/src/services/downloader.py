@@ -0,0 +1,213 @@
+"""
+Persistent card download queue shared by the web workers (producers) and the download worker process (consumer).
+Web workers only enqueue; src/services/download_worker.py downloads. Both sides use the async Redis client.
+
+Keys:
+    {root_redis_key}:downloads:pending -> list of JSON jobs waiting, oldest on the right
+    {root_redis_key}:downloads:processing -> list of JSON jobs claimed by a download worker
+    {root_redis_key}:downloads:deadlines -> sorted set {job: visibility deadline} of the processing jobs
+    {root_redis_key}:downloads:progress:{card_dir} -> JSON progress of the card's latest download job
+
+A claimed job is moved atomically from pending to processing. Its worker keeps pushing the deadline forward while
+the download runs; a job whose deadline passes (worker crashed or restarted) or whose download failed is put back
+in pending with one more attempt, until max_attempts.
+"""
+
+import json
+import os
+import time
+from datetime import datetime as dt
+from typing import Callable
+from config import (
+    download_jobs_max_attempts,
+    download_pending_ttl,
+    download_progress_ttl,
+    download_visibility_timeout,
+    root_redis_key,
+)
+from src.services.remote import download_s3_folder
+from src.services.system import local_report_directories
+from src.utils.logger import logger
+
+
+async def download_card(card_date: str, card_dir: str, on_progress: Callable[[int, int], None] | None = None) -> None:
+    """Download a card folder marked as downloading, publish the completion notification and unmark it.
+    A failed download keeps the lock: the caller either requeues the job or gives up and unmarks it."""
+    import instances
+
+    logger.info(f"Starting background download for {card_dir}")
+    await download_s3_folder(card_date, on_progress=on_progress)
+
+    try:
+        download_notification = {
+            "type": "download",
+            "card_date": card_dir,
+            "timestamp": dt.now().timestamp(),
+        }
+        await instances.aioredis.publish_notification(download_notification)
+        logger.info(f"Published download completion notification for {card_dir}")
+    except Exception as err:
+        logger.error(f"Failed to publish download completion notification: {str(err)}")
+    await instances.aioredis.unmark_downloading(card_dir)
+
+
+class DownloadQueue:
+    pending_key: str = f"{root_redis_key}:downloads:pending"
+    processing_key: str = f"{root_redis_key}:downloads:processing"
+    deadlines_key: str = f"{root_redis_key}:downloads:deadlines"
+    progress_key_prefix: str = f"{root_redis_key}:downloads:progress"
+
+    def __init__(
+        self, visibility_timeout: int = download_visibility_timeout, max_attempts: int = download_jobs_max_attempts
+    ) -> None:
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+
+    def progress_key(self, card_dir: str) -> str:
+        return f"{self.progress_key_prefix}:{card_dir}"
+
+    @staticmethod
+    def new_job(card_date: str, card_dir: str, attempts: int = 0) -> str:
+        return json.dumps(
+            {"card_date": card_date, "card_dir": card_dir, "queued_at": time.time(), "attempts": attempts}
+        )
+
+    async def enqueue(self, card_dates: list[str]) -> dict[str, list[str]]:
+        """Queue the downloads of the given S3 card folders that are neither local nor already downloading.
+        The download locks of the batch are taken in one pipeline, the jobs are pushed in a second one. The locks outlive
+        the wait for a download slot and are shortened to the visibility timeout when a download worker claims the job.
+        Returns the card dirs by outcome: queued, cached (already local) and downloading (locked elsewhere)."""
+        import instances
+
+        local_cards = set(local_report_directories())
+        result: dict[str, list[str]] = {"queued": [], "cached": [], "downloading": []}
+        candidates: dict[str, str] = {}  # {card_dir: card_date}
+        for card_date in card_dates:
+            card_dir = os.path.basename(card_date)
+            if card_dir in local_cards:
+                result["cached"].append(card_dir)
+            else:
+                candidates.setdefault(card_dir, card_date)
+
+        metadata = {"started_at": dt.now().isoformat()}
+        acquired = await instances.aioredis.mark_downloads(
+            list(candidates), metadata=metadata, ttl=download_pending_ttl
+        )
+        client = await instances.aioredis.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            for (card_dir, card_date), was_acquired in zip(candidates.items(), acquired):
+                if not was_acquired:
+                    result["downloading"].append(card_dir)
+                    continue
+                pipeline.lpush(self.pending_key, self.new_job(card_date, card_dir))
+                progress = {"status": "queued", "updated_at": time.time()}
+                pipeline.set(self.progress_key(card_dir), json.dumps(progress), ex=download_progress_ttl)
+                result["queued"].append(card_dir)
+            if result["queued"]:
+                await pipeline.execute()
+
+        logger.info(
+            f"Queued {len(result['queued'])} of {len(card_dates)} card downloads | "
+            f"{len(result['cached'])} cached, {len(result['downloading'])} already downloading"
+        )
+        return result
+
+    async def progress(self, card_dirs: list[str]) -> dict[str, dict]:
+        """Latest download progress of each card dir that has one"""
+        import instances
+
+        if not card_dirs:
+            return {}
+        client = await instances.aioredis.get_client()
+        values = await client.mget([self.progress_key(card_dir) for card_dir in card_dirs])
+        return {card_dir: json.loads(value) for card_dir, value in zip(card_dirs, values) if value}
+
+    # Consumer side, used by the download worker process
+
+    async def claim(self, timeout: int) -> str | None:
+        """Move the oldest pending job to processing and start its visibility timeout. None if nothing arrived."""
+        import instances
+
+        blocking_client = await instances.aioredis.get_blocking_client()
+        job = await blocking_client.blmove(self.pending_key, self.processing_key, timeout, "RIGHT", "LEFT")
+        if job is None:
+            return None
+        client = await instances.aioredis.get_client()
+        await client.zadd(self.deadlines_key, {job: time.time() + self.visibility_timeout})
+        return job.decode("utf-8") if isinstance(job, bytes) else job
+
+    async def extend(self, job: str) -> None:
+        """Push the job's visibility deadline forward while it is being downloaded"""
+        import instances
+
+        client = await instances.aioredis.get_client()
+        await client.zadd(self.deadlines_key, {job: time.time() + self.visibility_timeout}, xx=True)
+
+    async def ack(self, job: str) -> None:
+        import instances
+
+        client = await instances.aioredis.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            pipeline.lrem(self.processing_key, 1, job)
+            pipeline.zrem(self.deadlines_key, job)
+            await pipeline.execute()
+
+    async def release(self, job: str) -> None:
+        """Put a claimed job back at the head of pending without counting an attempt (no download slot was free)"""
+        import instances
+
+        client = await instances.aioredis.get_client()
+        async with client.pipeline(transaction=True) as pipeline:
+            pipeline.lrem(self.processing_key, 1, job)
+            pipeline.zrem(self.deadlines_key, job)
+            pipeline.rpush(self.pending_key, job)
+            await pipeline.execute()
+
+    async def requeue(self, job: dict, reason: str) -> bool:
+        """Queue a job that was already removed from processing again with one more attempt, or fail it and release
+        its download lock after max_attempts. Returns whether the job was requeued."""
+        import instances
+
+        card_dir = job["card_dir"]
+        attempts = job["attempts"] + 1
+        if attempts >= self.max_attempts:
+            logger.error(f"Download of {card_dir} {reason}. Giving up after {attempts} attempts")
+            await self.set_progress(card_dir, status="failed", attempts=attempts, error=reason)
+            await instances.aioredis.unmark_downloading(card_dir)
+            return False
+        logger.info(f"Download of {card_dir} {reason}. Requeued (attempt {attempts + 1})")
+        client = await instances.aioredis.get_client()
+        await client.lpush(self.pending_key, self.new_job(job["card_date"], card_dir, attempts))
+        await instances.aioredis.extend_operation("download", card_dir, download_pending_ttl)
+        await self.set_progress(card_dir, status="queued", attempts=attempts, error=reason)
+        return True
+
+    async def set_progress(self, card_dir: str, **progress) -> None:
+        import instances
+
+        client = await instances.aioredis.get_client()
+        progress["updated_at"] = time.time()
+        await client.set(self.progress_key(card_dir), json.dumps(progress), ex=download_progress_ttl)
+
+    async def requeue_expired(self) -> int:
+        """Put the processing jobs whose visibility deadline passed back in pending, or fail them after
+        max_attempts. Jobs claimed without a deadline (worker died in between) get one. Returns the requeued count."""
+        import instances
+
+        client = await instances.aioredis.get_client()
+        now = time.time()
+        for job in await client.lrange(self.processing_key, 0, -1):
+            if await client.zscore(self.deadlines_key, job) is None:
+                await client.zadd(self.deadlines_key, {job: now + self.visibility_timeout}, nx=True)
+
+        requeued = 0
+        for raw_job in await client.zrangebyscore(self.deadlines_key, "-inf", now):
+            await client.zrem(self.deadlines_key, raw_job)
+            if not await client.lrem(self.processing_key, 1, raw_job):
+                continue  # acknowledged meanwhile
+            if await self.requeue(json.loads(raw_job), "timed out"):
+                requeued += 1
+        return requeued
+
+
+Downloads = DownloadQueue()
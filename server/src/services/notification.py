@@ -1,42 +1,72 @@
 import asyncio
+from datetime import datetime
 import aiohttp
 from fastapi.requests import Request
-from redis.asyncio.client import PubSub
 import instances
-from src.services import remote
+from src.services.change_feed import get_change_feed
+from src.utils.broadcaster import Notifications, is_stream_id, stream_id_key
+from src.utils.date import parse_report_date
 from src.utils.logger import logger
+from src.utils.http_client import DoctorHTTP
 from src.utils.helper import call_doctor_endpoint, queue_cards_download, wait_for_server_ready
-from config import notification_frequency_time, pubsub_frequency_time, do_current_clients_count_key
+from config import notification_frequency_time, sse_keepalive_time, do_current_clients_count_key
 
 
 async def notification_publisher():
-    """Update the total number of S3 objects and emit an alert if the count increases"""
+    """Cache and download the report folders reported by the change feed as soon as they change"""
     day_filter = {"day": 1, "product": "all", "environment": "all", "protocol": "all"}
+    change_feed = get_change_feed()
     try:
         # Wait for server to be ready before attempting cache reload
         await wait_for_server_ready()
 
         # Initial cache reload and download queue on server start
         await cache_and_download(day_filter)
-
-        initial_total_s3_objects = remote.total_s3_objects()
-        logger.info(f"S3 total current: {initial_total_s3_objects}")
+        logger.info(f"Listening for new reports on the {change_feed.source} change feed")
 
         while True:
-            current_total_s3_objects = remote.total_s3_objects()
-            if current_total_s3_objects > initial_total_s3_objects:
-                logger.info(f"NEW alert: {current_total_s3_objects} 🔔")
-
-                initial_total_s3_objects = current_total_s3_objects
-                await cache_and_download(day_filter)
-            else:
+            try:
+                changed_dirs = await change_feed.changes()
+            except Exception as e:
+                logger.error(f"Error reading the {change_feed.source} change feed: {str(e)} | will retry...")
                 await asyncio.sleep(notification_frequency_time)
+                continue
+            if not changed_dirs:
+                continue
+
+            logger.info(f"NEW alert: {len(changed_dirs)} changed report folders 🔔")
+            await cache_and_download_dirs(changed_dirs)
     except asyncio.CancelledError:
         logger.info("Notification update process cancelled")
         raise
     except Exception as e:
         logger.error(f"Error in main notification process: {str(e)}")
         raise
+    finally:
+        await change_feed.close()
+        await DoctorHTTP.close()
+
+
+def changed_dirs_to_filters(changed_dirs: list[str]) -> list[dict]:
+    """Narrow the cache reload to the product/environment/protocol folders that changed.
+    The day range is widened to cover the oldest changed report, e.g. a late upload of yesterday's run.
+    'trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM' -> {"day": 1, "product": "loan", "environment": "qa", "protocol": "api"}
+    """
+    now = datetime.now()
+    filters: dict[tuple, dict] = {}
+    for root_dir in changed_dirs:
+        path_parts = root_dir.split("/")
+        if len(path_parts) < 6:
+            continue
+        product, environment, protocol, report_dir_date = path_parts[2:6]
+        report_date = parse_report_date(report_dir_date)
+        day = max(1, (now - report_date).days + 1) if report_date else 1
+        cards_filter = filters.setdefault(
+            (product, environment, protocol),
+            {"day": day, "product": product, "environment": environment, "protocol": protocol},
+        )
+        cards_filter["day"] = max(cards_filter["day"], day)
+    return list(filters.values())
 
 
 async def cache_and_download(day_filter):
@@ -54,62 +84,78 @@ async def cache_and_download(day_filter):
             logger.error(f"HTTP API error during retry: {str(e)}")
 
 
-async def notification_streamer(request: Request, client_id: str):
-    """Generate SSE notification stream from Redis pubsub"""
-    aioredis = instances.aioredis
-    redis = instances.redis
-    pubsub: PubSub = await aioredis.pubsub()
-    await pubsub.subscribe("notifications")
-    logger.info(f"Client [{client_id}] connected to SSE stream")
-    active_clients_count, max_active_clients_count, lifetime_do_client_count = (
-        instances.redis.refresh_redis_client_metrics()
-    )
-
-    data = {
-        "type": "client",
-        "active": active_clients_count,
-        "max": max_active_clients_count,
-        "lifetime": lifetime_do_client_count,
-        "client": client_id,
-        "timestamp": asyncio.get_event_loop().time(),
-    }
-    logger.info(f"Sending initial connection data: {data}")
-    await aioredis.publish("notifications", data)
-    # Send initial connection message
-    yield f"event: connected\ndata: {data}\n\n"
-
+async def cache_and_download_dirs(changed_dirs: list[str]):
+    """Cache and download only the changed report folders. Falls back to a filtered cache reload of their folders."""
     try:
-        while True:
-            if await request.is_disconnected():
-                logger.info(f"Client [{client_id}] disconnected from SSE stream")
-                break
-            data = await get_pubsub_message(pubsub)
-            if data:
-                yield f"data: {data}\n\n"
+        res = await call_doctor_endpoint("/cache-and-download", {}, method="post", json={"s3_root_dirs": changed_dirs})
+        logger.info(f"API cache-and-download response: {res.get('message', 'No message in response')}")
+    except aiohttp.ClientError as e:
+        logger.error(f"HTTP API error during cache and download of the changed folders: {str(e)} | will retry...")
+        for cards_filter in changed_dirs_to_filters(changed_dirs):
+            await cache_and_download(cards_filter)
 
-            await asyncio.sleep(pubsub_frequency_time)
 
-    except asyncio.CancelledError:
-        logger.info(f"Client [{client_id}] SSE stream cancelled")
-        raise
-    finally:
-        active_clients_count = redis.decrement_key(do_current_clients_count_key)
+async def notification_streamer(request: Request, client_id: str, last_event_id: str | None = None):
+    """Generate SSE notification stream from this worker's notifications broadcaster.
+    A reconnecting client sends the id of the last event it received to first replay the notifications it missed."""
+    aioredis = instances.aioredis
+    async with Notifications.subscription() as queue:
+        logger.info(f"Client [{client_id}] connected to SSE stream")
+        (
+            active_clients_count,
+            max_active_clients_count,
+            lifetime_do_client_count,
+        ) = await aioredis.refresh_redis_client_metrics()
+
         data = {
             "type": "client",
-            "active": int(str(active_clients_count)),
+            "active": active_clients_count,
+            "max": max_active_clients_count,
+            "lifetime": lifetime_do_client_count,
             "client": client_id,
             "timestamp": asyncio.get_event_loop().time(),
         }
-        await aioredis.publish("notifications", data)
-        await pubsub.unsubscribe("notifications")
-
+        logger.info(f"Sending initial connection data: {data}")
+        await aioredis.publish_notification(data)
+        # Send initial connection message
+        yield f"event: connected\ndata: {data}\n\n"
 
-async def get_pubsub_message(pubsub: PubSub):
-    message = await pubsub.get_message(ignore_subscribe_messages=True)  # receive messages from pubsub
-    if message and message["type"] == "message":
-        # logger.info(f"Stream received message from Redis sub: {message['data']}")
-        data = message["data"].decode("utf-8")
-        return data
+        try:
+            replayed_id = None
+            if is_stream_id(last_event_id):
+                missed = await Notifications.replay(last_event_id)
+                logger.info(
+                    f"Client [{client_id}] resuming after {last_event_id}: replaying {len(missed)} notifications"
+                )
+                for event_id, data in missed:
+                    yield f"id: {event_id}\ndata: {data}\n\n"
+                replayed_id = stream_id_key(missed[-1][0] if missed else last_event_id)
+
+            while True:
+                try:
+                    event_id, data = await asyncio.wait_for(queue.get(), timeout=sse_keepalive_time)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        logger.info(f"Client [{client_id}] disconnected from SSE stream")
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                if replayed_id and stream_id_key(event_id) <= replayed_id:
+                    continue  # already sent by the replay
+                yield f"id: {event_id}\ndata: {data}\n\n"
+
+        except asyncio.CancelledError:
+            logger.info(f"Client [{client_id}] SSE stream cancelled")
+            raise
+        finally:
+            active_clients_count = await aioredis.decrement_key(do_current_clients_count_key)
+            data = {
+                "type": "client",
+                "active": int(str(active_clients_count)),
+                "client": client_id,
+                "timestamp": asyncio.get_event_loop().time(),
+            }
+            await aioredis.publish_notification(data)
 
 
 if __name__ == "__main__":
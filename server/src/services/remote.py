@@ -1,20 +1,24 @@
 import asyncio
-import time
 import json
 import os
 from pathlib import Path
-import redis as _redis
+from typing import Callable
 from config import (
     test_environments,
     test_protocols,
     test_reports_dir,
+    test_reports_products_redis_key,
     test_reports_redis_key,
-    rate_limit_file_batch_size,
+    s3_folder_manifest_cache_size,
+    s3_folder_manifest_ttl,
 )
-from src.services.validation import validate
+from src.services.validation import compile_filter
 from src.utils.file_helper import ensure_dir
 from src.utils.helper import performance_log
+from src.utils.aios3_client import AioS3
 from src.utils.s3_client import S3
+from src.utils.s3_index import S3Index
+from src.utils.ttl_cache import TTLCache
 from src.utils.logger import logger
 from src.utils.env_loader import get_aws_sdet_bucket_name
 from src.utils.date_time_helper import convert_unix_to_iso8601_time, get_unix_time, parse_card_day_to_unix
@@ -22,17 +26,36 @@ import src.utils.redis_client as redis_module
 
 aws_bucket_name = get_aws_sdet_bucket_name()
 server_root_dir = Path(__file__).resolve().parents[2]
-
-
-def total_s3_objects() -> int:
-    total = S3.list_all_s3_objects()
-    return len(total)
+CARD_SUMMARY_STATS_KEYS = (
+    "expected",
+    "unexpected",
+    "skipped",
+    "flaky",
+    "startTime",
+    "duration",
+    "runner",
+    "git_branch",
+    "test_suite",
+    "environment",
+    "app",
+    "product",
+    "app_grafana_url",
+)  # stats rendered by the client card
+folder_manifests = TTLCache(
+    maxsize=s3_folder_manifest_cache_size, ttl=s3_folder_manifest_ttl
+)  # {(bucket, s3_root_dir): [object keys]} for repeated downloads of the same card
+
+
+async def total_s3_objects() -> int:
+    await AioS3.run(S3Index.refresh)
+    return await AioS3.run(S3Index.total_objects)
 
 
 @performance_log
 async def get_cards_from_s3_and_cache(expected_filter_dict: dict) -> list[str]:
     """Get all report cards object from the S3 bucket that were successfully processed and cached"""
-    s3_objects = S3.list_all_s3_objects()
+    await AioS3.run(S3Index.refresh)
+    s3_objects = await AioS3.run(S3Index.list_objects, compile_root_dir_filter(expected_filter_dict))
     transformed_cards = transform_s3_objects_to_filter_dict(s3_objects)
     validated_cards_dict = validate_transformed_cards_w_filter_dict(transformed_cards, expected_filter_dict)
     validated_cards_list = list(validated_cards_dict.items())
@@ -40,6 +63,40 @@ async def get_cards_from_s3_and_cache(expected_filter_dict: dict) -> list[str]:
     return [card_date for card_date in results if card_date is not None]
 
 
+async def cache_s3_root_dirs(s3_root_dirs: list[str]) -> dict[str, str]:
+    """Cache only the cards of the given S3 report folders, e.g. the ones that just arrived.
+    Skips the bucket listing and filter validation of get_cards_from_s3_and_cache.
+    Returns {card_date: s3_root_dir} for every given folder that has a JSON report, cached before or now.
+    """
+    s3_root_dirs = list(dict.fromkeys(root_dir.rstrip("/") for root_dir in s3_root_dirs))
+    s3_objects = await AioS3.run(S3Index.list_dir_objects, s3_root_dirs)
+    transformed_cards = transform_s3_objects_to_filter_dict(s3_objects)
+    cards_dict = validate_transformed_cards_w_filter_dict(transformed_cards, {})
+    await asyncio.gather(*[process_card(card_tuple) for card_tuple in cards_dict.items()])
+    return {card_date: card_value["root_dir"] for card_date, card_value in cards_dict.items()}
+
+
+def compile_root_dir_filter(expected_filter_dict: dict) -> Callable[[str], bool]:
+    """Compile the filter into a check of the s3 root dirs, so only the matching report folders are read from the index.
+    'trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM' -> product, environment, protocol and day
+    """
+    is_invalid = compile_filter(expected_filter_dict)
+
+    def matches(s3_root_dir: str) -> bool:
+        path_parts = s3_root_dir.split("/")
+        if len(path_parts) < 6:
+            return False
+        root_dir_data = {
+            "product": path_parts[2],
+            "environment": path_parts[3],
+            "protocol": path_parts[4],
+            "day": path_parts[5],
+        }
+        return is_invalid(root_dir_data) is None
+
+    return matches
+
+
 def transform_s3_objects_to_filter_dict(s3_objects: list[dict]) -> list[dict]:
     """Process only JSON report objects from S3 bucket"""
     return [card for s3_object in s3_objects if (card := transform_s3_object_to_filter_dict(s3_object)) is not None]
@@ -66,7 +123,8 @@ def transform_s3_object_to_filter_dict(s3_object: dict) -> dict | None:
 
 def validate_transformed_cards_w_filter_dict(transformed_cards: list[dict], expected_filter_dict: dict) -> dict:
     """Validate the received S3 object filter data against expected filter data"""
-    validation_results = [(card, validate(card, expected_filter_dict)) for card in transformed_cards]
+    is_invalid = compile_filter(expected_filter_dict)
+    validation_results = [(card, is_invalid(card)) for card in transformed_cards]
     validated_cards = [card for card, error in validation_results if error is None]
 
     cards_pool = {}  # { "report_dir_date": { "json_report": {"object_name": "object_name_value"}, "html_report": "object_name_value", "root_dir": "" }}
@@ -91,9 +149,6 @@ async def process_card(card_tuple: tuple[str, dict]) -> str | None:
     """
     import instances
 
-    redis: redis_module.RedisClient = instances.redis
-    redis_client: _redis.StrictRedis = instances.redis.redis_client
-
     card_date, card_value = card_tuple
     protocol = card_value["filter_data"].get("protocol")
     try:
@@ -104,12 +159,22 @@ async def process_card(card_tuple: tuple[str, dict]) -> str | None:
             return None
         reports_cache_key = f"{test_reports_redis_key}:{environment}:{protocol}"  # e.g. trading-apps-reports:qa:ui
 
-        if not redis_client.hexists(reports_cache_key, card_date):
-            j_report = json.loads(S3.get_a_s3_object(object_name))
+        if not await instances.aioredis.hexists(reports_cache_key, card_date):
+            j_report = json.loads(await AioS3.get_a_s3_object(object_name))
             j_report = process_json(j_report, card_date)
             card_value["json_report"] = j_report
             logger.info(f"Caching card in Redis for protocol: {protocol} [{card_date}]")
-            redis.create_card_cache(reports_cache_key, card_date, json.dumps(card_value))
+            run_time = parse_card_day_to_unix(card_date)
+            if run_time is None:
+                logger.warning(f"Card date in an unknown format, the card won't be listed by /cards [{card_date}]")
+            await instances.aioredis.create_card_cache(
+                reports_cache_key,
+                card_date,
+                json.dumps(build_card_summary(card_value)),
+                product=card_value["filter_data"].get("product"),
+                run_time=run_time,
+                card_detail_value=json.dumps(card_value),
+            )
             return card_date
         return None
 
@@ -118,6 +183,42 @@ async def process_card(card_tuple: tuple[str, dict]) -> str | None:
         return None
 
 
+def build_card_summary(card_value: dict) -> dict:
+    """Build the compact card record the cards grid renders: filter data, root dir and the normalized stats.
+    The full processed report is cached separately as the card detail record.
+    """
+    json_report = card_value.get("json_report", {})
+    stats = json_report.get("stats", {})
+    summary_report = {"stats": {key: stats[key] for key in CARD_SUMMARY_STATS_KEYS if key in stats}}
+    if "ci" in json_report:
+        summary_report["ci"] = json_report["ci"]
+    return {
+        "filter_data": card_value.get("filter_data", {}),
+        "json_report": summary_report,
+        "root_dir": card_value.get("root_dir", ""),
+    }
+
+
+def split_cached_card_details(cards_cache_keys: list[str]) -> int:
+    """Move full cards cached before the summary/detail split to the detail hashes and keep only their summaries.
+    Returns the number of cards split.
+    """
+    import instances
+
+    redis: redis_module.RedisClient = instances.redis
+    split = 0
+    for cards_cache_key in cards_cache_keys:
+        for card_cache_field, card_cache_value in redis.redis_client.hscan_iter(cards_cache_key, count=500):
+            card_value = json.loads(redis.decode_cards([card_cache_value])[0])
+            summary = build_card_summary(card_value)
+            if summary == card_value:
+                continue
+            redis.replace_card_cache(cards_cache_key, card_cache_field, json.dumps(summary), json.dumps(card_value))
+            split += 1
+    logger.info(f"Split {split} cached cards into summary and detail records")
+    return split
+
+
 def identify_runner(json_report: dict, card_date: str) -> str:
     """Identify the test runner from the JSON report structure. Must not use stats key as it is common across runners."""
     keys = list(json_report.keys())
@@ -199,25 +300,35 @@ def find_s3_report_dir_objects(card_date_folder: str, bucket_name=aws_bucket_nam
     """
     Given a root_dir path for a folder in an S3 bucket, find all
     the objects inside root_dir and return a list of object keys if
-    the folder exists in the S3 bucket.
+    the folder exists in the S3 bucket. A bare report day folder is
+    resolved to its root_dir through the S3 listing index.
     """
-    s3_objects = S3.list_all_s3_objects(bucket_name)
-    folder = []
-    for obj in s3_objects:
-        object_key = obj["Key"]
-        if card_date_folder in object_key:
-            folder.append(object_key)
+    root_dir = S3Index.resolve_root_dir(card_date_folder)
+    if root_dir is None:
+        S3Index.refresh()
+        root_dir = S3Index.resolve_root_dir(card_date_folder)
+    if root_dir is None:
+        logger.warning(f"Report folder [{card_date_folder}] not found in the S3 listing index")
+        return []
 
+    manifest_key = (bucket_name, root_dir)
+    folder = folder_manifests.get(manifest_key)
+    if folder is None:
+        folder = [obj["Key"] for obj in S3.list_s3_objects_with_prefix(f"{root_dir}/", bucket_name)]
+        if folder:
+            folder_manifests.set(manifest_key, folder)
     return folder
 
 
-def download_s3_folder(card_date_folder: str, bucket_name=aws_bucket_name, rate_limit=0) -> str:
+async def download_s3_folder(
+    card_date_folder: str, bucket_name=aws_bucket_name, on_progress: Callable[[int, int], None] | None = None
+) -> str:
     """
     Given a root_dir path for a folder in an S3 bucket, download all
     the objects inside root_dir to local, maintaining the same folder
-    structure as in S3 bucket.
+    structure as in S3 bucket. `on_progress(files_done, files_total)` is called after each downloaded object.
     """
-    s3_card_objects = find_s3_report_dir_objects(card_date_folder, bucket_name)
+    s3_card_objects = await AioS3.run(find_s3_report_dir_objects, card_date_folder, bucket_name)
     _card_date_folder = card_date_folder.split("/")[-1]  # noqa: E201 Get the test report main dir portion from the path parts. e.g. 'trading-apps/test_reports/api/12-31-2025_08-30-00_AM' -> '12-31-2025_08-30-00_AM'
 
     def create_local_report_dir(relative_path: str) -> str:
@@ -230,34 +341,44 @@ def download_s3_folder(card_date_folder: str, bucket_name=aws_bucket_name, rate_
         ensure_dir(local_report_sub_dir_path, True)
         return local_report_dir_rel_path
 
-    for i in range(0, len(s3_card_objects), rate_limit_file_batch_size):
-        object_batch = s3_card_objects[i : i + rate_limit_file_batch_size]
-        for object_key in object_batch:
-            # Transform the S3 object key into a local relative path by removing the s3_root_dir prefix and any leading slash.
-            # For example, 'trading-apps/test_reports/api/12-31-2025_08-30-00_AM/some_folder/some_file.ext'
-            # becomes 'some_folder/some_file.ext' for local storage.
-            date_index = object_key.find(_card_date_folder)  # Find the index of the date folder in the object key
-            if date_index != -1:
-                # Extract everything after the date folder (e.g., 'index.html', 'subfolder/file.json')
-                relative_path_parts = object_key[date_index + len(_card_date_folder) :].lstrip("/")
-                local_report_card_dir_rel_path = create_local_report_dir(relative_path_parts)
-                S3.download_file(object_key, local_report_card_dir_rel_path, bucket_name)
-
-            if rate_limit > 0:
-                logger.info(
-                    f"S3 download folder batch {i // rate_limit_file_batch_size + 1} completed. Waiting for {rate_limit} seconds to avoid rate limiting."
-                )
-                time.sleep(rate_limit)
+    files_done = 0
+
+    async def download_object(object_key: str) -> None:
+        nonlocal files_done
+        # Transform the S3 object key into a local relative path by removing the s3_root_dir prefix and any leading slash.
+        # For example, 'trading-apps/test_reports/api/12-31-2025_08-30-00_AM/some_folder/some_file.ext'
+        # becomes 'some_folder/some_file.ext' for local storage.
+        date_index = object_key.find(_card_date_folder)  # Find the index of the date folder in the object key
+        if date_index != -1:
+            # Extract everything after the date folder (e.g., 'index.html', 'subfolder/file.json')
+            relative_path_parts = object_key[date_index + len(_card_date_folder) :].lstrip("/")
+            local_report_card_dir_rel_path = create_local_report_dir(relative_path_parts)
+            await AioS3.download_file(object_key, local_report_card_dir_rel_path, bucket_name)
+        if on_progress:
+            files_done += 1
+            on_progress(files_done, len(s3_card_objects))
+
+    # Objects are downloaded concurrently. AioS3's shared rate limiter and semaphore pace the S3 requests.
+    await asyncio.gather(*[download_object(object_key) for object_key in s3_card_objects])
     logger.info(f"All objects from [{card_date_folder}] in S3 bucket have been downloaded locally.")
     return _card_date_folder
 
 
-def get_cards_from_cache(expected_filter_data: dict) -> list[dict]:
-    """Get the cards from the memory. If the memorty data doesn't match, fetch the cards from the cache"""
+async def get_cards_from_cache(expected_filter_data: dict) -> list[dict]:
+    """Get the cards matching the filter from the Redis cache, newest first"""
+    return [json.loads(value) for value in await get_card_values_from_cache(expected_filter_data)]
+
+
+async def get_card_values_from_cache(expected_filter_data: dict) -> list[bytes]:
+    """Get the JSON bytes of the cards matching the filter from the Redis cache, newest first.
+    The run time sorted sets select the matching cards for the day range, then only those cards are fetched.
+    """
     import instances
 
+    aioredis = instances.aioredis
     environment = expected_filter_data.get("environment")
     protocol = expected_filter_data.get("protocol")
+    product = expected_filter_data.get("product", "all")
     day = int(expected_filter_data.get("day", 1))
 
     if not environment or not protocol:
@@ -268,39 +389,38 @@ def get_cards_from_cache(expected_filter_data: dict) -> list[dict]:
 
     envs_to_check = test_environments if environment == "all" else [environment]
     protocols_to_check = test_protocols if protocol == "all" else [protocol]
-    filtered_cards: list[dict] = []
-
-    redis = instances.redis
-
-    # Iterate through all environment and protocol combinations
-    for env in envs_to_check:
-        for proto in protocols_to_check:
-            reports_cache_key = f"{test_reports_redis_key}:{env}:{proto}"  # e.g. trading-apps-reports:qa:ui
-
-            cached_cards = redis.get_all_cached_cards(reports_cache_key)
-            if cached_cards and isinstance(cached_cards, dict):
-                for _, received_card_data in cached_cards.items():
-                    received_card_data = json.loads(received_card_data)
-                    received_filter_data = received_card_data.get("filter_data")
-                    error = validate(received_filter_data, expected_filter_data)
-                    if error:
-                        continue
-                    filtered_cards.append(received_card_data)
+    products_to_check = await aioredis.smembers(test_reports_products_redis_key) if product == "all" else [product]
+
+    reports_cache_keys = [
+        f"{test_reports_redis_key}:{env}:{proto}" for env in envs_to_check for proto in protocols_to_check
+    ]  # e.g. trading-apps-reports:qa:ui
+    time_index_keys = [
+        (reports_cache_key, redis_module.RedisClient.card_time_index_key(reports_cache_key, _product))
+        for reports_cache_key in reports_cache_keys
+        for _product in products_to_check
+    ]  # e.g. (trading-apps-reports:qa:ui, trading-apps-reports:qa:ui:loan:by-time)
+
+    # 1st round trip: card dates in the day range from every env/protocol/product sorted set
+    min_run_time = get_unix_time() - day * 86400
+    time_index_results = await aioredis.zrangebyscore_many([key for _, key in time_index_keys], min_run_time)
+    fields_by_key: dict[str, list] = {}
+    run_times: dict[tuple[str, bytes], float] = {}
+    for (reports_cache_key, _), members in zip(time_index_keys, time_index_results):
+        for card_date, run_time in members:
+            fields_by_key.setdefault(reports_cache_key, []).append(card_date)
+            run_times[(reports_cache_key, card_date)] = run_time
+
+    # 2nd round trip: only the matching cards from the env/protocol cache hashes
+    cards_values = await aioredis.get_card_values(fields_by_key)
+    ranked_cards: list[tuple[float, bytes]] = []
+    for (reports_cache_key, card_dates), values in zip(fields_by_key.items(), cards_values):
+        for card_date, value in zip(card_dates, values):
+            if value is None:
+                continue  # card was removed from the hash cache
+            ranked_cards.append((run_times[(reports_cache_key, card_date)], value))
+
+    ranked_cards.sort(key=lambda ranked_card: ranked_card[0], reverse=True)
     logger.info(
-        f"Fetched total {len(filtered_cards)} cards from cache. env: {environment} | day: {day} | protocols: {protocols_to_check}"
+        f"Fetched total {len(ranked_cards)} cards from cache. env: {environment} | day: {day} | protocols: {protocols_to_check}"
     )
-
-    def card_sort_key(card: dict) -> float:
-        filter_data = card.get("filter_data", {})
-        day = filter_data.get("day")
-        if not day:
-            logger.info(f"Card with missing day field in filter_data: {filter_data}. Assigning sort key as 0.")
-            raise ValueError(f"Card with missing day field in filter_data: {filter_data}")
-        ts = parse_card_day_to_unix(day)
-        if ts is None:
-            logger.info(f"parse_card_day_to_unix returned None for day: {day}.")
-            raise ValueError(f"Unable to parse day field to timestamp: {day}")
-        return ts
-
-    sorted_cards = sorted(filtered_cards, key=card_sort_key, reverse=True)
-    return sorted_cards
+    return [card for _, card in ranked_cards]
@@ -5,7 +5,7 @@ import shutil
 
 from src.utils.env_loader import local_dir
 from src.utils.executor import is_port_open, open_port_on_local, run_a_command_on_local
-from src.utils.date import less_or_eqaul_to_date_time
+from src.services.validation import compile_day_check
 from src.utils.logger import logger
 from config import test_reports_dir
 
@@ -22,6 +22,11 @@ def local_report_directories():
     return card_directories
 
 
+def remove_local_report_directory(card_dir: str) -> None:
+    """remove a local report directory, e.g. the partial folder of a failed download"""
+    shutil.rmtree(os.path.join(report_cards_path, card_dir), ignore_errors=True)
+
+
 def format_local_dir_filter_data(card_dir):
     """Process only JSON report objects from S3 bucket"""
     # object_name = obj["Key"]
@@ -46,10 +51,11 @@ def get_all_local_cards(expected_filter: dict) -> dict:
     local_report_dirs = local_report_directories()
     formatted_cards_filter_data = list(filter(None, map(format_local_dir_filter_data, local_report_dirs)))
     final_cards_pool = {}
+    day = int(expected_filter.get("day", ""))
+    is_within_day_range = compile_day_check(day)
 
     for received_card_filter in formatted_cards_filter_data:
-        day = int(expected_filter.get("day", ""))
-        if not less_or_eqaul_to_date_time(received_card_filter["day"], day):
+        if not is_within_day_range(received_card_filter["day"]):
             continue
 
         report_dir_date = received_card_filter["day"]
@@ -121,7 +127,7 @@ async def view_a_report_on_local(root_dir):
         await open_port_on_local(int(reporter_port))
 
         wait_for_port_readiness_task = asyncio.create_task(wait_for_local_report_to_be_ready(root_dir))
-        asyncio.create_task(run_a_command_on_local(command))
+        asyncio.create_task(run_a_command_on_local(command, bounded=False))  # long running report server
 
         await wait_for_port_readiness_task
 
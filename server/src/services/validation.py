@@ -1,5 +1,9 @@
+from datetime import datetime, timedelta
+from typing import Callable, Optional
 from src.utils.logger import logger
-from src.utils.date import less_or_eqaul_to_date_time
+from src.utils.date import less_or_eqaul_to_date_time, parse_report_date
+
+FilterPredicate = Callable[[dict], Optional[str]]
 
 
 def build_validation_rules():
@@ -35,20 +39,53 @@ def validate_field(received_value, expected_value, validations):
     return None
 
 
+def compile_day_check(expected_value) -> Callable[[str], bool]:
+    """Return a check equivalent to less_or_eqaul_to_date_time with the cutoff date computed once"""
+    try:
+        cutoff = datetime.now() - timedelta(days=int(expected_value))
+    except (TypeError, ValueError):
+        return lambda received_value: False
+
+    def is_valid(received_value) -> bool:
+        date_time = parse_report_date(received_value)
+        return date_time is not None and date_time >= cutoff
+
+    return is_valid
+
+
+def compile_field_check(expected_key: str, expected_value) -> Callable[[object], bool]:
+    if expected_key == "day":
+        return compile_day_check(expected_value)
+    if expected_key not in build_validation_rules():
+        raise KeyError(expected_key)
+    if expected_value == "all":
+        return lambda received_value: True
+    return lambda received_value: received_value == expected_value
+
+
+def compile_filter(expected_data: dict) -> FilterPredicate:
+    """Compile the filter's expected_data into a single predicate to run against many cards.
+    The validation rules are resolved and the `day` cutoff is computed once per filter instead of once per card.
+    The predicate returns the same Error as validate if the received_data does not match, otherwise None"""
+    checks = [
+        (expected_key, expected_value, compile_field_check(expected_key, expected_value))
+        for expected_key, expected_value in expected_data.items()
+        if expected_key != "mode"
+    ]
+
+    def predicate(received_data: dict) -> Optional[str]:
+        for expected_key, expected_value, is_valid in checks:
+            received_value = received_data.get(expected_key)
+            if not is_valid(received_value):
+                logger.debug(f"Validation failed, received: {received_value} | expected: {expected_value}")
+                return f"Expected: {expected_value}, Received: {received_value}"
+        return None
+
+    return predicate
+
+
 def validate(received_data, expected_data):
     """Validate the received_data based on the filter's expected_data value.
-    Return Error if the received_data does not match the expected_data values, otherwise None"""
-    validation_rules = build_validation_rules()
-    for (
-        expected_key,
-        expected_value,
-    ) in expected_data.items():
-        # logger.info(f"expected_key: {expected_key} | expected_value: {expected_value}")
-        if expected_key == "mode":
-            continue
-        received_value = received_data.get(expected_key)  # "qa", "clo", "api"
-        validations = validation_rules[expected_key]  # [{'is_valid': <function is_valid>}]
-        error = validate_field(received_value, expected_value, validations)
-        if error:
-            return error
-    return None
+    Return Error if the received_data does not match the expected_data values, otherwise None.
+    Use compile_filter when validating many cards against the same filter."""
+    return compile_filter(expected_data)(received_data)
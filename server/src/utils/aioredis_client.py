@@ -1,7 +1,10 @@
 import redis.asyncio as aioredis
-from redis.asyncio.client import PubSub
 import json
 from src.utils.logger import logger
+from src.utils.queue import get_operation_data, get_operation_key, get_operation_ttl
+from src.utils.card_codec import CardCodec, CardsCodec
+from src.utils.redis_client import RedisClient
+from src.utils.redis_pool import create_async_pool, pool_stats
 
 
 class AioRedis:
@@ -9,20 +12,33 @@ class AioRedis:
 
     aioredis_client: aioredis.Redis | None
     redis_url: str
-    aioredis_instance_key: str = config.aioredis_instance_key
 
     def __init__(self, redis_url: str) -> None:
         self.aioredis_client = None
         self.redis_url = redis_url
+        self.pool: aioredis.BlockingConnectionPool | None = None
+        self.blocking_client: aioredis.Redis | None = None
+        self.blocking_pool: aioredis.BlockingConnectionPool | None = None  # blocking reads, apart from commands
 
     async def get_client(self) -> aioredis.Redis:
         if self.aioredis_client:
             return self.aioredis_client
-        aioredis_client = await aioredis.from_url(self.redis_url)
-        self.aioredis_client = aioredis_client
-        aioredis_instance = await aioredis_client.incr(self.aioredis_instance_key, 1)
-        logger.info(f"Connected to AioRedis at {self.redis_url}. Connected clients count: {aioredis_instance}")
-        return aioredis_client
+        self.pool = create_async_pool(self.redis_url, self.config.aioredis_max_connections)
+        self.aioredis_client = aioredis.Redis(connection_pool=self.pool)
+        logger.info(f"Connected to AioRedis at {self.redis_url}. Pool size: {self.config.aioredis_max_connections}")
+        return self.aioredis_client
+
+    async def get_blocking_client(self) -> aioredis.Redis:
+        """Client of the blocking reads (XREAD/BLMOVE with a timeout). They hold their connection while they wait,
+        so they use their own pool and never starve the commands of the request handlers."""
+        if self.blocking_client:
+            return self.blocking_client
+        self.blocking_pool = create_async_pool(self.redis_url, self.config.redis_blocking_max_connections)
+        self.blocking_client = aioredis.Redis(connection_pool=self.blocking_pool)
+        return self.blocking_client
+
+    def pool_stats(self) -> dict:
+        return {"commands": pool_stats(self.pool), "blocking": pool_stats(self.blocking_pool)}
 
     async def get(self, key: str, decode: bool = True) -> str | bytes | None:
         # SCAN can return keys as bytes; normalize before issuing GET.
@@ -37,16 +53,285 @@ class AioRedis:
             value = value.decode("utf-8")
         return value
 
+    async def set(self, key: str, value, ex: int | None = None, nx: bool = False) -> bool:
+        client = await self.get_client()
+        return bool(await client.set(key, value, ex=ex, nx=nx))
+
+    async def delete(self, *keys: str) -> int:
+        if not keys:
+            return 0
+        client = await self.get_client()
+        return await client.delete(*keys)
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        client = await self.get_client()
+        return await client.incr(key, amount)
+
+    async def increment_key(self, key: str, increment: int = 1, expire_day: int | None = None) -> int:
+        client = await self.get_client()
+        new_value = await client.incr(key, increment)
+        if expire_day:
+            await client.expire(key, RedisClient.seconds_until_midnight(expire_day))
+        return new_value
+
+    async def decrement_key(self, key: str) -> int:
+        client = await self.get_client()
+        return await client.decr(key, 1)
+
+    async def scan_keys(self, pattern: str, count: int = 100, _type: str | None = None) -> list[str]:
+        """All the keys matching the pattern, SCANned in batches of `count` so Redis is never blocked"""
+        client = await self.get_client()
+        keys = []
+        async for key in client.scan_iter(match=pattern, count=count, _type=_type):
+            keys.append(key.decode("utf-8") if isinstance(key, bytes) else key)
+        return keys
+
+    async def hget(self, key: str, field: str) -> bytes | None:
+        client = await self.get_client()
+        return await client.hget(key, field)
+
+    async def hexists(self, key: str, field: str) -> bool:
+        client = await self.get_client()
+        return bool(await client.hexists(key, field))
+
+    async def get_all_set_items(self, key: str) -> list[str]:
+        return await self.smembers(key)
+
+    async def has_it_been_cached(self, key: str, value: str) -> bool:
+        client = await self.get_client()
+        used = await client.lpos(key, value) is not None
+        logger.info(f"Checking if {key} value: {value} has been used: {used}")
+        return used
+
+    async def it_has_been_cached(self, key: str, value: str) -> None:
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            pipeline.lpush(key, value)
+            pipeline.expire(key, RedisClient.seconds_until_midnight(self.config.redis_cache_ttl))
+            await pipeline.execute()
+
+    async def card_codec(self) -> CardCodec:
+        if CardsCodec.is_stale():
+            await self.load_card_codec()
+        return CardsCodec
+
+    async def load_card_codec(self) -> None:
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            pipeline.hgetall(CardsCodec.dictionaries_key)
+            pipeline.get(CardsCodec.current_key)
+            CardsCodec.load(*await pipeline.execute())
+
+    async def decode_cards(self, values: list) -> list[bytes | None]:
+        """JSON bytes of cached card values, encoded or legacy. Dictionaries trained meanwhile are loaded first."""
+        codec = await self.card_codec()
+        if codec.unknown_dictionaries(values):
+            await self.load_card_codec()
+        return [None if value is None else codec.decode(value) for value in values]
+
+    async def get_card_value(self, cards_cache_key: str, card_cache_field: str) -> bytes | None:
+        """JSON bytes of a cached card, None if it is not cached"""
+        return (await self.decode_cards([await self.hget(cards_cache_key, card_cache_field)]))[0]
+
+    async def get_card_values(self, fields_by_key: dict[str, list]) -> list[list[bytes | None]]:
+        """JSON bytes of the given cards of several cards cache hashes, fetched in a single round trip"""
+        values_by_key = await self.hmget_many(fields_by_key)
+        decoded = await self.decode_cards([value for values in values_by_key for value in values])
+        result, start = [], 0
+        for values in values_by_key:
+            result.append(decoded[start : start + len(values)])
+            start += len(values)
+        return result
+
+    async def get_a_cached_card(self, cards_cache_key: str, card_cache_field: str) -> dict | None:
+        value = await self.get_card_value(cards_cache_key, card_cache_field)
+        return json.loads(value) if value else None
+
+    async def get_all_cached_cards(self, cards_cache_key: str) -> dict:
+        """{card date: card JSON bytes} of a cards cache hash, decoded from the card codec"""
+        client = await self.get_client()
+        result = await client.hgetall(cards_cache_key)
+        return dict(zip(result.keys(), await self.decode_cards(list(result.values()))))
+
+    async def create_card_cache(
+        self,
+        cards_cache_key: str,
+        card_cache_field: str,
+        card_cache_value: str,
+        product: str | None = None,
+        run_time: float | None = None,
+        card_detail_value: str | None = None,
+    ) -> bool:
+        """Async counterpart of RedisClient.create_card_cache. Returns False if the card was already cached."""
+        client = await self.get_client()
+        codec = await self.card_codec()
+        if not await client.hsetnx(cards_cache_key, card_cache_field, codec.encode(card_cache_value)):
+            return False
+        async with client.pipeline(transaction=False) as pipeline:
+            pipeline.sadd(self.config.test_reports_cached_redis_key, card_cache_field)
+            if card_detail_value is not None:
+                detail_value = codec.encode(card_detail_value)
+                pipeline.hset(RedisClient.card_details_key(cards_cache_key), card_cache_field, detail_value)
+            if product and run_time is not None:
+                RedisClient.pipeline_card_time_index(
+                    pipeline, cards_cache_key, card_cache_field, product, run_time, self.config.redis_cache_ttl
+                )
+                pipeline.sadd(self.config.test_reports_products_redis_key, product)
+            pipeline.incr(self.config.cards_cache_version_key)
+            await pipeline.execute()
+        logger.info(f"Cached: {card_cache_field}")
+        return True
+
+    async def replace_card_cache(
+        self, cards_cache_key: str, card_cache_field: str, card_cache_value: str, card_detail_value: str
+    ) -> None:
+        client = await self.get_client()
+        codec = await self.card_codec()
+        async with client.pipeline() as pipeline:
+            pipeline.hset(
+                RedisClient.card_details_key(cards_cache_key), card_cache_field, codec.encode(card_detail_value)
+            )
+            pipeline.hset(cards_cache_key, card_cache_field, codec.encode(card_cache_value))
+            await pipeline.execute()
+
+    async def hgetall_many(self, keys: list[str]) -> list[dict]:
+        """HGETALL several hashes in a single round trip using a non-transactional pipeline"""
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                pipeline.hgetall(key)
+            return await pipeline.execute()
+
+    async def smembers(self, key: str) -> list[str]:
+        client = await self.get_client()
+        members = await client.smembers(key)
+        return [member.decode("utf-8") if isinstance(member, bytes) else member for member in members]
+
+    async def zrangebyscore_many(self, keys: list[str], min_score: float, max_score: float | str = "+inf") -> list:
+        """ZRANGEBYSCORE (with scores) several sorted sets in a single round trip"""
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            for key in keys:
+                pipeline.zrangebyscore(key, min_score, max_score, withscores=True)
+            return await pipeline.execute()
+
+    async def hmget_many(self, fields_by_key: dict[str, list]) -> list[list]:
+        """HMGET the given fields of several hashes in a single round trip"""
+        client = await self.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            for key, fields in fields_by_key.items():
+                pipeline.hmget(key, fields)
+            return await pipeline.execute()
+
+    async def refresh_redis_client_metrics(self) -> tuple[int, int, int]:
+        """Async counterpart of RedisClient.refresh_redis_client_metrics, counts a newly connected app client"""
+        lifetime_do_client_count = await self.increment_key(self.config.do_lifetime_clients_count_key)
+        logger.info(f"DO lifetime clients count - {lifetime_do_client_count}")
+
+        active_clients_count = await self.increment_key(self.config.do_current_clients_count_key)
+        logger.info(f"DO current clients count - {active_clients_count}")
+
+        max_active_clients = await self.get(self.config.do_max_concurrent_clients_key)
+        max_active_clients_count = 0 if not max_active_clients else int(str(max_active_clients))
+        if active_clients_count > max_active_clients_count:
+            await self.set(self.config.do_max_concurrent_clients_key, active_clients_count)
+            logger.info(f"DO max active clients count - {max_active_clients_count}")
+        return active_clients_count, max_active_clients_count, lifetime_do_client_count
+
+    # Async counterparts of the src/utils/queue.py operation markers, for request handlers and other async code
+
+    async def is_operation_in_progress(self, operation: str, identifier: str) -> bool:
+        client = await self.get_client()
+        return bool(await client.exists(get_operation_key(operation, identifier)))
+
+    async def mark_operation(
+        self, operation: str, identifier: str, metadata: dict | None = None, ttl: int | None = None
+    ) -> bool:
+        """Mark an operation as in-progress with SET NX. False if it is already in-progress or on error."""
+        try:
+            client = await self.get_client()
+            was_set = await client.set(
+                get_operation_key(operation, identifier),
+                get_operation_data(operation, metadata),
+                nx=True,
+                ex=get_operation_ttl(operation, ttl),
+            )
+            if not was_set:
+                logger.info(f"Operation already in-progress: {operation}/{identifier}")
+            return bool(was_set)
+        except Exception as e:
+            logger.error(f"Failed to mark {operation}/{identifier} as in-progress: {e}")
+            return False
+
+    async def mark_operations(
+        self, operation: str, identifiers: list[str], metadata: dict | None = None, ttl: int | None = None
+    ) -> list[bool]:
+        """Mark many operations as in-progress in one pipeline. Returns whether each one was acquired."""
+        if not identifiers:
+            return []
+        try:
+            client = await self.get_client()
+            data = get_operation_data(operation, metadata)
+            effective_ttl = get_operation_ttl(operation, ttl)
+            async with client.pipeline(transaction=False) as pipeline:
+                for identifier in identifiers:
+                    pipeline.set(get_operation_key(operation, identifier), data, nx=True, ex=effective_ttl)
+                return [bool(was_set) for was_set in await pipeline.execute()]
+        except Exception as e:
+            logger.error(f"Failed to mark {len(identifiers)} {operation} operations as in-progress: {e}")
+            return [False] * len(identifiers)
+
+    async def unmark_operation(self, operation: str, identifier: str) -> bool:
+        try:
+            client = await self.get_client()
+            await client.delete(get_operation_key(operation, identifier))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to unmark {operation}/{identifier}: {e}")
+            return False
+
+    async def extend_operation(self, operation: str, identifier: str, ttl: int) -> bool:
+        """Push the expiry of an in-progress operation forward, e.g. while a long download is still running"""
+        client = await self.get_client()
+        return bool(await client.expire(get_operation_key(operation, identifier), ttl))
+
+    async def get_operation_status(self, operation: str, identifier: str) -> dict | None:
+        try:
+            value = await self.get(get_operation_key(operation, identifier))
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.error(f"Failed to get status for {operation}/{identifier}: {e}")
+            return None
+
+    async def is_downloading(self, card_date: str) -> bool:
+        return await self.is_operation_in_progress("download", card_date)
+
+    async def mark_downloads(
+        self, card_dates: list[str], metadata: dict | None = None, ttl: int | None = None
+    ) -> list[bool]:
+        return await self.mark_operations("download", card_dates, metadata=metadata, ttl=ttl)
+
+    async def unmark_downloading(self, card_date: str) -> bool:
+        return await self.unmark_operation("download", card_date)
+
+    async def is_cache_reloading(self) -> bool:
+        return await self.is_operation_in_progress("cache-reload", "reload")
+
     async def close(self) -> None:
-        if self.aioredis_client:
-            await self.aioredis_client.decr(self.aioredis_instance_key, 1)
+        if self.aioredis_client or self.blocking_client:
             try:
-                await self.aioredis_client.aclose()
-                self.aioredis_client = None
+                for client in (self.aioredis_client, self.blocking_client):
+                    if client:
+                        await client.aclose()
+                for pool in (self.pool, self.blocking_pool):
+                    if pool:
+                        await pool.disconnect()
                 logger.info("Successfully closed AioRedis connection.")
             except Exception as e:
                 logger.error(f"Error closing AioRedis connection: {str(e)}")
-                self.aioredis_client = None  # Still set client to None to avoid reusing a potentially broken connection
+            # Still drop the clients and pools to avoid reusing a potentially broken connection
+            self.aioredis_client, self.pool = None, None
+            self.blocking_client, self.blocking_pool = None, None
 
     async def ping(self) -> bool:
         client = await self.get_client()
@@ -65,7 +350,33 @@ class AioRedis:
         client = await self.get_client()
         return await client.publish(channel, message)
 
-    async def pubsub(self) -> PubSub:
-        """Get a Redis PubSub instance"""
+    async def publish_notification(self, message: str | dict) -> str:
+        """Append a notification to the capped notifications stream, read by every worker's broadcaster with XREAD.
+        Returns the stream entry id, sent to the SSE clients as the event id."""
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        client = await self.get_client()
+        event_id = await client.xadd(
+            self.config.notifications_stream_key,
+            {"data": message},
+            maxlen=self.config.notifications_stream_maxlen,
+            approximate=True,
+        )
+        return event_id.decode("utf-8") if isinstance(event_id, bytes) else event_id
+
+    async def read_notifications(self, last_id: str, count: int, block: int | None = None) -> list[tuple[str, str]]:
+        """Return the (event id, data) notifications appended to the stream after last_id.
+        Waits up to `block` milliseconds for new ones if given."""
+        client = await self.get_blocking_client() if block is not None else await self.get_client()
+        response = await client.xread({self.config.notifications_stream_key: last_id}, count=count, block=block)
+        return [
+            (event_id.decode("utf-8"), fields[b"data"].decode("utf-8"))
+            for _, entries in response or []
+            for event_id, fields in entries
+        ]
+
+    async def last_notification_id(self) -> str:
+        """Return the id of the latest notification in the stream, or '0-0' if the stream is empty"""
         client = await self.get_client()
-        return client.pubsub()
+        entries = await client.xrevrange(self.config.notifications_stream_key, count=1)
+        return entries[0][0].decode("utf-8") if entries else "0-0"
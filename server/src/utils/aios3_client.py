@@ -0,0 +1,89 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from botocore.exceptions import ClientError
+from src.utils.rate_limiter import AdaptiveRateLimiter
+from src.utils.s3_client import S3, S3Client, aws_bucket_name
+from src.utils.logger import logger
+
+THROTTLE_ERROR_CODES = {"SlowDown", "503", "ServiceUnavailable", "Throttling", "RequestLimitExceeded"}
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """Return True if the error is S3 asking the client to slow down"""
+    if not isinstance(error, ClientError):
+        return False
+    code = error.response.get("Error", {}).get("Code", "")
+    status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    return code in THROTTLE_ERROR_CODES or status == 503
+
+
+class AioS3Client:
+    """Async S3 client for the card pipeline. Blocking boto3 calls are offloaded to a bounded thread pool
+    sized like the botocore connection pool, and a semaphore caps the in-flight S3 requests per process.
+    Single S3 requests also go through a shared adaptive rate limiter that backs off when S3 throttles."""
+
+    import config
+
+    s3_client: S3Client
+    executor: ThreadPoolExecutor
+    max_concurrency: int = config.s3_max_concurrency
+    max_throttle_retries: int = config.s3_throttle_max_retries
+
+    def __init__(self, s3_client: S3Client, max_pool_connections: int = config.s3_max_pool_connections) -> None:
+        self.s3_client = s3_client
+        self.executor = ThreadPoolExecutor(max_workers=max_pool_connections, thread_name_prefix="aios3")
+        self.semaphores: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+        self.rate_limiter = AdaptiveRateLimiter(
+            rate=self.config.s3_rate_limit_per_second,
+            burst=self.config.s3_rate_limit_burst,
+            min_rate=self.config.s3_rate_limit_min_per_second,
+        )
+
+    def get_semaphore(self) -> asyncio.Semaphore:
+        """Semaphores are bound to the event loop they are first used on, keep one per loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.semaphores[loop] = semaphore
+        return semaphore
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking S3 (or S3 index) call on the bounded S3 thread pool"""
+        async with self.get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    async def request(self, func, *args, **kwargs):
+        """Run a single rate limited S3 request. Throttled requests are retried with jittered backoff."""
+        for attempt in range(self.max_throttle_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                result = await self.run(func, *args, **kwargs)
+                self.rate_limiter.on_success()
+                return result
+            except ClientError as error:
+                if not is_throttle_error(error) or attempt == self.max_throttle_retries:
+                    raise
+                self.rate_limiter.on_throttle()
+                backoff = min(10, 0.25 * 2**attempt) * random.uniform(0.5, 1.5)
+                logger.info(f"S3 throttled {getattr(func, '__name__', func)}. Retry #{attempt + 1} in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+
+    async def get_a_s3_object(self, object_name: str, bucket_name=aws_bucket_name) -> bytes:
+        return await self.request(self.s3_client.get_a_s3_object, object_name, bucket_name)
+
+    async def list_s3_objects_with_prefix(self, prefix: str, bucket_name=aws_bucket_name) -> list:
+        return await self.request(self.s3_client.list_s3_objects_with_prefix, prefix, bucket_name)
+
+    async def download_file(self, object_key: str, local_path: str, bucket_name=aws_bucket_name) -> None:
+        await self.request(self.s3_client.download_file, object_key, local_path, bucket_name)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("AioS3 executor shut down")
+
+
+AioS3 = AioS3Client(S3)
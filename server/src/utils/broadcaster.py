@@ -0,0 +1,86 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from config import notifications_client_queue_size, notifications_stream_maxlen
+from src.utils.logger import logger
+
+Notification = tuple[str, str]  # (stream event id, JSON data)
+
+
+def stream_id_key(event_id: str) -> tuple[int, int]:
+    """Sortable key of a Redis Stream entry id. '1700000000000-1' -> (1700000000000, 1)"""
+    milliseconds, _, sequence = event_id.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+def is_stream_id(event_id: str | None) -> bool:
+    try:
+        stream_id_key(event_id or "")
+        return True
+    except ValueError:
+        return False
+
+
+class Broadcaster:
+    """Per-worker fan-out of the notifications stream. A single reader pushes every (event id, data) notification
+    to the bounded queue of each local subscriber (SSE client, cache listener). When a slow subscriber's queue is full,
+    its oldest notification is dropped so it can never block the others or grow without bound."""
+
+    def __init__(self, queue_size: int = notifications_client_queue_size, block: int = 5000) -> None:
+        self.queue_size = queue_size
+        self.block = block  # milliseconds each XREAD waits for new notifications
+        self.subscribers: set[asyncio.Queue] = set()
+        self.dropped = 0
+
+    def subscribe(self, queue_size: int | None = None) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    @asynccontextmanager
+    async def subscription(self, queue_size: int | None = None) -> AsyncIterator[asyncio.Queue]:
+        queue = self.subscribe(queue_size)
+        try:
+            yield queue
+        finally:
+            self.unsubscribe(queue)
+
+    def fan_out(self, notification: Notification) -> None:
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()  # drop the oldest notification of the slow subscriber
+                self.dropped += 1
+            queue.put_nowait(notification)
+
+    async def replay(self, last_event_id: str) -> list[Notification]:
+        """Return the notifications still kept in the stream after the client's last event id"""
+        import instances
+
+        return await instances.aioredis.read_notifications(last_event_id, count=notifications_stream_maxlen)
+
+    async def run(self, retry_delay: float = 1) -> None:
+        """Relay the stream's new notifications to the subscribers for the worker's lifetime.
+        Resumes from the last relayed id after Redis errors, so no notification is skipped."""
+        import instances
+
+        last_id = None
+        while True:
+            try:
+                if last_id is None:
+                    last_id = await instances.aioredis.last_notification_id()
+                    logger.info(f"Broadcaster reading the notifications stream after {last_id}")
+                notifications = await instances.aioredis.read_notifications(last_id, count=100, block=self.block)
+                for notification in notifications:
+                    self.fan_out(notification)
+                    last_id = notification[0]
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Broadcaster failed to read the notifications stream: {str(e)} | will retry...")
+                await asyncio.sleep(retry_delay)
+
+
+Notifications = Broadcaster()
@@ -46,3 +46,7 @@ async def cancel_lifespan_tasks(app: FastAPI):
         app.state.redis.close()
     if hasattr(app.state, "aioredis"):
         await app.state.aioredis.close()
+
+    from src.utils.aios3_client import AioS3
+
+    AioS3.close()
@@ -0,0 +1,125 @@
+"""
+Versioned binary encoding of the card values cached in the trading-apps-reports hashes.
+
+Encoded value: MAGIC | codec version (1 byte) | dictionary id (2 bytes) | payload
+    version 1 -> raw DEFLATE of the card JSON, primed with the shared dictionary (0 = no dictionary)
+
+Dictionaries are trained from cached cards (see cards_cache.py migrate) and stored in Redis:
+    {root_redis_key}:cards:codec:dictionaries -> hash {dictionary id: dictionary bytes}, never modified once written
+    {root_redis_key}:cards:codec:current -> id of the dictionary new values are encoded with
+
+Values without the magic header are the legacy plain JSON strings and are returned as is, so cards cached before
+the codec stay readable until they are migrated.
+"""
+
+import json
+import struct
+import time
+import zlib
+from config import (
+    cards_codec_current_key,
+    cards_codec_dictionaries_key,
+    cards_codec_dictionary_size,
+    cards_codec_level,
+    cards_codec_refresh_interval,
+)
+
+MAGIC = b"\xd0\xc0"  # never the start of a JSON document
+CODEC_ZLIB = 1
+HEADER = struct.Struct(">2sBH")  # magic, codec version, dictionary id
+
+
+class UnknownDictionaryError(KeyError):
+    pass
+
+
+class CardCodec:
+    dictionaries_key: str = cards_codec_dictionaries_key
+    current_key: str = cards_codec_current_key
+
+    def __init__(self, level: int = cards_codec_level, refresh_interval: float = cards_codec_refresh_interval) -> None:
+        self.level = level
+        self.refresh_interval = refresh_interval
+        self.dictionaries: dict[int, bytes] = {}
+        self.current = 0  # dictionary id new values are encoded with
+        self.loaded_at: float | None = None
+
+    def is_stale(self) -> bool:
+        """Dictionaries are reloaded from Redis periodically to pick up the ones trained by other processes"""
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def load(self, dictionaries: dict, current: bytes | str | None) -> None:
+        """Set the dictionaries from the raw HGETALL of the dictionaries hash and GET of the current id"""
+        self.dictionaries = {int(dictionary_id): dictionary for dictionary_id, dictionary in dictionaries.items()}
+        self.current = int(current or 0)
+        self.loaded_at = time.monotonic()
+
+    def dictionary(self, dictionary_id: int) -> bytes | None:
+        if dictionary_id == 0:
+            return None
+        try:
+            return self.dictionaries[dictionary_id]
+        except KeyError:
+            raise UnknownDictionaryError(dictionary_id) from None
+
+    @staticmethod
+    def header(value: bytes | str | None) -> tuple[int, int] | None:
+        """(codec version, dictionary id) of an encoded value, None for a legacy JSON value"""
+        if not isinstance(value, bytes) or not value.startswith(MAGIC) or len(value) < HEADER.size:
+            return None
+        _, version, dictionary_id = HEADER.unpack_from(value)
+        return version, dictionary_id
+
+    def unknown_dictionaries(self, values) -> set[int]:
+        """Ids of the dictionaries the values were encoded with that are not loaded yet"""
+        unknown = set()
+        for value in values:
+            header = self.header(value)
+            if header and header[1] and header[1] not in self.dictionaries:
+                unknown.add(header[1])
+        return unknown
+
+    def encode(self, value: str | bytes) -> bytes:
+        data = value.encode("utf-8") if isinstance(value, str) else value
+        dictionary = self.dictionary(self.current)
+        compressor = (
+            zlib.compressobj(self.level, zlib.DEFLATED, -15, zdict=dictionary)
+            if dictionary
+            else zlib.compressobj(self.level, zlib.DEFLATED, -15)
+        )
+        return HEADER.pack(MAGIC, CODEC_ZLIB, self.current) + compressor.compress(data) + compressor.flush()
+
+    def decode(self, value: bytes | str) -> bytes:
+        """JSON bytes of an encoded or legacy value"""
+        header = self.header(value)
+        if header is None:
+            return value.encode("utf-8") if isinstance(value, str) else value
+        version, dictionary_id = header
+        if version != CODEC_ZLIB:
+            raise ValueError(f"Unsupported card codec version {version}")
+        dictionary = self.dictionary(dictionary_id)
+        decompressor = zlib.decompressobj(-15, zdict=dictionary) if dictionary else zlib.decompressobj(-15)
+        return decompressor.decompress(value[HEADER.size :]) + decompressor.flush()
+
+    def loads(self, value: bytes | str):
+        return json.loads(self.decode(value))
+
+    @staticmethod
+    def train(samples: list[bytes], size: int = cards_codec_dictionary_size) -> bytes:
+        """Build a preset dictionary from sample card values. DEFLATE only looks back 32KB and favours the most
+        recent matches, so the dictionary is the tail of the samples with the substrings common to most cards last."""
+        if not samples:
+            return b""
+        counts: dict[bytes, int] = {}
+        for sample in samples:
+            for token in set(sample.replace(b"{", b"\n").replace(b"}", b"\n").replace(b",", b"\n").split(b"\n")):
+                if len(token) > 3:
+                    counts[token] = counts.get(token, 0) + 1
+        frequent = sorted((token for token, count in counts.items() if count > 1), key=lambda token: counts[token])
+        dictionary = b",".join(frequent)[-size:]
+        if len(dictionary) < size:
+            dictionary = b"".join(samples)[-(size - len(dictionary)) :] + dictionary
+        return dictionary[-size:]
+
+
+CardsCodec = CardCodec()
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from config import test_reports_date_format
 
 
@@ -28,6 +29,16 @@ def _parse_report_date(received_date: str) -> datetime:
     raise ValueError(f"Unable to parse date '{received_date}' using any known format: {formats}")
 
 
+@lru_cache(maxsize=8192)
+def parse_report_date(received_date: str) -> datetime | None:
+    """Memoized _parse_report_date. Report directory names are immutable, so each one is parsed once per process.
+    Returns None if no format matches."""
+    try:
+        return _parse_report_date(received_date)
+    except (TypeError, ValueError):
+        return None
+
+
 def less_or_eqaul_to_date_time(received_date, expected_date_range) -> bool:
     """
     Compare the date of the report directory with the current date.
@@ -38,8 +49,10 @@ def less_or_eqaul_to_date_time(received_date, expected_date_range) -> bool:
     - Previous (no milliseconds): "02-18-2026_03-45-30_PM"
     - Legacy: "2024-12-31-1-40-53"
     """
+    date_time = parse_report_date(received_date)
+    if date_time is None:
+        return False
     try:
-        date_time = _parse_report_date(received_date)
         date_diff = datetime.now() - date_time
         if date_diff > timedelta(days=int(expected_date_range)):
             return False
@@ -1,6 +1,3 @@
-from datetime import datetime
-
-
 def get_est_date_time():
     """Get the current date and time in Eastern Standard Time (EST)
     Returns: MM-DD-YYYY_HH-MM-SS_AM/PM -> 12-30-2025_8-32-33_PM
@@ -44,14 +41,11 @@ def convert_iso8601_to_unix_time(iso_timestamp: str) -> float:
 
 
 def parse_card_day_to_unix(day_value: str) -> float | None:
-    """Parse a card day string in the format MM-DD-YYYY_HH-MM-SS_AM/PM to a Unix timestamp.
+    """Parse a card day string to a Unix timestamp with the report date formats of src/utils/date.py, so every card
+    the day filters accept can be indexed. Returns None if no format matches.
     Example: '12-30-2025_8-32-33_PM' -> 1767227553.0
     """
-    if not isinstance(day_value, str):
-        return None
-    for fmt in ("%m-%d-%Y_%I-%M-%S-%f_%p", "%m-%d-%Y_%I-%M-%S_%p"):
-        try:
-            return datetime.strptime(day_value, fmt).timestamp()
-        except ValueError:
-            continue
-    return None
+    from src.utils.date import parse_report_date
+
+    date_time = parse_report_date(day_value) if isinstance(day_value, str) else None
+    return date_time.timestamp() if date_time else None
@@ -121,3 +121,16 @@ def get_aws_sdet_bucket_secret_access_key():
 
 def get_aws_session_token():
     return get_env_variable("AWS_SESSION_TOKEN")
+
+
+def get_change_feed_source():
+    """Source of the new report notifications: 's3-index' (default), 'sqs' or 'local'"""
+    return get_env_variable("CHANGE_FEED_SOURCE", "s3-index")
+
+
+def get_change_feed_sqs_queue_url():
+    return get_env_variable("CHANGE_FEED_SQS_QUEUE_URL", "")
+
+
+def get_change_feed_drop_dir():
+    return get_env_variable("CHANGE_FEED_DROP_DIR", "../logs/change-feed")
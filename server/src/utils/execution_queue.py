@@ -0,0 +1,213 @@
+"""
+Redis-backed execution queue for test-suite runs requested via /execute and The Lab.
+Every main server worker runs a scheduler that starts queued runs on its local CommandRunner,
+so a burst of requests is spread over time instead of all starting at once.
+
+Keys:
+    {root_redis_key}:executions:queue -> sorted set {job_id: score}, highest priority first, then FIFO
+    {root_redis_key}:executions:running -> sorted set {job_id: started_at}
+    {root_redis_key}:executions:job:{job_id} -> JSON job record (expires `execution_history_ttl` after it finishes)
+
+Identical option sets share one job id (params_to_identifier) and an "execution" operation lock, so a run that is
+already queued or running is not queued twice. Each environment runs at most `execution_env_concurrency[env]`
+runs at once across all workers, using "execution-slot" operation locks {environment}:{slot}.
+"""
+
+import asyncio
+import json
+import os
+import time
+from config import (
+    execution_default_concurrency,
+    execution_env_concurrency,
+    execution_history_ttl,
+    execution_queue_ttl,
+    execution_scheduler_interval,
+    root_redis_key,
+)
+from src.utils.executor import CommandRunner, Job, Runner
+from src.utils.logger import logger
+from src.utils.queue import params_to_identifier
+
+PRIORITY_WEIGHT = 10**13  # larger than any millisecond timestamp, so priority always wins over queue time
+
+
+class ExecutionQueue:
+    queue_key: str = f"{root_redis_key}:executions:queue"
+    running_key: str = f"{root_redis_key}:executions:running"
+    job_key_prefix: str = f"{root_redis_key}:executions:job"
+    operation: str = "execution"
+    slot_operation: str = "execution-slot"
+
+    def __init__(self, runner: CommandRunner, interval: float = execution_scheduler_interval) -> None:
+        self.runner = runner
+        self.interval = interval
+        self.running: dict[str, Job] = {}  # {job_id: runner job} started by this worker
+        self.wakeup: asyncio.Event | None = None
+
+    @staticmethod
+    def get_redis():
+        import instances
+
+        return instances.aioredis
+
+    def job_key(self, job_id: str) -> str:
+        return f"{self.job_key_prefix}:{job_id}"
+
+    @staticmethod
+    def concurrency(environment: str) -> int:
+        return execution_env_concurrency.get(environment, execution_default_concurrency)
+
+    async def get_job(self, job_id: str) -> dict | None:
+        value = await self.get_redis().get(self.job_key(job_id))
+        return json.loads(value) if value else None
+
+    async def save_job(self, job: dict, ttl: int = execution_queue_ttl) -> None:
+        await self.get_redis().set(self.job_key(job["id"]), json.dumps(job), ex=ttl)
+
+    async def enqueue(
+        self, options: dict, command: str, priority: int = 0, source: str = "execute"
+    ) -> tuple[dict, bool]:
+        """Queue a run of the command. Returns the job and False if the same options are already queued or running."""
+        job_id = params_to_identifier(options)
+        redis = self.get_redis()
+        if not await redis.mark_operation(
+            self.operation, job_id, metadata={"options": options}, ttl=execution_queue_ttl
+        ):
+            existing = await self.get_job(job_id)
+            if existing:
+                logger.info(f"Execution [{job_id}] already {existing['status']}. Skipping duplicate request")
+                return existing, False
+
+        now = time.time()
+        job = {
+            "id": job_id,
+            "options": options,
+            "command": command,
+            "environment": options.get("environment", ""),
+            "priority": priority,
+            "source": source,
+            "status": "queued",
+            "queued_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "returncode": None,
+        }
+        redis_client = await redis.get_client()
+        async with redis_client.pipeline() as pipeline:
+            pipeline.set(self.job_key(job_id), json.dumps(job), ex=execution_queue_ttl)
+            pipeline.zadd(self.queue_key, {job_id: -priority * PRIORITY_WEIGHT + int(now * 1000)})
+            await pipeline.execute()
+        logger.info(f"Execution [{job_id}] queued with priority {priority}: {command}")
+        if self.wakeup:
+            self.wakeup.set()
+        return job, True
+
+    async def position(self, job_id: str) -> int | None:
+        """1-based position of a queued job, None if it is not queued"""
+        redis_client = await self.get_redis().get_client()
+        rank = await redis_client.zrank(self.queue_key, job_id)
+        return None if rank is None else rank + 1
+
+    async def list_jobs(self) -> dict[str, list[dict]]:
+        redis_client = await self.get_redis().get_client()
+        queued_ids = [job_id.decode("utf-8") for job_id in await redis_client.zrange(self.queue_key, 0, -1)]
+        running_ids = [job_id.decode("utf-8") for job_id in await redis_client.zrange(self.running_key, 0, -1)]
+        job_ids = queued_ids + running_ids
+        values = await redis_client.mget([self.job_key(job_id) for job_id in job_ids]) if job_ids else []
+        jobs = {job_id: json.loads(value) for job_id, value in zip(job_ids, values) if value}
+        return {
+            "queued": [jobs[job_id] for job_id in queued_ids if job_id in jobs],
+            "running": [jobs[job_id] for job_id in running_ids if job_id in jobs],
+        }
+
+    async def cancel(self, job_id: str) -> bool:
+        """Cancel a queued job, or a running job started by this worker"""
+        job = await self.get_job(job_id)
+        if not job:
+            return False
+        redis = self.get_redis()
+        redis_client = await redis.get_client()
+        if await redis_client.zrem(self.queue_key, job_id):
+            job.update(status="cancelled", finished_at=time.time())
+            await self.save_job(job, ttl=execution_history_ttl)
+            await redis.unmark_operation(self.operation, job_id)
+            logger.info(f"Execution [{job_id}] cancelled while queued")
+            return True
+        runner_job = self.running.get(job_id)
+        return runner_job.cancel() if runner_job else False
+
+    async def acquire_slot(self, environment: str, job_id: str) -> str | None:
+        """Take a free run slot of the environment, None if all its slots are busy"""
+        redis = self.get_redis()
+        for slot in range(self.concurrency(environment)):
+            identifier = f"{environment}:{slot}"
+            if await redis.mark_operation(self.slot_operation, identifier, {"job": job_id}, ttl=execution_queue_ttl):
+                return identifier
+        return None
+
+    async def schedule(self) -> int:
+        """Start the queued jobs that have a free environment slot. Returns the number of jobs started."""
+        redis = self.get_redis()
+        redis_client = await redis.get_client()
+        started = 0
+        for raw_job_id in await redis_client.zrange(self.queue_key, 0, -1):
+            job_id = raw_job_id.decode("utf-8")
+            job = await self.get_job(job_id)
+            if not job:
+                await redis_client.zrem(self.queue_key, job_id)
+                continue
+            slot = await self.acquire_slot(job["environment"], job_id)
+            if slot is None:
+                continue  # environment at capacity, later jobs of other environments may still start
+            if not await redis_client.zrem(self.queue_key, job_id):
+                await redis.unmark_operation(self.slot_operation, slot)  # another worker started it
+                continue
+            await self.start(job, slot)
+            started += 1
+        return started
+
+    async def start(self, job: dict, slot: str) -> None:
+        runner_job = self.runner.submit(job["command"])
+        job.update(status="running", started_at=time.time(), worker=os.getpid(), runner_job=runner_job.id)
+        await self.save_job(job)
+        redis_client = await self.get_redis().get_client()
+        await redis_client.zadd(self.running_key, {job["id"]: job["started_at"]})
+        self.running[job["id"]] = runner_job
+        logger.info(f"Execution [{job['id']}] started on slot {slot}")
+        asyncio.create_task(self.finish(job, slot, runner_job))
+
+    async def finish(self, job: dict, slot: str, runner_job: Job) -> None:
+        try:
+            await runner_job.wait()
+        finally:
+            redis = self.get_redis()
+            redis_client = await redis.get_client()
+            job.update(status=runner_job.status, returncode=runner_job.returncode, finished_at=time.time())
+            await self.save_job(job, ttl=execution_history_ttl)
+            await redis_client.zrem(self.running_key, job["id"])
+            await redis.unmark_operation(self.slot_operation, slot)
+            await redis.unmark_operation(self.operation, job["id"])
+            self.running.pop(job["id"], None)
+            logger.info(f"Execution [{job['id']}] {job['status']} on slot {slot}")
+            if self.wakeup:
+                self.wakeup.set()
+
+    async def run(self) -> None:
+        """Schedule the queued jobs for the worker's lifetime. Wakes up on local enqueues/finishes, else polls."""
+        self.wakeup = asyncio.Event()
+        while True:
+            try:
+                await self.schedule()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Execution scheduler error: {str(e)}")
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+
+Executions = ExecutionQueue(Runner)
@@ -1,13 +1,12 @@
 import asyncio
 import time
 import aiohttp
+from fastapi import Request
 import instances
+from config import cards_response_cache_ttl
 from src.utils.logger import logger
-from config import server_url
-from src.utils.queue import (
-    is_cache_reloading,
-    wait_till_operation_complete,
-)
+from src.utils.http_client import DoctorHTTP
+from src.utils.queue import wait_till_operation_complete
 
 
 def performance_log(func):
@@ -34,43 +33,63 @@ def performance_log(func):
     return wrapper
 
 
-async def call_doctor_endpoint(endpoint: str, params: dict, method: str = "get") -> dict:
-    """Make an async HTTP request to a cards API endpoint.
-    Supports `get` and `post` methods via the `method` argument.
+def build_etag(*parts) -> str:
+    """Build a weak ETag from the given parts. e.g. build_etag(42, "a1b2c3") -> 'W/"42-a1b2c3"'"""
+    return f'W/"{"-".join(str(part) for part in parts)}"'
+
+
+def cards_time_bucket(now: float | None = None) -> int:
+    """Index of the current cards_response_cache_ttl window. The day filtered cards age out with time, not only when
+    a new card is cached, so the /cards validators change at least once per window."""
+    return int((time.time() if now is None else now) // cards_response_cache_ttl)
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Return True if the request's If-None-Match header matches the ETag (weak comparison)"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+async def call_doctor_endpoint(
+    endpoint: str, params: dict, method: str = "get", json: dict | None = None, retries: int | None = None
+) -> dict:
+    """Make an async HTTP request to a cards API endpoint over the shared keep-alive session.
+    Supports `get` and `post` methods via the `method` argument, and an optional JSON body.
     """
     try:
-        url = f"{server_url}{endpoint}"
-        async with aiohttp.ClientSession() as session:
-            request = getattr(session, method.lower(), None)
-            if not request:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            async with request(url, params=params, timeout=aiohttp.ClientTimeout(total=300)) as response:
-                if response.status in [200, 202]:
-                    logger.info(f"API request successful: {endpoint} with params {params} | status: {response.status}")
-                    try:
-                        return await response.json()
-                    except Exception:
-                        return {}
-                else:
-                    logger.error(f"API request failed for {endpoint}: status {response.status}")
-                    raise aiohttp.ClientResponseError(
-                        request_info=response.request_info,
-                        history=response.history,
-                        status=response.status,
-                        message=f"API request failed for {endpoint}: status {response.status}",
-                        headers=response.headers,
-                    )
+        if method.lower() not in ("get", "post"):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+
+        response = await DoctorHTTP.request(endpoint, params, method=method, json=json, retries=retries)
+        if response.status in [200, 202]:
+            logger.info(f"API request successful: {endpoint} with params {params} | status: {response.status}")
+            try:
+                return await response.json()
+            except Exception:
+                return {}
+        else:
+            logger.error(f"API request failed for {endpoint}: status {response.status}")
+            raise aiohttp.ClientResponseError(
+                request_info=response.request_info,
+                history=response.history,
+                status=response.status,
+                message=f"API request failed for {endpoint}: status {response.status}",
+                headers=response.headers,
+            )
     except Exception as e:
         logger.error(f"Error calling {endpoint} API: {str(e)}")
         raise aiohttp.ClientError(f"API error calling {endpoint} API: {str(e)}")
 
 
 async def queue_cards_download(cards_filter: dict) -> None:
-    """Queue downloads for multiple cards via the /download-a-card API endpoint"""
+    """Queue downloads for the missing cards in one batch on the download worker's persistent queue"""
     from src.services.cards import Cards
+    from src.services.downloader import Downloads
 
-    caching = is_cache_reloading(instances.redis.redis_client)
+    caching = await instances.aioredis.is_cache_reloading()
     if caching:
         logger.info(f"Caching queue in progress, will wait for it to finish... Status: {caching}")
         await wait_till_operation_complete("cache-reload", "reload", max_wait=300)
@@ -78,29 +97,18 @@ async def queue_cards_download(cards_filter: dict) -> None:
         logger.info("No download in progress. Proceeding to mark and download missing cards.")
 
     cards: Cards = Cards()
-    missing_cards = cards.all_missing_cards(cards_filter)
+    missing_cards = await asyncio.to_thread(cards.all_missing_cards, cards_filter)
     logger.info(f"Found {len(missing_cards)} missing cards for filter {cards_filter} - {missing_cards}")
+    if not missing_cards:
+        return
 
-    tasks = []
-    for card_date in missing_cards:
-        try:
-            tasks.append(call_doctor_endpoint("/download-a-card", {"card_date": card_date}, method="post"))
-        except Exception as e:
-            logger.error(f"Error queuing download for {card_date}: {str(e)}")
-
-    logger.info(f"Queued {len(tasks)} download tasks for missing cards.")
-
-    if tasks:
-        try:
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for card_date, response in zip(missing_cards, responses):
-                if isinstance(response, Exception):
-                    logger.error(f"Download queue failed for {card_date}: {str(response)}")
-                else:
-                    logger.info(f"Download queued successfully: {card_date} | status: {response}")
-        except Exception as e:
-            logger.error(f"Error processing download responses: {str(e)}")
+    try:
+        scheduled = await Downloads.enqueue(missing_cards)
+        logger.info(
+            f"Download queued for {len(scheduled['queued'])} cards | already downloading: {scheduled['downloading']}"
+        )
+    except Exception as e:
+        logger.error(f"Error queuing downloads for {len(missing_cards)} missing cards: {str(e)}")
 
 
 async def queue_cache_reload_and_download(cards_filter: dict) -> None:
@@ -115,7 +123,7 @@ async def wait_for_server_ready(max_retries: int = 30, retry_delay: int = 1) ->
     """Wait for the main server to be ready by polling the health check endpoint. Useful for app initialization."""
     for attempt in range(max_retries):
         try:
-            await call_doctor_endpoint("/", {})
+            await call_doctor_endpoint("/", {}, retries=0)
             logger.info("Server is ready, proceeding with notification service.")
             return True
         except Exception:
@@ -0,0 +1,85 @@
+import asyncio
+import random
+import aiohttp
+from config import (
+    doctor_http_default_timeout,
+    doctor_http_endpoint_timeouts,
+    doctor_http_keepalive_timeout,
+    doctor_http_max_retries,
+    doctor_http_pool_size,
+    server_url,
+)
+from src.utils.logger import logger
+
+RETRY_STATUSES = {502, 503, 504}  # the server is restarting or overloaded, worth another try
+
+
+class DoctorHTTPClient:
+    """Shared aiohttp session for the calls to the main server's own API (notification process, /card downloads).
+    Connections are kept alive in a bounded pool and DNS lookups are cached, instead of a new session per call.
+    Each endpoint has its own timeout and failed connections/gateway errors are retried with jittered backoff."""
+
+    def __init__(
+        self,
+        base_url: str = server_url,
+        pool_size: int = doctor_http_pool_size,
+        keepalive_timeout: float = doctor_http_keepalive_timeout,
+        max_retries: int = doctor_http_max_retries,
+    ) -> None:
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+        self.session: aiohttp.ClientSession | None = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """The session is created on first use, on the event loop of the process using it"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size, keepalive_timeout=self.keepalive_timeout, ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    @staticmethod
+    def get_timeout(endpoint: str) -> aiohttp.ClientTimeout:
+        total = doctor_http_endpoint_timeouts.get(endpoint, doctor_http_default_timeout)
+        return aiohttp.ClientTimeout(total=total, connect=min(10, total))
+
+    async def request(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        method: str = "get",
+        json: dict | None = None,
+        retries: int | None = None,
+    ) -> aiohttp.ClientResponse:
+        """Send the request and return the response with its body read. Raises the last error once out of retries."""
+        max_retries = self.max_retries if retries is None else retries
+        url = f"{self.base_url}{endpoint}"
+        attempt = 0
+        while True:
+            try:
+                async with self.get_session().request(
+                    method.upper(), url, params=params, json=json, timeout=self.get_timeout(endpoint)
+                ) as response:
+                    await response.read()
+                    if response.status not in RETRY_STATUSES or attempt >= max_retries:
+                        return response
+                    reason = f"status {response.status}"
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                if attempt >= max_retries:
+                    raise
+                reason = type(error).__name__
+            attempt += 1
+            backoff = min(10, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+            logger.info(f"Request to {endpoint} failed ({reason}). Retry #{attempt} in {backoff:.2f}s")
+            await asyncio.sleep(backoff)
+
+    async def close(self) -> None:
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+
+DoctorHTTP = DoctorHTTPClient()
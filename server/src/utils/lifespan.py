@@ -1,9 +1,13 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from src.utils.env_loader import get_node_env, get_test_env, get_server_mode
-from src.utils.cancel import cancel_lifespan_tasks
+from src.utils.cancel import cancel_app_task, cancel_lifespan_tasks
 from src.utils.logger import logger
 from src.services.cards import Cards
+from src.utils.broadcaster import Notifications
+from src.utils.execution_queue import Executions
+from src.utils.http_client import DoctorHTTP
 
 
 @asynccontextmanager
@@ -23,10 +27,17 @@ async def lifespan_main(app: FastAPI):
 
     cards = Cards()
     app.state.cards = cards
+    app.state.notifications_broadcaster = asyncio.create_task(Notifications.run())
+    app.state.cards_cache_listener = asyncio.create_task(cards.listen_for_cache_invalidation())
+    app.state.execution_scheduler = asyncio.create_task(Executions.run())
 
     yield  # Yield control to the FastAPI application
 
     logger.info("Shutting down the main server lifespan & performing clean up steps...")
+    await cancel_app_task("execution_scheduler", app)
+    await cancel_app_task("cards_cache_listener", app)
+    await cancel_app_task("notifications_broadcaster", app)
+    await DoctorHTTP.close()
     await cancel_lifespan_tasks(app)
 
 
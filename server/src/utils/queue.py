@@ -11,14 +11,16 @@ import asyncio
 import hashlib
 import json
 from redis import Redis
-from config import root_redis_key, download_queue_ttl, cache_reload_queue_ttl
+from config import root_redis_key, download_queue_ttl, cache_reload_queue_ttl, execution_queue_ttl, s3_index_queue_ttl
 from src.utils.logger import logger
-import instances
 
 # Default TTLs per operation type (seconds). Callers can override via `ttl` param.
 _DEFAULT_TTLS: dict[str, int] = {
     "download": download_queue_ttl,
     "cache-reload": cache_reload_queue_ttl,
+    "s3-index": s3_index_queue_ttl,
+    "execution": execution_queue_ttl,
+    "execution-slot": execution_queue_ttl,
 }
 
 
@@ -31,6 +33,16 @@ def get_operation_key(operation: str, identifier: str) -> str:
     return f"{root_redis_key}:operations:{operation}:in-progress:{identifier}"
 
 
+def get_operation_ttl(operation: str, ttl: int | None = None) -> int:
+    """Expiry of an operation marker: the given ttl, else the per-operation default, then 3600."""
+    return ttl or _DEFAULT_TTLS.get(operation, 3600)
+
+
+def get_operation_data(operation: str, metadata: dict | None = None) -> str:
+    """JSON value stored in an operation marker."""
+    return json.dumps({"status": "in-progress", "operation": operation, **(metadata or {})})
+
+
 def is_operation_in_progress(redis: Redis, operation: str, identifier: str) -> bool:
     """Return True if the given operation+identifier is currently in progress."""
     key = get_operation_key(operation, identifier)
@@ -57,8 +69,8 @@ def mark_operation(
     """
     try:
         key = get_operation_key(operation, identifier)
-        effective_ttl = ttl or _DEFAULT_TTLS.get(operation, 3600)
-        data = json.dumps({"status": "in-progress", "operation": operation, **(metadata or {})})
+        effective_ttl = get_operation_ttl(operation, ttl)
+        data = get_operation_data(operation, metadata)
         # SET NX ensures only one caller wins; avoids race conditions.
         was_set = redis.set(key, data, nx=True, ex=effective_ttl)
         if not was_set:
@@ -69,6 +81,30 @@ def mark_operation(
         return False
 
 
+def mark_operations(
+    redis: Redis,
+    operation: str,
+    identifiers: list[str],
+    metadata: dict | None = None,
+    ttl: int | None = None,
+) -> list[bool]:
+    """Mark many operations as in-progress with one pipelined round trip of SET NX.
+    Returns one flag per identifier: True if it was acquired, False if already in-progress (all False on error).
+    """
+    if not identifiers:
+        return []
+    try:
+        effective_ttl = get_operation_ttl(operation, ttl)
+        data = get_operation_data(operation, metadata)
+        pipeline = redis.pipeline(transaction=False)
+        for identifier in identifiers:
+            pipeline.set(get_operation_key(operation, identifier), data, nx=True, ex=effective_ttl)
+        return [bool(was_set) for was_set in pipeline.execute()]
+    except Exception as e:
+        logger.error(f"Failed to mark {len(identifiers)} {operation} operations as in-progress: {e}")
+        return [False] * len(identifiers)
+
+
 def unmark_operation(redis: Redis, operation: str, identifier: str) -> bool:
     """Remove the in-progress marker for an operation (marks it as complete)."""
     try:
@@ -80,17 +116,11 @@ def unmark_operation(redis: Redis, operation: str, identifier: str) -> bool:
         return False
 
 
-async def get_operation_status(redis: Redis, operation: str, identifier: str) -> dict | None:
+async def get_operation_status(operation: str, identifier: str) -> dict | None:
     """Retrieve the metadata dict for an in-progress operation (async Redis)."""
-    try:
-        key = get_operation_key(operation, identifier)
-        value = await redis.get(key)
-        if not value:
-            return None
-        return json.loads(value)
-    except Exception as e:
-        logger.error(f"Failed to get status for {operation}/{identifier}: {e}")
-        return None
+    import instances
+
+    return await instances.aioredis.get_operation_status(operation, identifier)
 
 
 def params_to_identifier(params: dict) -> str:
@@ -113,40 +143,32 @@ def mark_downloading(redis: Redis, card_date: str, metadata: dict | None = None)
     return mark_operation(redis, "download", card_date, metadata=metadata)
 
 
+def mark_downloads(redis: Redis, card_dates: list[str], metadata: dict | None = None) -> list[bool]:
+    """Mark many card_dates as being downloaded in one pipeline. Returns whether each one was acquired."""
+    return mark_operations(redis, "download", card_dates, metadata=metadata)
+
+
 def unmark_downloading(redis: Redis, card_date: str) -> bool:
     """Remove a card_date from the downloading queue."""
     return unmark_operation(redis, "download", card_date)
 
 
-async def get_download_status(redis: Redis, card_date: str) -> dict | None:
+async def get_download_status(card_date: str) -> dict | None:
     """Get the current download metadata for a card_date."""
-    return await get_operation_status(redis, "download", card_date)
+    return await get_operation_status("download", card_date)
 
 
 async def cards_download_queue():
     """Return card identifiers currently marked as queued/in-progress downloads."""
-    pattern = get_operation_key("download", "*")
-    queued_cards: list[str] = []
+    import instances
 
+    pattern = get_operation_key("download", "*")
     try:
-        aioredis = instances.aioredis
-        aioredis_client = await aioredis.get_client()
-        cursor = 0
-        while True:
-            cursor, keys = await aioredis_client.scan(cursor=cursor, match=pattern, count=500)
-            for key in keys:
-                key_str = await aioredis.get(key)
-                if key_str:
-                    redis_key = key.decode("utf-8") if isinstance(key, bytes) else str(key)
-                    logger.debug(f"Found queued download key: {key_str} | Redis key: {redis_key}")
-                    queued_cards.append(redis_key.rsplit(":in-progress:", 1)[-1])
-
-            if cursor in (0, "0"):
-                break
+        keys = await instances.aioredis.scan_keys(pattern, count=500)
     except Exception as async_error:
-        logger.warning(f"AioRedis scan failed for queued downloads, falling back to sync Redis: {async_error}")
+        logger.warning(f"AioRedis scan failed for queued downloads: {async_error}")
         return []
-    return sorted(set(queued_cards))
+    return sorted({key.rsplit(":in-progress:", 1)[-1] for key in keys})
 
 
 def is_cache_reloading(redis: Redis) -> bool:
@@ -158,12 +180,10 @@ async def wait_till_operation_complete(operation: str, identifier: str, max_wait
     """Async helper to wait until a given operation+identifier is no longer in-progress.
     max_wait is the total time in seconds to wait before giving up (to avoid infinite loops).
     """
-    redis = instances.redis
-    redis_client = redis.redis_client
     loop = asyncio.get_running_loop()
     deadline = loop.time() + max_wait
 
-    while await get_operation_status(redis_client, operation, identifier) is not None and loop.time() < deadline:
+    while await get_operation_status(operation, identifier) is not None and loop.time() < deadline:
         remaining = deadline - loop.time()
         if remaining <= 0:
             break
@@ -0,0 +1,42 @@
+import asyncio
+import time
+from src.utils.logger import logger
+
+
+class AdaptiveRateLimiter:
+    """Token bucket rate limiter shared by every request of a process.
+    The refill rate is halved each time the remote service throttles (e.g. S3 SlowDown/503)
+    and recovers additively on every successful request, up to `max_rate`.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float) -> None:
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a request token is available and take it"""
+        while True:
+            self.refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self) -> None:
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + 1)
+
+    def on_throttle(self) -> None:
+        self.refill()
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0
+        logger.warning(f"Request throttled. Backing off rate limit to {self.rate:.2f} requests/second")
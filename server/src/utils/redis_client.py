@@ -2,6 +2,8 @@ import json
 import redis
 from datetime import datetime, timedelta
 from src.utils.env_loader import get_redis_host, get_redis_port
+from src.utils.card_codec import CardCodec, CardsCodec
+from src.utils.redis_pool import create_pool, pool_stats
 
 redis_host = get_redis_host()
 redis_port = get_redis_port()
@@ -12,15 +14,17 @@ class RedisClient:
     from src.utils.logger import logger
 
     redis_client: redis.StrictRedis
+    pool: redis.BlockingConnectionPool
     cards_cached_redis_key: str = config.test_reports_cached_redis_key
+    cards_products_redis_key: str = config.test_reports_products_redis_key
 
     def __init__(self, host=redis_host, port=redis_port):
         self.connect(host, port)
 
     def connect(self, host, port) -> None:
-        self.redis_client = redis.StrictRedis(host, port)
-        connected_client = self.redis_client.incr(self.config.redis_instance_key, 1)
-        self.logger.info(f"Connected to Redis at {host}:{port}. Clients count: {connected_client}")
+        self.pool = create_pool(host, port, self.config.redis_max_connections)
+        self.redis_client = redis.StrictRedis(connection_pool=self.pool)
+        self.logger.info(f"Connected to Redis at {host}:{port}. Pool size: {self.config.redis_max_connections}")
 
     def get_client(self) -> redis.StrictRedis:
         if not self.redis_client:
@@ -31,12 +35,15 @@ class RedisClient:
     def close(self) -> None:
         try:
             if self.redis_client:
-                self.decrement_key(self.config.redis_instance_key)
                 self.redis_client.close()
+                self.pool.disconnect()
                 self.logger.info("Redis connection closed successfully")
         except Exception as e:
             self.logger.error(f"Error closing Redis connection: {e}")
 
+    def pool_stats(self) -> dict:
+        return pool_stats(self.pool)
+
     def ping(self) -> bool:
         try:
             self.redis_client.ping()
@@ -53,6 +60,24 @@ class RedisClient:
         value = self.redis_client.get(key)
         return value.decode("utf-8") if isinstance(value, bytes) else value
 
+    def publish(self, channel: str, message: str | dict) -> int:
+        """Publish a message to a Redis channel"""
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        return self.redis_client.publish(channel, message)
+
+    def publish_notification(self, message: str | dict) -> str:
+        """Append a notification to the capped notifications stream, read by every worker's broadcaster with XREAD"""
+        if isinstance(message, dict):
+            message = json.dumps(message)
+        event_id = self.redis_client.xadd(
+            self.config.notifications_stream_key,
+            {"data": message},
+            maxlen=self.config.notifications_stream_maxlen,
+            approximate=True,
+        )
+        return event_id.decode("utf-8") if isinstance(event_id, bytes) else event_id
+
     def get_all_set_items(self, key: str) -> list:
         """Get all items from a Redis set"""
         result = self.redis_client.smembers(key)
@@ -85,27 +110,115 @@ class RedisClient:
         client.lpush(key, value)
         client.expire(key, self.seconds_until_midnight(self.config.redis_cache_ttl))  # Set expiry in seconds
 
-    def create_card_cache(self, cards_cache_key: str, card_cache_field: str, card_cache_value: str) -> None:
-        was_set = self.redis_client.hsetnx(cards_cache_key, card_cache_field, card_cache_value)
+    def card_codec(self) -> CardCodec:
+        if CardsCodec.is_stale():
+            self.load_card_codec()
+        return CardsCodec
+
+    def load_card_codec(self) -> None:
+        pipeline = self.redis_client.pipeline(transaction=False)
+        pipeline.hgetall(CardsCodec.dictionaries_key)
+        pipeline.get(CardsCodec.current_key)
+        CardsCodec.load(*pipeline.execute())
+
+    def decode_cards(self, values: list) -> list[bytes | None]:
+        """JSON bytes of cached card values, encoded or legacy. Dictionaries trained meanwhile are loaded first."""
+        codec = self.card_codec()
+        if codec.unknown_dictionaries(values):
+            self.load_card_codec()
+        return [None if value is None else codec.decode(value) for value in values]
+
+    @staticmethod
+    def card_details_key(cards_cache_key: str) -> str:
+        """Hash of the full processed cards of a cards cache hash, fetched lazily by the card details endpoint.
+        e.g. trading-apps-reports:qa:ui -> trading-apps-reports:qa:ui:details
+        """
+        return f"{cards_cache_key}:details"
+
+    def replace_card_cache(
+        self, cards_cache_key: str, card_cache_field: str, card_cache_value: str, card_detail_value: str
+    ) -> None:
+        codec = self.card_codec()
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(self.card_details_key(cards_cache_key), card_cache_field, codec.encode(card_detail_value))
+        pipeline.hset(cards_cache_key, card_cache_field, codec.encode(card_cache_value))
+        pipeline.execute()
+
+    @staticmethod
+    def card_time_index_key(cards_cache_key: str, product: str) -> str:
+        """Sorted set of a cards cache hash's fields for one product, scored by the report run's unix time.
+        e.g. trading-apps-reports:qa:ui -> trading-apps-reports:qa:ui:loan:by-time
+        """
+        return f"{cards_cache_key}:{product}:by-time"
+
+    def create_card_cache(
+        self,
+        cards_cache_key: str,
+        card_cache_field: str,
+        card_cache_value: str,
+        product: str | None = None,
+        run_time: float | None = None,
+        card_detail_value: str | None = None,
+    ) -> None:
+        codec = self.card_codec()
+        was_set = self.redis_client.hsetnx(cards_cache_key, card_cache_field, codec.encode(card_cache_value))
         if was_set:
             self.redis_client.sadd(self.cards_cached_redis_key, card_cache_field)
+            if card_detail_value is not None:
+                detail_value = codec.encode(card_detail_value)
+                self.redis_client.hset(self.card_details_key(cards_cache_key), card_cache_field, detail_value)
+            if product and run_time is not None:
+                self.index_card_run_time(cards_cache_key, card_cache_field, product, run_time)
             self.logger.info(f"Cached: {card_cache_field}")
+            self.redis_client.incr(self.config.cards_cache_version_key)
+
+    @staticmethod
+    def pipeline_card_time_index(
+        pipeline, cards_cache_key: str, card_cache_field: str, product: str, run_time: float, ttl_days: int
+    ) -> None:
+        """Queue the indexing of a card by run time on a sync or async pipeline. Cards older than the cards cache TTL
+        are dropped from the sorted set, which expires with the rest of the cards cache."""
+        index_key = RedisClient.card_time_index_key(cards_cache_key, product)
+        pipeline.zadd(index_key, {card_cache_field: run_time})
+        pipeline.zremrangebyscore(index_key, "-inf", datetime.now().timestamp() - ttl_days * 86400)
+        pipeline.expire(index_key, RedisClient.seconds_until_midnight(ttl_days))
+
+    def index_card_run_time(self, cards_cache_key: str, card_cache_field: str, product: str, run_time: float) -> None:
+        pipeline = self.redis_client.pipeline(transaction=False)
+        self.pipeline_card_time_index(
+            pipeline, cards_cache_key, card_cache_field, product, run_time, self.config.redis_cache_ttl
+        )
+        pipeline.sadd(self.cards_products_redis_key, product)
+        pipeline.execute()
+
+    def rebuild_card_time_index(self, cards_cache_keys: list[str]) -> int:
+        """Backfill the cards run time sorted sets from the cards cache hashes. Returns the number of indexed cards."""
+        from src.utils.date_time_helper import parse_card_day_to_unix
+
+        indexed = 0
+        for cards_cache_key in cards_cache_keys:
+            for card_cache_field, card_cache_value in self.redis_client.hscan_iter(cards_cache_key, count=500):
+                filter_data = json.loads(self.decode_cards([card_cache_value])[0]).get("filter_data", {})
+                product = filter_data.get("product")
+                run_time = parse_card_day_to_unix(filter_data.get("day"))
+                if product and run_time is not None:
+                    self.index_card_run_time(cards_cache_key, card_cache_field, product, run_time)
+                    indexed += 1
+                else:
+                    self.logger.warning(f"Card without a product or a known day format can't be indexed: {filter_data}")
+        self.logger.info(f"Indexed {indexed} cached cards by run time")
+        return indexed
 
     def get_a_cached_card(self, cards_cache_key: str, card_cache_field: str) -> dict | None:
-        if not self.redis_client.hexists(cards_cache_key, card_cache_field):
-            return None
-        else:
-            result = self.redis_client.hget(cards_cache_key, card_cache_field)
-            card_cache_value = result.decode("utf-8") if isinstance(result, bytes) else result
-            if card_cache_value:
-                _json = json.loads(str(card_cache_value))
-                return _json
+        result = self.redis_client.hget(cards_cache_key, card_cache_field)
+        if not result:
             return None
+        return json.loads(self.decode_cards([result])[0])
 
     def get_all_cached_cards(self, cards_cache_key: str) -> dict:
+        """{card date: card JSON bytes} of a cards cache hash, decoded from the card codec"""
         result = self.redis_client.hgetall(cards_cache_key)
-        # self.logger.info(f"Cache size for key - {cards_cache_key}: {len(result if isinstance(result, dict) else {})}")
-        return result
+        return dict(zip(result.keys(), self.decode_cards(list(result.values()))))
 
     def refresh_redis_client_metrics(self) -> tuple[int, int, int]:
         lifetime_clients_count_key = self.config.do_lifetime_clients_count_key
@@ -130,5 +243,3 @@ class RedisClient:
     def reset_redis_client_metrics(self) -> None:
         self.logger.info("Resetting Redis client metrics")
         self.set(self.config.do_current_clients_count_key, 0)
-        self.set(self.config.aioredis_instance_key, 0)
-        self.set(self.config.redis_instance_key, 0)
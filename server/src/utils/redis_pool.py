@@ -0,0 +1,41 @@
+import redis
+import redis.asyncio as aioredis
+from config import (
+    redis_health_check_interval,
+    redis_pool_timeout,
+    redis_socket_connect_timeout,
+    redis_socket_keepalive,
+    redis_socket_timeout,
+)
+
+
+def connection_kwargs() -> dict:
+    """Connection settings shared by every Redis pool of the process"""
+    return {
+        "health_check_interval": redis_health_check_interval,
+        "socket_keepalive": redis_socket_keepalive,
+        "socket_timeout": redis_socket_timeout,
+        "socket_connect_timeout": redis_socket_connect_timeout,
+        "timeout": redis_pool_timeout,
+    }
+
+
+def create_pool(host: str, port: int, max_connections: int) -> redis.BlockingConnectionPool:
+    """Bounded sync pool. A command waits up to `redis_pool_timeout` for a free connection instead of opening more."""
+    return redis.BlockingConnectionPool(host=host, port=port, max_connections=max_connections, **connection_kwargs())
+
+
+def create_async_pool(redis_url: str, max_connections: int) -> aioredis.BlockingConnectionPool:
+    return aioredis.BlockingConnectionPool.from_url(redis_url, max_connections=max_connections, **connection_kwargs())
+
+
+def pool_stats(pool: redis.BlockingConnectionPool | aioredis.BlockingConnectionPool | None) -> dict:
+    """Connections opened by the pool, split into the ones running a command (in_use) and the idle ones"""
+    if pool is None:
+        return {"max": 0, "created": 0, "in_use": 0, "idle": 0}
+    if isinstance(pool, aioredis.BlockingConnectionPool):
+        in_use, idle = len(pool._in_use_connections), len(pool._available_connections)
+    else:
+        idle = sum(1 for connection in list(pool.pool.queue) if connection is not None)
+        in_use = len(pool._connections) - idle
+    return {"max": pool.max_connections, "created": in_use + idle, "in_use": in_use, "idle": idle}
@@ -0,0 +1,102 @@
+"""
+Precompressed /cards response bodies shared by every main server worker.
+
+Keys:
+    {cards_compressed_responses_key}:{identifier}:{encoding} -> compressed response body
+
+The identifier includes the cards cache version and the time window of the day filters, so a body is compressed
+once per cards cache change, window and filter, then served as is to every client accepting its encoding. Brotli is used when the optional brotli package is
+installed, gzip otherwise.
+"""
+
+import asyncio
+import gzip
+from config import (
+    cards_compressed_response_ttl,
+    cards_compressed_responses_key,
+    cards_response_brotli_quality,
+    cards_response_gzip_level,
+)
+from src.utils.logger import logger
+
+try:
+    import brotli
+except ImportError:  # optional dependency, gzip only without it
+    brotli = None
+
+
+class CompressedResponseCache:
+    key_prefix: str = cards_compressed_responses_key
+
+    def __init__(self, ttl: int = cards_compressed_response_ttl) -> None:
+        self.ttl = ttl
+        self.encodings = ["br", "gzip"] if brotli else ["gzip"]  # in order of preference
+
+    def key(self, identifier: str, encoding: str) -> str:
+        return f"{self.key_prefix}:{identifier}:{encoding}"
+
+    @staticmethod
+    def accepted_encodings(accept_encoding: str) -> dict[str, float]:
+        """{encoding: q-value} of an Accept-Encoding header, e.g. 'br;q=1.0, gzip;q=0.8' -> {'br': 1.0, 'gzip': 0.8}"""
+        accepted = {}
+        for item in accept_encoding.lower().split(","):
+            encoding, _, params = item.strip().partition(";")
+            if not encoding:
+                continue
+            q = 1.0
+            for param in params.split(";"):
+                name, _, value = param.strip().partition("=")
+                if name == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            accepted[encoding.strip()] = q
+        return accepted
+
+    def negotiate(self, accept_encoding: str) -> str | None:
+        """Best supported encoding the client accepts, None to send the body uncompressed"""
+        accepted = self.accepted_encodings(accept_encoding)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    @staticmethod
+    def headers(encoding: str) -> dict[str, str]:
+        """GZipMiddleware passes already encoded responses through untouched, without adding Vary to them"""
+        return {"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+
+    @staticmethod
+    def compress(body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=cards_response_brotli_quality)
+        return gzip.compress(body, compresslevel=cards_response_gzip_level, mtime=0)
+
+    async def get(self, identifier: str, encoding: str) -> bytes | None:
+        import instances
+
+        client = await instances.aioredis.get_client()
+        return await client.get(self.key(identifier, encoding))
+
+    async def store(self, identifier: str, body: bytes) -> dict[str, bytes]:
+        """Compress the body in every supported encoding, off the event loop, and share them with the other workers.
+        Returns the compressed bodies by encoding."""
+        import instances
+
+        compressed = {}
+        for encoding in self.encodings:
+            compressed[encoding] = await asyncio.to_thread(self.compress, body, encoding)
+        client = await instances.aioredis.get_client()
+        async with client.pipeline(transaction=False) as pipeline:
+            for encoding, encoded_body in compressed.items():
+                pipeline.set(self.key(identifier, encoding), encoded_body, ex=self.ttl)
+            await pipeline.execute()
+        sizes = " | ".join(f"{encoding}: {len(encoded_body)}" for encoding, encoded_body in compressed.items())
+        logger.info(f"Stored compressed cards response {identifier} | {len(body)} bytes -> {sizes}")
+        return compressed
+
+
+CardsResponses = CompressedResponseCache()
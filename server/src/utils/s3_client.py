@@ -1,4 +1,6 @@
 import boto3
+from botocore.config import Config
+from config import s3_max_pool_connections
 from src.utils.logger import logger
 from src.utils.env_loader import (
     get_aws_sdet_bucket_name,
@@ -23,7 +25,7 @@ class S3Client:
             region_name=aws_bucket_region,
             aws_session_token=aws_session_token,
         )
-        self.S3 = session.client("s3")
+        self.S3 = session.client("s3", config=Config(max_pool_connections=s3_max_pool_connections))
 
     def get_a_s3_object(self, object_name, bucket_name=aws_bucket_name) -> bytes:
         """
@@ -67,6 +69,38 @@ class S3Client:
         all_objects.sort(key=lambda obj: obj["LastModified"], reverse=True)
         return all_objects
 
+    def list_s3_objects_with_prefix(self, prefix: str, bucket_name=aws_bucket_name) -> list:
+        """
+        List all objects under the given key prefix, paging through results.
+        e.g. 'trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM/'
+        """
+        objects = []
+        kwargs = {"Bucket": bucket_name, "Prefix": prefix}
+
+        while True:
+            response = self.S3.list_objects_v2(**kwargs)
+            objects.extend(response.get("Contents", []))
+            if not response.get("IsTruncated"):
+                break
+            kwargs["ContinuationToken"] = response.get("NextContinuationToken")
+        return objects
+
+    def list_s3_common_prefixes(self, prefix: str, delimiter: str = "/", bucket_name=aws_bucket_name) -> list[str]:
+        """
+        List the "folders" directly under the given key prefix using a delimiter listing.
+        e.g. 'trading-apps/test_reports/loan/qa/api/10-18-2026' -> ['trading-apps/test_reports/loan/qa/api/10-18-2026_08-30-00-123456_AM/', ...]
+        """
+        prefixes = []
+        kwargs = {"Bucket": bucket_name, "Prefix": prefix, "Delimiter": delimiter}
+
+        while True:
+            response = self.S3.list_objects_v2(**kwargs)
+            prefixes.extend(common_prefix["Prefix"] for common_prefix in response.get("CommonPrefixes", []))
+            if not response.get("IsTruncated"):
+                break
+            kwargs["ContinuationToken"] = response.get("NextContinuationToken")
+        return prefixes
+
     def download_file(self, object_key: str, local_path: str, bucket_name=aws_bucket_name) -> None:
         """
         # Call S3 client to download a file
@@ -0,0 +1,279 @@
+"""
+Persistent S3 listing index stored in Redis.
+Keeps every report folder's object listing so callers don't have to page through
+the whole bucket on every cache reload, notification poll or card download.
+
+Keys:
+    {root_redis_key}:s3-index:dirs -> hash {s3_root_dir: {"objects": [[key, last_modified, size], ...], "last_modified": ts}}
+    {root_redis_key}:s3-index:meta -> hash {"watermark": ts, "built_at": ts, "total_objects": n}
+    {root_redis_key}:s3-index:changes -> sorted set {s3_root_dir: ts of the last index change (add, update or removal)}
+
+The index is fully rebuilt from a bucket listing on first use and every `s3_index_full_refresh_time`
+seconds (picks up deletions and new product/env/protocol folders). In between, it is refreshed
+incrementally with prefix-scoped delimiter listings of the report day folders since the stored watermark.
+"""
+
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+from config import (
+    s3_index_redis_key,
+    s3_index_full_refresh_time,
+    s3_index_settle_time,
+)
+from src.utils.env_loader import get_aws_sdet_bucket_name
+from src.utils.logger import logger
+from src.utils.queue import is_operation_in_progress, mark_operation, unmark_operation
+from src.utils.s3_client import S3, S3Client
+
+aws_bucket_name = get_aws_sdet_bucket_name()
+
+S3_ROOT_DIR_DEPTH = 6  # 'trading-apps/test_reports/{product}/{env}/{protocol}/{day}'
+S3_DAY_PREFIX_FORMAT = "%m-%d-%Y"  # day portion of the report folder name. e.g. '12-31-2025'
+
+
+def get_s3_root_dir(object_key: str) -> str:
+    """Return the report root dir of an S3 object key.
+    'trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM/data/trace.zip' -> 'trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM'
+    """
+    return "/".join(object_key.split("/")[:S3_ROOT_DIR_DEPTH])
+
+
+class S3ListingIndex:
+    dirs_key: str = f"{s3_index_redis_key}:dirs"
+    meta_key: str = f"{s3_index_redis_key}:meta"
+    changes_key: str = f"{s3_index_redis_key}:changes"
+    operation: str = "s3-index"
+    identifier: str = "refresh"
+
+    def __init__(self, s3: S3Client, bucket_name=aws_bucket_name):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+
+    @staticmethod
+    def get_redis_client():
+        import instances
+
+        return instances.redis.get_client()
+
+    def refresh(self, full: bool = False, max_wait: int = 60) -> list[str]:
+        """Bring the index up to date with the bucket. Returns the s3 root dirs that were added or changed.
+        Only one process refreshes at a time; the others wait for it to finish and then read the index.
+        """
+        redis_client = self.get_redis_client()
+        if not mark_operation(redis_client, self.operation, self.identifier):
+            deadline = time.time() + max_wait
+            while is_operation_in_progress(redis_client, self.operation, self.identifier) and time.time() < deadline:
+                time.sleep(0.5)
+            return []
+
+        try:
+            meta = self.get_meta()
+            built_at = meta.get("built_at", 0)
+            if full or not built_at or time.time() - built_at > s3_index_full_refresh_time:
+                return self.rebuild()
+            return self.refresh_since(meta.get("watermark", built_at))
+        finally:
+            unmark_operation(redis_client, self.operation, self.identifier)
+
+    def rebuild(self) -> list[str]:
+        """Rebuild the whole index from a full bucket listing. Only the removed dirs and the dirs with objects modified
+        after the previous watermark are logged as changes: a cold build is a baseline, not a batch of new folders."""
+        now = time.time()
+        previous_watermark = self.get_meta().get("watermark")
+        s3_objects = self.s3.list_all_s3_objects(self.bucket_name)
+        listing: dict[str, dict] = {}
+        for s3_object in s3_objects:
+            root_dir = get_s3_root_dir(s3_object["Key"])
+            entry = listing.setdefault(root_dir, {"objects": [], "last_modified": 0.0})
+            self.add_object(entry, s3_object)
+
+        redis_client = self.get_redis_client()
+        indexed_dirs = {self.decode(root_dir) for root_dir in redis_client.hkeys(self.dirs_key)}
+        removed_dirs = indexed_dirs - listing.keys()
+
+        changed_dirs = self.write_dirs(listing, removed_dirs, log_changes=False)
+        if previous_watermark:
+            self.log_changes(
+                [root_dir for root_dir in changed_dirs if listing[root_dir]["last_modified"] > previous_watermark]
+                + sorted(removed_dirs)
+            )
+        redis_client.hset(
+            self.meta_key,
+            mapping={"watermark": now, "built_at": now, "total_objects": len(s3_objects)},
+        )
+        logger.info(
+            f"S3 index rebuilt: {len(listing)} dirs | {len(s3_objects)} objects | {len(changed_dirs)} changed | {len(removed_dirs)} removed"
+        )
+        return changed_dirs
+
+    def refresh_since(self, watermark: float) -> list[str]:
+        """List only the report day folders created since the watermark, for every known product/env/protocol folder"""
+        now = time.time()
+        redis_client = self.get_redis_client()
+        indexed_dirs = [self.decode(root_dir) for root_dir in redis_client.hkeys(self.dirs_key)]
+        protocol_dirs = {
+            root_dir.rsplit("/", 1)[0] for root_dir in indexed_dirs if root_dir.count("/") == S3_ROOT_DIR_DEPTH - 1
+        }  # 'trading-apps/test_reports/loan/qa/api'
+
+        # Start one day before the watermark to cover folders named in a different timezone than the server's
+        start_day = datetime.fromtimestamp(watermark).date() - timedelta(days=1)
+        days = [start_day + timedelta(days=n) for n in range((datetime.now().date() - start_day).days + 1)]
+
+        folders = [
+            folder.rstrip("/")
+            for protocol_dir in sorted(protocol_dirs)
+            for day in days
+            for folder in self.s3.list_s3_common_prefixes(
+                f"{protocol_dir}/{day.strftime(S3_DAY_PREFIX_FORMAT)}", bucket_name=self.bucket_name
+            )
+        ]
+        indexed_entries = self.get_dirs(folders)
+
+        listing: dict[str, dict] = {}
+        for root_dir in folders:
+            indexed_entry = indexed_entries.get(root_dir)
+            if indexed_entry and now - indexed_entry["last_modified"] > s3_index_settle_time:
+                continue  # folder upload is complete, nothing new to list
+            entry = {"objects": [], "last_modified": 0.0}
+            for s3_object in self.s3.list_s3_objects_with_prefix(f"{root_dir}/", bucket_name=self.bucket_name):
+                self.add_object(entry, s3_object)
+            if entry != indexed_entry:
+                listing[root_dir] = entry
+
+        changed_dirs = self.write_dirs(listing)
+        objects_delta = sum(
+            len(entry["objects"]) - len(indexed_entries.get(root_dir, {}).get("objects", []))
+            for root_dir, entry in listing.items()
+        )
+        pipeline = redis_client.pipeline()
+        pipeline.hset(self.meta_key, "watermark", now)
+        pipeline.hincrby(self.meta_key, "total_objects", objects_delta)
+        pipeline.execute()
+        logger.info(f"S3 index refreshed: {len(folders)} recent dirs listed | {len(changed_dirs)} changed")
+        return changed_dirs
+
+    def refresh_dirs(self, root_dirs: list[str]) -> list[str]:
+        """Re-list only the given report folders, e.g. the ones named in S3 event notifications.
+        Folders without objects left are removed from the index. Returns the s3 root dirs that changed or were removed.
+        """
+        root_dirs = sorted(set(root_dirs))
+        indexed_entries = self.get_dirs(root_dirs)
+        listing: dict[str, dict] = {}
+        for root_dir in root_dirs:
+            entry = {"objects": [], "last_modified": 0.0}
+            for s3_object in self.s3.list_s3_objects_with_prefix(f"{root_dir}/", bucket_name=self.bucket_name):
+                self.add_object(entry, s3_object)
+            if entry["objects"]:
+                listing[root_dir] = entry
+        removed_dirs = {root_dir for root_dir in indexed_entries if root_dir not in listing}
+
+        changed_dirs = self.write_dirs(listing, removed_dirs)
+        objects_delta = sum(len(entry["objects"]) for entry in listing.values()) - sum(
+            len(entry["objects"]) for entry in indexed_entries.values()
+        )
+        self.get_redis_client().hincrby(self.meta_key, "total_objects", objects_delta)
+        logger.info(
+            f"S3 index refreshed {len(root_dirs)} dirs: {len(changed_dirs)} changed | {len(removed_dirs)} removed"
+        )
+        return changed_dirs + sorted(removed_dirs)
+
+    def write_dirs(
+        self, listing: dict[str, dict], removed_dirs: set[str] | None = None, log_changes: bool = True
+    ) -> list[str]:
+        """Write the changed dir entries to the index, log them in the changes sorted set and return their s3 root dirs"""
+        existing = self.get_dirs(list(listing.keys()))
+        changed = {root_dir: entry for root_dir, entry in listing.items() if existing.get(root_dir) != entry}
+
+        pipeline = self.get_redis_client().pipeline()
+        if removed_dirs:
+            pipeline.hdel(self.dirs_key, *removed_dirs)
+        if changed:
+            pipeline.hset(self.dirs_key, mapping={root_dir: json.dumps(entry) for root_dir, entry in changed.items()})
+        pipeline.execute()
+        if log_changes:
+            self.log_changes([*changed, *(removed_dirs or [])])
+        return list(changed.keys())
+
+    def log_changes(self, root_dirs: list[str]) -> None:
+        """Log the s3 root dirs as changed now for the change feed, and drop the entries older than a full refresh"""
+        now = time.time()
+        pipeline = self.get_redis_client().pipeline()
+        if root_dirs:
+            pipeline.zadd(self.changes_key, {root_dir: now for root_dir in root_dirs})
+        pipeline.zremrangebyscore(self.changes_key, "-inf", now - s3_index_full_refresh_time)
+        pipeline.execute()
+
+    def changed_since(self, watermark: float, until: float) -> list[str]:
+        """Return the s3 root dirs added, updated or removed in the index after the watermark, up to `until`"""
+        root_dirs = self.get_redis_client().zrangebyscore(self.changes_key, f"({watermark}", until)
+        return [self.decode(root_dir) for root_dir in root_dirs]
+
+    @staticmethod
+    def add_object(entry: dict, s3_object: dict) -> None:
+        last_modified = s3_object["LastModified"].timestamp()
+        entry["objects"].append([s3_object["Key"], last_modified, s3_object.get("Size", 0)])
+        entry["last_modified"] = max(entry["last_modified"], last_modified)
+
+    @staticmethod
+    def decode(value) -> str:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def get_meta(self) -> dict[str, float]:
+        meta = self.get_redis_client().hgetall(self.meta_key)
+        return {self.decode(field): float(value) for field, value in meta.items()}
+
+    def get_dirs(self, root_dirs: list[str]) -> dict[str, dict]:
+        if not root_dirs:
+            return {}
+        values = self.get_redis_client().hmget(self.dirs_key, root_dirs)
+        return {root_dir: json.loads(value) for root_dir, value in zip(root_dirs, values) if value}
+
+    def list_objects(self, root_dir_filter: Callable[[str], bool] | None = None) -> list[dict]:
+        """Return the indexed objects in the same shape and order as `S3Client.list_all_s3_objects`.
+        With a root dir filter, only the field names are read (HKEYS) and only the matching folders are fetched and
+        decoded (HMGET), instead of the whole index."""
+        if root_dir_filter is None:
+            entries = self.get_redis_client().hgetall(self.dirs_key)
+            return self.to_s3_objects(json.loads(value) for value in entries.values())
+        root_dirs = [self.decode(root_dir) for root_dir in self.get_redis_client().hkeys(self.dirs_key)]
+        return self.to_s3_objects(
+            self.get_dirs([root_dir for root_dir in root_dirs if root_dir_filter(root_dir)]).values()
+        )
+
+    def list_dir_objects(self, root_dirs: list[str]) -> list[dict]:
+        """Return the indexed objects of the given report folders, listing the folders missing from the index first"""
+        entries = self.get_dirs(root_dirs)
+        missing_dirs = [root_dir for root_dir in root_dirs if root_dir not in entries]
+        if missing_dirs:
+            self.refresh_dirs(missing_dirs)
+            entries.update(self.get_dirs(missing_dirs))
+        return self.to_s3_objects(entries.values())
+
+    @staticmethod
+    def to_s3_objects(entries) -> list[dict]:
+        s3_objects = [
+            {"Key": key, "LastModified": datetime.fromtimestamp(last_modified, tz=timezone.utc), "Size": size}
+            for entry in entries
+            for key, last_modified, size in entry["objects"]
+        ]
+        s3_objects.sort(key=lambda obj: obj["LastModified"], reverse=True)
+        return s3_objects
+
+    def total_objects(self) -> int:
+        return int(self.get_meta().get("total_objects", 0))
+
+    def resolve_root_dir(self, card_date_folder: str) -> str | None:
+        """Resolve a card folder to its indexed s3 root dir. Accepts the full root dir or just the report day folder.
+        '12-31-2025_08-30-00_AM' -> 'trading-apps/test_reports/loan/qa/api/12-31-2025_08-30-00_AM'
+        """
+        card_date_folder = card_date_folder.rstrip("/")
+        if "/" in card_date_folder:
+            return card_date_folder
+        for root_dir, _ in self.get_redis_client().hscan_iter(self.dirs_key, match=f"*/{card_date_folder}", count=500):
+            return self.decode(root_dir)
+        return None
+
+
+S3Index = S3ListingIndex(S3)
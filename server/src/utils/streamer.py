@@ -1,10 +1,180 @@
+import asyncio
+import codecs
+import ctypes
+import ctypes.util
 import os
 import aiofiles
-import asyncio
+from config import (
+    log_stream_batch_max_bytes,
+    log_stream_batch_max_delay,
+    log_stream_batch_max_lines,
+    log_stream_poll_max_interval,
+    log_stream_poll_min_interval,
+)
 from src.utils.logger import logger
 
 
-stream_tasks = {}
+class InotifyWatcher:
+    """Wakes the tailer when the log file is written to, using Linux inotify through libc (no extra dependency)"""
+
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_DELETE_SELF = 0x400
+    IN_MOVE_SELF = 0x800
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+
+    def __init__(self, log_file_path: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(log_file_path), self.WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {log_file_path}")
+        self.fd = fd
+        self.changed = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+        self.loop.add_reader(fd, self.on_event)
+
+    def on_event(self) -> None:
+        try:
+            while os.read(self.fd, 4096):
+                pass  # drain the queued events, only the wake up matters
+        except BlockingIOError:
+            pass
+        self.changed.set()
+
+    async def wait(self, timeout: float) -> None:
+        """Wait until the file changes or the timeout expires"""
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self.changed.clear()
+
+    def reset(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.loop.remove_reader(self.fd)
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback when inotify is not available (e.g. macOS): polls with an interval that backs off while the file is idle"""
+
+    def __init__(
+        self, min_interval: float = log_stream_poll_min_interval, max_interval: float = log_stream_poll_max_interval
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    async def wait(self, timeout: float) -> None:
+        await asyncio.sleep(min(self.interval, timeout))
+        self.interval = min(self.max_interval, self.interval * 2)
+
+    def reset(self) -> None:
+        self.interval = self.min_interval
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(log_file_path: str) -> InotifyWatcher | PollingWatcher:
+    try:
+        return InotifyWatcher(log_file_path)
+    except (AttributeError, OSError) as e:
+        logger.info(f"inotify not available for {log_file_path} ({str(e)}). Falling back to polling")
+        return PollingWatcher()
+
+
+class LogTailer:
+    """Tails one log file for every socket client watching it. New lines are read once and emitted to each
+    subscribed sid in batches bounded by line count, size and delay, instead of one message per line.
+    The tail starts at the beginning of the file; sids joining a running tailer receive the lines from then on."""
+
+    def __init__(self, sio, log_file_path: str) -> None:
+        self.sio = sio
+        self.log_file_path = log_file_path
+        self.subscribers: dict[str, str] = {}  # {sid: subscription event name}
+        self.task: asyncio.Task | None = None
+
+    def subscribe(self, sid: str, subscription: str) -> None:
+        self.subscribers[sid] = subscription
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.tail())
+
+    def unsubscribe(self, sid: str) -> bool:
+        """Remove the sid and stop tailing once nobody is watching. Returns True if the tailer stopped."""
+        self.subscribers.pop(sid, None)
+        if self.subscribers:
+            return False
+        if self.task:
+            self.task.cancel()
+        return True
+
+    async def emit(self, lines: list[str]) -> None:
+        await asyncio.gather(
+            *[self.sio.emit(subscription, lines, room=sid) for sid, subscription in list(self.subscribers.items())],
+            return_exceptions=True,
+        )
+
+    async def tail(self) -> None:
+        loop = asyncio.get_running_loop()
+        watcher = create_watcher(self.log_file_path)
+        batch: list[str] = []
+        batch_bytes = 0
+        batch_started_at = 0.0
+        partial = ""
+        position = 0  # bytes read, compared with the file size to detect truncation
+        # Read bytes and decode them incrementally: a multi-byte character can be split across reads, and invalid
+        # UTF-8 is replaced, so the decoded text length cannot be used as the read position
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            async with aiofiles.open(self.log_file_path, "rb") as log_file:
+                while True:
+                    raw_chunk = await log_file.read(log_stream_batch_max_bytes)
+                    chunk = decoder.decode(raw_chunk)
+                    if raw_chunk:
+                        watcher.reset()
+                        position += len(raw_chunk)
+                        *lines, partial = (partial + chunk).split("\n")
+                        if lines and not batch:
+                            batch_started_at = loop.time()
+                        for line in lines:
+                            batch.append(line + "\n")
+                            batch_bytes += len(line) + 1
+
+                    batch_is_due = batch and (
+                        len(batch) >= log_stream_batch_max_lines
+                        or batch_bytes >= log_stream_batch_max_bytes
+                        or loop.time() - batch_started_at >= log_stream_batch_max_delay
+                    )
+                    if batch_is_due:
+                        await self.emit(batch)
+                        batch, batch_bytes = [], 0
+                    if raw_chunk:
+                        continue
+
+                    # Caught up with the writer: wait for the next write, or for the pending batch to be due
+                    timeout = log_stream_batch_max_delay if batch else log_stream_poll_max_interval
+                    await watcher.wait(timeout)
+                    if os.path.getsize(self.log_file_path) < position:
+                        logger.info(f"Log file {self.log_file_path} was truncated. Tailing from the start")
+                        await log_file.seek(0)
+                        position, partial = 0, ""
+                        decoder.reset()
+        except FileNotFoundError:
+            logger.info(f"Log file {self.log_file_path} was removed. Stopped tailing it")
+        finally:
+            watcher.close()
+
+
+tailers: dict[str, LogTailer] = {}  # {log_file_path: LogTailer}
+sid_log_files: dict[str, str] = {}  # {sid: log_file_path}
 
 
 async def start_streaming_log_file(sio, sid, subscription, log_file_path):
@@ -12,26 +182,25 @@ async def start_streaming_log_file(sio, sid, subscription, log_file_path):
     if not file_exists:
         with open(log_file_path, "w"):
             pass
-    if not stream_tasks.get(sid):
-        stream_task = asyncio.create_task(stream_log_file(sio, sid, subscription, log_file_path))
-        stream_tasks[sid] = stream_task
-    else:
+    if sid_log_files.get(sid) == log_file_path:
         logger.info(f"Stream task already exists for {sid}")
+        return
+    await stop_streaming_log_file(sid)
 
-
-async def stream_log_file(sio, sid, subscription, log_file_path):
-    async with aiofiles.open(log_file_path, "r", encoding="utf-8") as log_file:
-        while True:
-            line = await log_file.readline()
-            if line:
-                await sio.emit(subscription, line, room=sid)
-    await asyncio.sleep(1)
+    tailer = tailers.get(log_file_path)
+    if tailer is None:
+        tailer = tailers[log_file_path] = LogTailer(sio, log_file_path)
+    tailer.subscribe(sid, subscription)
+    sid_log_files[sid] = log_file_path
+    logger.info(f"Streaming log file {log_file_path} to {sid} | {len(tailer.subscribers)} watching")
 
 
 async def stop_streaming_log_file(sid):
-    if stream_tasks.get(sid):
-        stream_task = stream_tasks.pop(sid)
-        stream_task.cancel()
+    log_file_path = sid_log_files.pop(sid, None)
+    tailer = tailers.get(log_file_path) if log_file_path else None
+    if tailer:
+        if tailer.unsubscribe(sid):
+            tailers.pop(log_file_path, None)
         logger.info(f"Stopped streaming log file for {sid}")
     else:
         logger.info(f"No stream task found for {sid}")
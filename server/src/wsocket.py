@@ -1,10 +1,10 @@
-import asyncio
 from fastapi import FastAPI
 from socketio import AsyncServer
 from src.utils.env_loader import get_node_env
 from src.utils.streamer import start_streaming_log_file, stop_streaming_log_file
 from src.utils.logger import logger
-from src.utils.executor import create_command, run_a_command_on_local
+from src.utils.execution_queue import Executions
+from src.utils.executor import create_command
 from config import the_lab_log_file_name, do_current_clients_count_key
 
 
@@ -24,7 +24,7 @@ class WebSocketServer:
         logger.info(f"WebSocketServer initialized with SIO: {sio is not None}")
 
     async def connect(self, sid, environ, auth=None, namespace="/"):
-        do_clients_count = self.instances.redis.get(do_current_clients_count_key)
+        do_clients_count = await self.instances.aioredis.get(do_current_clients_count_key)
         node_env = get_node_env()
 
         logger.info(f"\tConnected to W.S. client... [{sid}] | Connection #{do_clients_count}")
@@ -34,7 +34,7 @@ class WebSocketServer:
             room=sid,
         )
         if node_env == "production":
-            self.instances.redis.refresh_redis_client_metrics()
+            await self.instances.aioredis.refresh_redis_client_metrics()
             await self.sio.emit(
                 "message",
                 f"DO active clients count: {do_clients_count} | Node Env: {node_env}",
@@ -42,7 +42,7 @@ class WebSocketServer:
             )
 
     async def disconnect(self, sid, namespace="/"):
-        do_clients_count = self.instances.redis.decrement_key(do_current_clients_count_key)
+        do_clients_count = await self.instances.aioredis.decrement_key(do_current_clients_count_key)
         await stop_streaming_log_file(sid)
         logger.info(f"\tDisconnected from socket client... [{sid}] | Clients connected: {do_clients_count}")
 
@@ -50,7 +50,7 @@ class WebSocketServer:
         logger.info(f"Socket client [{sid}] sent data to cards: {expected_filter_data}")
         cards = self.fastapi_app.state.cards
         if cards:
-            cards = cards.get_cards_from_cache(expected_filter_data)
+            cards = await cards.actions({**expected_filter_data, "mode": "cache"})
             if len(cards) == 0:
                 logger.info(f"No cards found in cache. length: {len(cards)}")
                 await self.sio.emit("cards", False, room=sid)
@@ -68,10 +68,16 @@ class WebSocketServer:
 
         subscription = "the-lab"
         command = create_command(options)
-        command_task = asyncio.create_task(
-            run_a_command_on_local(f"{command} >> logs/{the_lab_log_file_name}")
-        )  # start background task to run the command
+        job, queued = await Executions.enqueue(
+            options, f"{command} >> logs/{the_lab_log_file_name}", priority=1, source="the-lab"
+        )  # interactive runs go ahead of the /execute ones, the scheduler starts it once the environment is free
+        position = await Executions.position(job["id"])
+        status = f"queued at position {position}" if position else job["status"]
+        await self.sio.emit(
+            subscription,
+            [f"Execution {job['id']} {status}{'' if queued else ' (same options already requested)'}\n"],
+            room=sid,
+        )
         the_lab_log_file_path: str = self.fastapi_app.state.the_lab_log_file_path
 
         await start_streaming_log_file(self.sio, sid, subscription, the_lab_log_file_path)
-        await command_task
@@ -34,9 +34,14 @@ elif [ "$SERVER_MODE" = "notification" ]; then
     poetry run python3 src/services/notification.py 2>&1 & NOTIFICATION_PID=$!
     echo $NOTIFICATION_PID > "${pid_dir}notification.pid"
     echo "[$(date)] Notification service started with PID: $NOTIFICATION_PID"
+elif [ "$SERVER_MODE" = "download" ]; then
+    echo "[$(date)] Running download worker"
+    poetry run python3 src/services/download_worker.py 2>&1 & DOWNLOAD_PID=$!
+    echo $DOWNLOAD_PID > "${pid_dir}download.pid"
+    echo "[$(date)] Download worker started with PID: $DOWNLOAD_PID"
 else
     echo "[$(date)] Unknown server mode: $SERVER_MODE"
-    echo "[$(date)] Supported modes: 'main', 'fixme', 'notification'"
+    echo "[$(date)] Supported modes: 'main', 'fixme', 'notification', 'download'"
     exit 1
 fi
 
@@ -7,7 +7,7 @@ source ./utils/env-loader.sh
 
 if [ -z "$SERVICE" ]; then
     echo "Usage: $0 <service> [debug]"
-    echo "Services: client, server, notification, all"
+    echo "Services: client, server, notification, download, all"
     exit 1
 fi
 
@@ -47,6 +47,9 @@ restart_service() {
         "notification")
             nohup npm run notification >> "$log_file" 2>&1 &
             ;;
+        "download")
+            nohup npm run download >> "$log_file" 2>&1 &
+            ;;
         *)
             echo "[$(date)] Unknown service: $service_name"
             return 1
@@ -74,12 +77,12 @@ case "$SERVICE" in
         sleep 2
         ./utils/start.sh "$DEBUG"
         ;;
-    "client"|"server"|"fixme"|"notification")
+    "client"|"server"|"fixme"|"notification"|"download")
         restart_service "$SERVICE"
         ;;
     *)
         echo "Unknown service: $SERVICE"
-        echo "Available services: client, server, fixme, notification, all"
+        echo "Available services: client, server, fixme, notification, download, all"
         exit 1
         ;;
 esac
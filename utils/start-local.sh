@@ -4,4 +4,4 @@ source ./utils/env-loader.sh
 
 echo "Starting development environment..."
 
-concurrently "cd client && npm run dev" "cd server && bash start.sh main true" "cd server && bash start.sh notification false" "cd fixme && bash start.sh fixme"
+concurrently "cd client && npm run dev" "cd server && bash start.sh main true" "cd server && bash start.sh notification false" "cd server && bash start.sh download false" "cd fixme && bash start.sh fixme"
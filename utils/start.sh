@@ -2,7 +2,7 @@
 SERVICE=$1
 if [ -z "$SERVICE" ]; then
     echo "Error: No service specified"
-    echo "Usage: npm run [client|server|notification|fixme] [debug]"
+    echo "Usage: npm run [client|server|notification|download|fixme] [debug]"
     echo "Example: npm run client prod false"
     exit 1
 fi
@@ -38,6 +38,11 @@ if [ -f /.dockerenv ]; then
             # npm run notification
             exit $?
             ;;
+        "download")
+            cd server && poetry run python3 src/services/download_worker.py
+            # npm run download
+            exit $?
+            ;;
         *)
             echo "Unknown service: $SERVICE"
             exit 1
@@ -52,7 +57,7 @@ fi
 
 # Set services array based on SERVICE parameter
 if [ "$SERVICE" = "all" ]; then
-    services=("client" "server" "notification" "fixme")
+    services=("client" "server" "notification" "download" "fixme")
 else
     services=("$SERVICE")
 fi
@@ -60,6 +65,7 @@ fi
 client_log_file="logs/client.log"
 server_log_file="logs/server.log"
 notification_log_file="logs/notification.log"
+download_log_file="logs/download.log"
 fixme_log_file="logs/fixme.log"
 
 # PID management functions below
@@ -154,7 +160,7 @@ get_service_pid() {
 
 echo "[$(date)] Starting background processes for Doctor Octopus app..."
 echo "[$(date)] Checking for existing processes and clean up stale PIDs..."
-for process in client server notification; do
+for process in client server notification download; do
     cleanup_stale_pids "logs/${process}.pid" "$process" && {
         echo "[$(date)] $process is already running. Stop it first with: npm run stop"
         exit 1
@@ -210,6 +216,25 @@ if [ "$SERVICE" = "all" ] || [ "$SERVICE" = "notification" ]; then
     fi
 fi
 
+if [ "$SERVICE" = "all" ] || [ "$SERVICE" = "download" ]; then
+    echo "[$(date)] Starting the download worker..."
+    nohup npm run download >> "$download_log_file" 2>&1 &
+    DOWNLOAD_PID=$!
+    if save_pid_with_validation "$DOWNLOAD_PID" "download"; then
+        echo "[$(date)] Download worker process started. [$DOWNLOAD_PID]"
+        echo "[$(date)] Download worker logs at >> $download_log_file"
+    else
+        echo "[$(date)] Failed to start download worker"
+        client_pid=$(get_service_pid "client")
+        server_pid=$(get_service_pid "server")
+        notification_pid=$(get_service_pid "notification")
+        [ -n "$client_pid" ] && kill "$client_pid" 2>/dev/null
+        [ -n "$server_pid" ] && kill "$server_pid" 2>/dev/null
+        [ -n "$notification_pid" ] && kill "$notification_pid" 2>/dev/null
+        exit 1
+    fi
+fi
+
 if [ "$SERVICE" = "all" ] || [ "$SERVICE" = "fixme" ]; then
     echo "[$(date)] Starting the FIXME server..."
     nohup npm run fixme >> "$fixme_log_file" 2>&1 &
@@ -222,9 +247,11 @@ if [ "$SERVICE" = "all" ] || [ "$SERVICE" = "fixme" ]; then
         client_pid=$(get_service_pid "client")
         server_pid=$(get_service_pid "server")
         notification_pid=$(get_service_pid "notification")
+        download_pid=$(get_service_pid "download")
         [ -n "$client_pid" ] && kill $client_pid 2>/dev/null
         [ -n "$server_pid" ] && kill $server_pid 2>/dev/null
         [ -n "$notification_pid" ] && kill $notification_pid 2>/dev/null
+        [ -n "$download_pid" ] && kill $download_pid 2>/dev/null
         exit 1
     fi
 fi
@@ -250,7 +277,7 @@ if [ "$DEBUG" = "true" ]; then
     sleep 7
 
     echo "[$(date)] === Recent Logs ==="
-    for service in client server notification fixme; do
+    for service in client server notification download fixme; do
         echo "[$(date)] --- ${service^} Log ---"
         if [ -f "logs/${service}.log" ]; then
             tail -5 "logs/${service}.log" | sed 's/^/  /'
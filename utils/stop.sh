@@ -1,7 +1,7 @@
 #!/bin/bash
 
 echo "[$(date)] Stopping Doctor Octopus services..."
-services=("notification" "server" "client" "fixme")  # Stops in reverse order
+services=("download" "notification" "server" "client" "fixme")  # Stops in reverse order
 
 # Function to safely stop a service
 stop_service() {